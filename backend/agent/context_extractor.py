@@ -0,0 +1,269 @@
+"""
+Context Extractor — the part of a large file an AI fix actually needs.
+Instead of the file head plus a fixed ±30-line window, each marked line gets
+its enclosing function or class (Python via `ast`, JS/TS/Go by brace scanning,
+indent scanning for Python that doesn't parse), the imports that code uses and
+the headers of same-file definitions it references — within a token budget.
+"""
+import ast
+import os
+import re
+
+from agent.rate_limit import CHARS_PER_TOKEN
+
+AI_CONTEXT_TOKENS = int(os.getenv("AI_CONTEXT_TOKENS", "1500"))    # prompt budget for file context
+NEIGHBOUR_LINES = 3         # always shown either side of a marked line
+MAX_SYMBOLS = 10            # referenced definitions shown per prompt
+HEADER_LOOKBACK = 5         # lines a multi-line JS/Go signature may span before its `{`
+
+IDENT_RE = re.compile(r'\b[A-Za-z_$][\w$]*\b')
+JS_STRING_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`(?:\\.|[^`\\])*`')
+PY_DEF_RE = re.compile(r'^(\s*)(?:async\s+def|def|class)\s+(\w+)')
+PY_ASSIGN_RE = re.compile(r'^([A-Za-z_]\w*)\s*(?::[^=]+)?=[^=]')
+PY_IMPORT_RE = re.compile(r'^(?:import|from)\s')
+JS_SYMBOL_RE = re.compile(r'^(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:abstract\s+)?'
+                          r'(?:function\*?|class|const|let|var|interface|type|enum)\s+([A-Za-z_$][\w$]*)')
+GO_SYMBOL_RE = re.compile(r'^(?:func\s+(?:\([^)]*\)\s*)?|type\s+|var\s+|const\s+)([A-Za-z_]\w*)')
+JS_REQUIRE_RE = re.compile(r'^\s*(?:const|let|var)\s+(.+?)=\s*require\(')
+IMPORT_KEYWORDS = {'import', 'from', 'as', 'type', 'default', 'const', 'let', 'var', 'require'}
+# Scanner agents report 'python'; the Security Agent reports the file extension
+PYTHON_LANGUAGES = {'python', 'py', 'pyw'}
+
+
+class Outline:
+    """Blocks ``(start, end)``, imports ``(start, end, names)`` and symbol headers ``{name: (start, end)}``.
+
+    All positions are indices into the fixer's line list.
+    """
+
+    def __init__(self):
+        self.blocks = []
+        self.imports = []
+        self.symbols = {}
+
+
+def _python_outline(lines: list) -> Outline:
+    outline = Outline()
+    # A fixed line may hold several physical lines — map ast line numbers back to list indices
+    physical = []
+    for idx, line in enumerate(lines):
+        physical.extend([idx] * len(line.splitlines()))
+    tree = ast.parse(''.join(lines))
+
+    def at(lineno):
+        return physical[min(lineno, len(physical)) - 1]
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            outline.blocks.append((at(start), at(node.end_lineno)))
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            names = {(alias.asname or alias.name).split('.')[0] for alias in node.names}
+            outline.imports.append((at(node.lineno), at(node.end_lineno), names))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            header_end = max(at(node.lineno), at(node.body[0].lineno) - 1)
+            outline.symbols[node.name] = (at(start), header_end)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    outline.symbols[target.id] = (at(node.lineno), at(node.end_lineno))
+    return outline
+
+
+def _indent_outline(lines: list) -> Outline:
+    """Python that doesn't parse (the SYNTAX findings): blocks by indentation."""
+    outline = Outline()
+    for idx, line in enumerate(lines):
+        match = PY_DEF_RE.match(line)
+        if match:
+            indent = len(match.group(1))
+            end = idx
+            for j in range(idx + 1, len(lines)):
+                if lines[j].strip():
+                    if len(lines[j]) - len(lines[j].lstrip()) <= indent:
+                        break
+                    end = j
+            outline.blocks.append((idx, end))
+            if not indent:
+                outline.symbols[match.group(2)] = (idx, idx)
+        elif PY_IMPORT_RE.match(line):
+            clause = line.split(' import ', 1)[1] if line.startswith('from ') else line[len('import '):]
+            names = {part.split(' as ')[-1].strip().split('.')[0]
+                     for part in clause.strip().strip('()').split(',') if part.strip()}
+            outline.imports.append((idx, idx, names))
+        else:
+            match = PY_ASSIGN_RE.match(line)
+            if match:
+                outline.symbols[match.group(1)] = (idx, idx)
+    return outline
+
+
+def _header_start(lines: list, idx: int) -> int:
+    """Back up from a `{` line over the rest of a multi-line signature."""
+    start = idx
+    while start > 0 and idx - start < HEADER_LOOKBACK:
+        prev = lines[start - 1].strip()
+        if not prev or not (prev.endswith((',', '(', '=>', '=', '&&', '||')) or prev.startswith('@')):
+            break
+        start -= 1
+    return start
+
+
+def _brace_outline(lines: list, language: str) -> Outline:
+    outline = Outline()
+    symbol_re = GO_SYMBOL_RE if language == 'go' else JS_SYMBOL_RE
+    stack = []
+    in_comment = False
+    import_start = None
+    for idx, line in enumerate(lines):
+        depth = len(stack)
+        code = JS_STRING_RE.sub('""', line).split('//')[0]
+        if in_comment:
+            if '*/' not in code:
+                continue
+            code = code.split('*/', 1)[1]
+            in_comment = False
+        if '/*' in code:
+            code, _, rest = code.partition('/*')
+            in_comment = '*/' not in rest
+        for ch in code:
+            if ch == '{':
+                stack.append(idx)
+            elif ch == '}' and stack:
+                start = stack.pop()
+                if idx > start:
+                    outline.blocks.append((_header_start(lines, start), idx))
+
+        stripped = line.strip()
+        # Imports: JS `import …` (possibly multi-line), `const x = require(…)`, Go import blocks
+        if import_start is not None:
+            if (language == 'go' and stripped.startswith(')')) or (language != 'go' and (
+                    ' from ' in f' {stripped}' or stripped.endswith(';'))):
+                _add_import(outline, lines, import_start, idx, language)
+                import_start = None
+            continue
+        if depth:
+            continue
+        if language == 'go':
+            if stripped.startswith('import ('):
+                import_start = idx
+            elif stripped.startswith('import '):
+                _add_import(outline, lines, idx, idx, language)
+        elif stripped.startswith('import '):
+            if ' from ' in stripped or stripped.endswith(';') or re.match(r"import\s+['\"]", stripped):
+                _add_import(outline, lines, idx, idx, language)
+            else:
+                import_start = idx
+        elif JS_REQUIRE_RE.match(line):
+            _add_import(outline, lines, idx, idx, language)
+        match = symbol_re.match(line)
+        if match:
+            outline.symbols[match.group(1)] = (idx, idx)
+    return outline
+
+
+def _add_import(outline: Outline, lines: list, start: int, end: int, language: str):
+    text = ''.join(lines[start:end + 1])
+    if language == 'go':
+        names = set()
+        for spec in re.findall(r'(?:(\w+)\s+)?"([^"]+)"', text):
+            names.add(spec[0] or spec[1].rstrip('/').split('/')[-1])
+    else:
+        names = set(IDENT_RE.findall(JS_STRING_RE.sub(' ', text))) - IMPORT_KEYWORDS
+    outline.imports.append((start, end, names))
+
+
+def outline(lines: list, language: str) -> Outline:
+    if language in PYTHON_LANGUAGES:
+        try:
+            return _python_outline(lines)
+        except (SyntaxError, ValueError):
+            return _indent_outline(lines)
+    return _brace_outline(lines, language)
+
+
+def extract_context(lines: list, marked, language: str = 'python', budget: int = AI_CONTEXT_TOKENS) -> str:
+    """Numbered excerpt of ``lines`` for an AI prompt, ``>>>`` on the ``marked`` indices.
+
+    In priority order, within ``budget`` tokens: the marked lines and
+    NEIGHBOUR_LINES around them; each one's innermost enclosing block (or
+    as much of it around the line as fits); the imports the selected code
+    uses; enclosing outer blocks; the headers of same-file definitions it
+    references. Skipped stretches are shown as an omitted-lines note.
+    """
+    limit = budget * CHARS_PER_TOKEN
+    selected = set()
+    used = 0
+
+    def take(indices, force=False) -> bool:
+        nonlocal used
+        new = [i for i in indices if i not in selected]
+        cost = sum(len(lines[i]) + 8 for i in new)
+        if not force and used + cost > limit:
+            return False
+        selected.update(new)
+        used += cost
+        return True
+
+    for m in sorted(marked):
+        take(range(max(0, m - NEIGHBOUR_LINES), min(len(lines), m + NEIGHBOUR_LINES + 1)), force=True)
+
+    info = outline(lines, language)
+    enclosing = {m: sorted((b for b in info.blocks if b[0] <= m <= b[1]), key=lambda b: b[1] - b[0])
+                 for m in marked}
+    # Windows into oversized blocks leave a quarter of the budget for imports and definitions
+    share = max(0, limit - used) * 3 // 4 // max(1, len(marked))
+    for m, blocks in enclosing.items():
+        if not blocks or take(range(blocks[0][0], blocks[0][1] + 1)):
+            continue
+        # Too big to show whole: grow a window around the line inside the block
+        lo, hi = m, m
+        first, last = blocks[0]
+        grown = 0
+        while grown < share and (lo > first or hi < last):
+            for i in (lo - 1, hi + 1):
+                if first <= i <= last and i not in selected:
+                    grown += len(lines[i]) + 8
+            lo, hi = max(first, lo - 1), min(last, hi + 1)
+            if grown > share:
+                break
+        take(range(lo, hi + 1), force=True)
+        take([first])   # the signature, even when the body doesn't fit
+
+    names = set(IDENT_RE.findall(''.join(lines[i] for i in selected)))
+    for start, end, bound in info.imports:
+        if bound & names:
+            take(range(start, end + 1))
+
+    for m, blocks in enclosing.items():
+        for start, end in blocks[1:]:
+            if not take(range(start, end + 1)):
+                take([start])
+                break
+
+    names = set(IDENT_RE.findall(''.join(lines[i] for i in selected)))
+    shown = 0
+    for name, (start, end) in info.symbols.items():
+        if shown >= MAX_SYMBOLS:
+            break
+        if name in names and start not in selected and take(range(start, end + 1)):
+            shown += 1
+
+    def omitted(first, last):
+        span = f"line {first}" if first == last else f"lines {first}-{last}"
+        return f"     ... ({span} omitted) ...\n"
+
+    parts = [f"=== Excerpt of {len(lines)} lines: enclosing code, used imports, referenced definitions ===\n"]
+    previous = -1
+    for ci in sorted(selected):
+        if ci > previous + 1:
+            parts.append(omitted(previous + 2, ci))
+        text = lines[ci] if lines[ci].endswith('\n') else lines[ci] + '\n'
+        parts.append(f"{' >>>' if ci in marked else '    '} {ci + 1}: {text}")
+        previous = ci
+    if previous < len(lines) - 1:
+        parts.append(omitted(previous + 2, len(lines)))
+    return ''.join(parts)
@@ -0,0 +1,68 @@
+// Persistent ESLint worker — see agent/lint_workers.py.
+// Reads one JSON request per line on stdin: {cwd, targets, ignorePatterns}
+// and answers one JSON line: {ok: true, results} (same shape as `eslint -f json`)
+// or {ok: false, error}. ESLint modules stay loaded between requests.
+// The repo's own ESLint, config and plugins run in this process, so each
+// analysis run gets its own worker and kills it when the run ends.
+const path = require('path');
+const readline = require('readline');
+
+const loaded = new Map();
+
+function loadEslint(cwd) {
+  let resolved;
+  try {
+    resolved = require.resolve('eslint', { paths: [cwd, __dirname] });
+  } catch (err) {
+    return null;
+  }
+  if (!loaded.has(resolved)) {
+    loaded.set(resolved, require(resolved));
+  }
+  return loaded.get(resolved);
+}
+
+async function lint(request) {
+  const mod = loadEslint(request.cwd);
+  if (!mod) {
+    return { ok: false, error: 'eslint not found' };
+  }
+  let ESLint = mod.ESLint;
+  let flat = true;
+  if (mod.loadESLint) {
+    ESLint = await mod.loadESLint({ cwd: request.cwd });
+    flat = ESLint.configType !== 'eslintrc';
+  } else if (!mod.ESLint) {
+    return { ok: false, error: 'unsupported eslint version' };
+  } else {
+    flat = false;
+  }
+  const options = { cwd: request.cwd, errorOnUnmatchedPattern: false };
+  if (flat) {
+    options.ignorePatterns = request.ignorePatterns;
+  } else {
+    options.overrideConfig = { ignorePatterns: request.ignorePatterns };
+  }
+  const eslint = new ESLint(options);
+  const results = await eslint.lintFiles(request.targets);
+  return {
+    ok: true,
+    results: results.map((r) => ({
+      filePath: path.resolve(request.cwd, r.filePath),
+      messages: r.messages,
+    })),
+  };
+}
+
+let queue = Promise.resolve();
+readline.createInterface({ input: process.stdin }).on('line', (line) => {
+  queue = queue.then(async () => {
+    let reply;
+    try {
+      reply = await lint(JSON.parse(line));
+    } catch (err) {
+      reply = { ok: false, error: String(err && err.message || err) };
+    }
+    process.stdout.write(JSON.stringify(reply) + '\n');
+  });
+});
@@ -0,0 +1,89 @@
+"""
+File Classifier — content sniffing for the in-Python pattern scanners.
+Binary, minified and machine-generated files are skipped; large text
+files are streamed through mmap so peak memory per file stays bounded.
+"""
+import mmap
+
+SNIFF_BYTES = 8192
+MAX_LINE_LENGTH = 1000                  # longer lines in the sniff window → minified
+STREAM_THRESHOLD = 512 * 1024           # above this, read via mmap in chunks
+MAX_SCAN_BYTES = 20 * 1024 * 1024       # above this, don't scan at all
+CHUNK_BYTES = 1024 * 1024
+CLASSIFIER_VERSION = "1"              # bump when classification rules change (scan cache key)
+
+GENERATED_MARKERS = (b'@generated', b'do not edit', b'code generated by',
+                     b'auto-generated', b'autogenerated', b'this file was generated')
+
+# Classification results
+TEXT = 'text'
+LARGE = 'large'
+BINARY = 'binary'
+MINIFIED = 'minified'
+GENERATED = 'generated'
+OVERSIZED = 'oversized'
+UNREADABLE = 'unreadable'
+
+SCANNABLE = {TEXT, LARGE}
+
+
+def classify_file(path: str, size: int) -> str:
+    """Sniff the head of a file and decide whether/how pattern scanners read it."""
+    if size > MAX_SCAN_BYTES:
+        return OVERSIZED
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+    except OSError:
+        return UNREADABLE
+
+    if b'\0' in head:
+        return BINARY
+
+    # Generated-file banners live in the first few lines
+    banner = b'\n'.join(head.split(b'\n', 5)[:5]).lower()
+    if any(marker in banner for marker in GENERATED_MARKERS):
+        return GENERATED
+
+    lines = head.split(b'\n')
+    if len(head) == SNIFF_BYTES:
+        lines = lines[:-1] or lines     # last line may be cut by the window
+    if any(len(line) > MAX_LINE_LENGTH for line in lines):
+        return MINIFIED
+
+    return LARGE if size > STREAM_THRESHOLD else TEXT
+
+
+def _decode(data: bytes) -> str:
+    return data.decode('utf-8', errors='ignore').replace('\r\n', '\n')
+
+
+def iter_text_chunks(path: str, size: int):
+    """Yield the file's text in chunks that always end on a line boundary.
+
+    Small files come back as a single chunk; large ones are memory-mapped
+    and sliced into ~CHUNK_BYTES pieces so they are never fully decoded.
+    """
+    if size <= STREAM_THRESHOLD:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            yield f.read()
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = 0
+        end = len(mm)
+        while pos < end:
+            cut = mm.find(b'\n', min(pos + CHUNK_BYTES, end) - 1)
+            cut = end if cut == -1 else cut + 1
+            yield _decode(mm[pos:cut])
+            pos = cut
+
+
+def iter_lines(path: str, size: int):
+    """Yield the file's lines one at a time (mmap-backed for large files)."""
+    if size <= STREAM_THRESHOLD:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            yield from f
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for line in iter(mm.readline, b''):
+            yield _decode(line)
@@ -0,0 +1,237 @@
+"""
+Repository File Index — one enumeration per run, shared by every agent.
+Scanners, the test runner and the fixer query this index instead of
+re-walking the cloned repository on every probe. Files come from git
+(honouring .gitignore) with a compiled exclude filter on top.
+"""
+import fnmatch
+import os
+import re
+import stat
+import subprocess
+import threading
+from typing import NamedTuple
+
+from agent.file_classifier import classify_file
+from agent.scan_cache import blob_hash
+
+SKIP_DIRS = {'node_modules', '.git', 'dist', 'build', '.next', 'coverage',
+             '__pycache__', 'venv', '.venv', 'env', '.env', 'vendor', 'target'}
+# Extra repo-relative globs to leave out, comma separated (e.g. "*.generated.ts,docs/*")
+SCAN_EXCLUDE = [p.strip() for p in os.getenv("SCAN_EXCLUDE", "").split(',') if p.strip()]
+
+# Bundled / lock files that are indexed but never worth scanning
+SKIP_SUFFIXES = ('.min.js', '.bundle.js')
+SKIP_FILENAMES = {'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml'}
+
+LANGUAGE_MAP = {
+    '.py': 'python', '.pyw': 'python',
+    '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript',
+    '.ts': 'typescript', '.tsx': 'typescript',
+    '.go': 'go',
+    '.java': 'java', '.kt': 'kotlin',
+    '.rs': 'rust',
+    '.c': 'c', '.cpp': 'cpp', '.h': 'c', '.hpp': 'cpp',
+    '.rb': 'ruby',
+    '.php': 'php',
+    '.css': 'css', '.scss': 'scss',
+    '.html': 'html', '.htm': 'html',
+    '.json': 'json', '.yaml': 'yaml', '.yml': 'yaml',
+    '.md': 'markdown', '.txt': 'text',
+    '.sh': 'shell', '.bash': 'shell',
+}
+
+
+class FileEntry(NamedTuple):
+    path: str           # repo-relative, forward slashes
+    ext: str            # lowercased extension, '' if none
+    language: str       # from LANGUAGE_MAP, None if unrecognised
+    size: int
+    mtime: float
+    skipped: bool       # bundled/lock file — indexed but not scanned
+
+
+def normalize_path(rel_path: str) -> str:
+    """Repo-relative path with forward slashes and no leading './'."""
+    rel = rel_path.replace('\\', '/')
+    while rel.startswith('./'):
+        rel = rel[2:]
+    return rel
+
+
+class PathFilter:
+    """Excluded directory names (whole path components, at any depth) and
+    path globs, compiled into a single regex."""
+
+    def __init__(self, dirs=SKIP_DIRS, patterns=()):
+        self.dirs = frozenset(dirs)
+        self.patterns = tuple(patterns)
+        parts = []
+        if self.dirs:
+            parts.append(r'(?:^|/)(?:' + '|'.join(re.escape(d) for d in sorted(self.dirs)) + r')/')
+        parts.extend('^' + fnmatch.translate(p) for p in self.patterns)
+        self._regex = re.compile('|'.join(parts)) if parts else None
+
+    def excludes(self, rel_path: str) -> bool:
+        return self._regex is not None and self._regex.search(rel_path) is not None
+
+    def excludes_dir(self, rel_dir: str) -> bool:
+        return self.excludes(rel_dir + '/')
+
+
+DEFAULT_FILTER = PathFilter(SKIP_DIRS, SCAN_EXCLUDE)
+
+
+def _git_files(repo_path: str, path_filter: PathFilter):
+    """Tracked plus untracked-but-not-ignored files, or None outside a git checkout.
+
+    Excluded directory names are passed to git as well, so untracked
+    trees like node_modules are never descended into.
+    """
+    cmd = ['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard']
+    cmd += [f'--exclude={d}/' for d in sorted(path_filter.dirs)]
+    try:
+        result = subprocess.run(cmd, cwd=repo_path, capture_output=True, timeout=60)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    return {os.fsdecode(p) for p in result.stdout.split(b'\0') if p}
+
+
+def _walk_files(repo_path: str, path_filter: PathFilter):
+    """Fallback for plain directories: os.walk, pruning excluded directories before descending."""
+    for root, dirs, files in os.walk(repo_path):
+        rel_root = os.path.relpath(root, repo_path).replace('\\', '/')
+        rel_root = '' if rel_root == '.' else rel_root + '/'
+        dirs[:] = [d for d in dirs if not path_filter.excludes_dir(rel_root + d)]
+        for f in files:
+            yield rel_root + f
+
+
+def list_repo_files(repo_path: str, path_filter: PathFilter = DEFAULT_FILTER) -> list:
+    """Repo-relative paths of every file worth indexing, sorted.
+
+    Uses ``git ls-files`` so .gitignore'd build output is left out, falling
+    back to a pruned walk when ``repo_path`` isn't a git checkout.
+    """
+    paths = _git_files(repo_path, path_filter)
+    if paths is None:
+        paths = _walk_files(repo_path, path_filter)
+    return sorted(p for p in paths if not path_filter.excludes(p))
+
+
+def _make_entry(rel_path: str, st: os.stat_result) -> FileEntry:
+    name = os.path.basename(rel_path)
+    ext = os.path.splitext(name)[1].lower()
+    skipped = name in SKIP_FILENAMES or name.endswith(SKIP_SUFFIXES)
+    return FileEntry(rel_path, ext, LANGUAGE_MAP.get(ext), st.st_size, st.st_mtime, skipped)
+
+
+class RepoFileIndex:
+    """Snapshot of every scannable file in a repository, built once per run."""
+
+    def __init__(self, repo_path: str, path_filter: PathFilter = DEFAULT_FILTER):
+        self.repo_path = os.path.abspath(repo_path)
+        self.path_filter = path_filter
+        self._entries: dict[str, FileEntry] = {}
+        self._kinds: dict[str, str] = {}
+        self._blobs: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild the whole index from one enumeration (see list_repo_files)."""
+        entries = {}
+        for rel in list_repo_files(self.repo_path, self.path_filter):
+            try:
+                st = os.stat(self.abspath(rel))
+            except OSError:
+                continue  # tracked but deleted in the working tree
+            if stat.S_ISREG(st.st_mode):
+                entries[rel] = _make_entry(rel, st)
+        with self._lock:
+            self._entries = entries
+            self._kinds = {}
+            self._blobs = {}
+
+    def invalidate(self, rel_path: str):
+        """Re-stat a single file after it was written (or drop it if deleted)."""
+        rel = normalize_path(rel_path)
+        if self.path_filter.excludes(rel):
+            return
+        try:
+            st = os.stat(self.abspath(rel))
+        except OSError:
+            with self._lock:
+                self._entries.pop(rel, None)
+                self._kinds.pop(rel, None)
+                self._blobs.pop(rel, None)
+            return
+        with self._lock:
+            self._entries[rel] = _make_entry(rel, st)
+            self._kinds.pop(rel, None)
+            self._blobs.pop(rel, None)
+
+    def abspath(self, rel_path: str) -> str:
+        return os.path.join(self.repo_path, rel_path)
+
+    def get(self, rel_path: str):
+        return self._entries.get(normalize_path(rel_path))
+
+    def kind(self, entry: FileEntry) -> str:
+        """Content classification (see file_classifier), sniffed once per file version."""
+        kind = self._kinds.get(entry.path)
+        if kind is None:
+            kind = classify_file(self.abspath(entry.path), entry.size)
+            with self._lock:
+                self._kinds[entry.path] = kind
+        return kind
+
+    def cached_kind(self, entry: FileEntry):
+        """Classification if already sniffed, else None."""
+        return self._kinds.get(entry.path)
+
+    def blob_hashes(self, entries) -> dict:
+        """``{path: git blob id}`` for ``entries``, hashed once per file version."""
+        result = {}
+        for entry in entries:
+            blob = self._blobs.get(entry.path)
+            if blob is None:
+                try:
+                    with open(self.abspath(entry.path), 'rb') as f:
+                        blob = blob_hash(f.read())
+                except OSError:
+                    continue
+                with self._lock:
+                    self._blobs[entry.path] = blob
+            result[entry.path] = blob
+        return result
+
+    def files(self, extensions=None, languages=None, include_skipped=False) -> list:
+        """Entries matching any of the given extensions/languages, sorted by path."""
+        with self._lock:
+            entries = list(self._entries.values())
+        result = []
+        for e in entries:
+            if e.skipped and not include_skipped:
+                continue
+            if extensions is not None and e.ext not in extensions:
+                continue
+            if languages is not None and e.language not in languages:
+                continue
+            result.append(e)
+        result.sort(key=lambda e: e.path)
+        return result
+
+    def has(self, extensions=None, languages=None) -> bool:
+        with self._lock:
+            entries = list(self._entries.values())
+        return any(
+            (extensions is None or e.ext in extensions)
+            and (languages is None or e.language in languages)
+            for e in entries
+        )
+
+    def __len__(self):
+        return len(self._entries)
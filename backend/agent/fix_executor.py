@@ -0,0 +1,40 @@
+"""
+Fix Executor — fixes a batch's files in parallel, hands results back in order.
+AI fixes are almost all network wait, so up to FIX_CONCURRENCY files are fixed
+at once (the rate limiter keeps them inside the provider's budgets). Each file
+is fixed by one task, so fixes to a file stay serialised; results come back
+in the batch's file order so commits are made in the same order every run.
+"""
+import asyncio
+import os
+
+from agent.fixer import fix_file
+
+FIX_CONCURRENCY = int(os.getenv("FIX_CONCURRENCY", "4"))    # files fixed at once; 1 = serial
+
+
+async def fix_files(repo_path: str, by_file: dict, file_index=None, line_map=None, workspace=None,
+                    concurrency: int = FIX_CONCURRENCY):
+    """Fix ``by_file`` ({path: issues}); yields ``(path, issues, results)`` in ``by_file`` order.
+
+    Later files keep being fixed while the caller handles (commits) earlier
+    ones. Files are written independently, so committing a file while another
+    is mid-fix never picks up the other's changes.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(path, issues):
+        async with semaphore:
+            return await asyncio.to_thread(fix_file, repo_path, path, issues, file_index, line_map, workspace)
+
+    tasks = [(path, issues, asyncio.create_task(run(path, issues))) for path, issues in by_file.items()]
+    try:
+        for path, issues, task in tasks:
+            try:
+                results = await task
+            except Exception as e:
+                results = [{"status": "failed", "error": str(e)} for _ in issues]
+            yield path, issues, results
+    finally:
+        for _, _, task in tasks:
+            task.cancel()
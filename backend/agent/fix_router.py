@@ -0,0 +1,98 @@
+"""
+Fix Router — decides per issue whether a fix is worth an AI request.
+Mechanical rules (whitespace, spacing, `var`) are fixed by the heuristics
+and only reach the AI when the heuristic can't change the line; rules with a
+usable heuristic try it first; everything else asks the AI first. Per-rule
+outcomes (did the heuristic apply, did the finding come back on the rescan?)
+move rules between tiers.
+"""
+import threading
+
+from agent.scan_cache import get_scan_cache
+
+DETERMINISTIC = 'deterministic'         # heuristics; the AI only when they make no change
+HEURISTIC_FIRST = 'heuristic-first'     # AI only when no real heuristic fix applies
+AI_FIRST = 'ai-first'                   # AI, with the heuristics as fallback
+
+DETERMINISTIC_RULES = frozenset({
+    'W291', 'W292', 'W293', 'E226', 'E228', 'E231', 'E241', 'E251', 'E261', 'E262', 'E265',
+    'E266', 'E271', 'E301', 'E302', 'E303', 'E305', 'E401', 'E711',
+    'no-var', 'eqeqeq', 'semi', 'no-debugger', 'no-console',
+})
+HEURISTIC_FIRST_RULES = frozenset({'E225', 'E701', 'E712', 'F401', 'F811', 'no-unused-vars'})
+
+MIN_SAMPLES = 5         # outcomes needed before a rule's record overrides its table tier
+ESCALATE_BELOW = 0.6    # heuristic success rate below which a rule goes to the AI first
+TRUST_ABOVE = 0.9       # heuristic success rate above which an AI-first rule tries heuristics first
+STATS_WINDOW = 50       # counts are halved at this many outcomes, so recent runs weigh more
+STATS_MEMO_KEY = "fix-stats:1"
+
+
+def rule_key(issue) -> str:
+    return f"{issue.get('language', 'python')}:{issue.get('rule_id') or ''}"
+
+
+def method_kind(method: str) -> str:
+    """'ai' for any AI answer (fresh or cached), else 'heuristic'."""
+    return 'ai' if method.startswith('ai') else 'heuristic'
+
+
+class FixRouter:
+    """Tier lookup plus per-rule ``{kind: [fixes, fixes that held]}`` history."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        cache = get_scan_cache()
+        self.stats = (cache.get_memo(STATS_MEMO_KEY) if cache is not None else None) or {}
+
+    def _rate(self, key: str, kind: str):
+        attempts, held = self.stats.get(key, {}).get(kind, (0, 0))
+        return held / attempts if attempts >= MIN_SAMPLES else None
+
+    def tier(self, issue) -> str:
+        rule = issue.get('rule_id') or ''
+        base = (DETERMINISTIC if rule in DETERMINISTIC_RULES
+                else HEURISTIC_FIRST if rule in HEURISTIC_FIRST_RULES else AI_FIRST)
+        with self._lock:
+            rate = self._rate(rule_key(issue), 'heuristic')
+        if rate is None:
+            return base
+        if base != AI_FIRST and rate < ESCALATE_BELOW:
+            return AI_FIRST
+        if base == AI_FIRST and rate >= TRUST_ABOVE:
+            return HEURISTIC_FIRST
+        return base
+
+    def record(self, issue, method: str, held: bool):
+        """Log whether a fix by ``method`` held (its finding was gone on the rescan).
+
+        A heuristic that didn't apply at all is logged as not held, so rules
+        whose heuristic keeps missing move to the AI.
+        """
+        with self._lock:
+            counts = self.stats.setdefault(rule_key(issue), {}).setdefault(method_kind(method), [0, 0])
+            if counts[0] >= STATS_WINDOW:
+                counts[0] //= 2
+                counts[1] //= 2
+            counts[0] += 1
+            counts[1] += int(held)
+
+    def save(self):
+        cache = get_scan_cache()
+        if cache is None:
+            return
+        with self._lock:
+            cache.put_memo(STATS_MEMO_KEY, self.stats)
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_fix_router() -> FixRouter:
+    """Process-wide router; its history is loaded once and saved after each run."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = FixRouter()
+        return _router
@@ -2,50 +2,559 @@
 AI-Powered Code Fixer — Whole-File Context Intelligence
 Tries AI (OpenAI / Gemini) first, then falls back to heuristics.
 Supports: Python, JavaScript, TypeScript, Go
+All of a file's issues are fixed in one in-memory pass and written once.
+AI clients are pooled process-wide and their answers cached on disk, so a
+repeated fix never costs a second request.
 """
+import ast
+import json
 import os
 import re
+import shutil
+import sqlite3
+import threading
+import time
+
+from agent.context_extractor import extract_context
+from agent.fix_router import AI_FIRST, DETERMINISTIC, get_fix_router
+from agent.heuristics import apply_heuristic
+from agent.rate_limit import complete
+from agent.scan_cache import digest, evict_lru
+from agent.workspace import Workspace
 
 try:
-    from openai import OpenAI
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
     HAS_OPENAI = True
 except ImportError:
     HAS_OPENAI = False
 
+AI_BATCH_MAX_ISSUES = int(os.getenv("AI_BATCH_MAX_ISSUES", "20"))   # issues per AI request; 1 = one request per issue
+AI_REGION_SPAN = 60         # in large files, issues further apart than this go in separate requests
+FULL_CONTEXT_LINES = 200    # files up to this long are sent whole
 
-def get_ai_client():
-    """Get an AI client — supports OpenAI or Google Gemini."""
-    if not HAS_OPENAI:
-        return None, None
+AI_FIX_CACHE_PATH = os.getenv("AI_FIX_CACHE_PATH", os.path.abspath("./.scan_cache/ai_fixes.sqlite3"))
+AI_FIX_CACHE_MAX_BYTES = int(os.getenv("AI_FIX_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))  # 0 disables
+AI_FIX_CACHE_TTL = int(os.getenv("AI_FIX_CACHE_TTL", str(7 * 24 * 3600)))   # seconds an answer stays valid
+FIX_CACHE_WINDOW = 3        # lines either side of the marked line that must match for a cache hit
+
+AI_POOL_CONNECTIONS = int(os.getenv("AI_POOL_CONNECTIONS", "20"))   # open connections per client
+AI_POOL_KEEPALIVE = int(os.getenv("AI_POOL_KEEPALIVE", "10"))       # idle connections kept warm
+AI_KEEPALIVE_EXPIRY = 120.0     # seconds an idle connection stays open
+AI_REQUEST_TIMEOUT = float(os.getenv("AI_REQUEST_TIMEOUT", "60"))
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+
+def _ai_config():
+    """(api key, base URL, model) for the configured provider, or None."""
     openai_key = os.getenv("OPENAI_API_KEY")
     google_key = os.getenv("GOOGLE_API_KEY")
     if openai_key and openai_key not in ("", "your-key-here", "your-openai-key-or-leave-blank"):
-        return OpenAI(api_key=openai_key), "gpt-4o-mini"
+        return openai_key, None, "gpt-4o-mini"
     elif google_key and google_key not in ("", "your-key-here", "your-gemini-key-or-leave-blank"):
-        return OpenAI(
-            api_key=google_key,
-            base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-        ), "gemini-2.0-flash"
-    return None, None
+        return google_key, GEMINI_BASE_URL, "gemini-2.0-flash"
+    return None
+
+
+class ConnectionStats:
+    """Requests sent vs. connections opened by the pooled AI clients."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+        self._lock = threading.Lock()
+
+    def count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "connections": self.connections,
+                    "tls_handshakes": self.tls_handshakes,
+                    "reused": max(0, self.requests - self.connections)}
+
+
+_stats = ConnectionStats()
+_clients = {}           # (kind, api key, base URL) → client
+_clients_lock = threading.Lock()
+
+
+def _trace(event_name, info):
+    # httpcore reports each new TCP connection and TLS handshake; reused ones report neither
+    if event_name == 'connection.connect_tcp.complete':
+        _stats.count('connections')
+    elif event_name == 'connection.start_tls.complete':
+        _stats.count('tls_handshakes')
+
 
+async def _atrace(event_name, info):
+    _trace(event_name, info)
 
-def fix_issue(repo_path: str, issue: dict):
+
+def _on_request(request):
+    _stats.count('requests')
+    request.extensions['trace'] = _trace
+
+
+async def _on_async_request(request):
+    _stats.count('requests')
+    request.extensions['trace'] = _atrace
+
+
+def _pool_limits():
+    return httpx.Limits(max_connections=AI_POOL_CONNECTIONS,
+                        max_keepalive_connections=AI_POOL_KEEPALIVE,
+                        keepalive_expiry=AI_KEEPALIVE_EXPIRY)
+
+
+def get_ai_client():
+    """Get an AI client — supports OpenAI or Google Gemini.
+
+    Clients are built once per provider/key and shared process-wide, so
+    fixes reuse warm keep-alive connections instead of paying connection
+    and TLS setup per request.
+    """
+    if not HAS_OPENAI:
+        return None, None
+    config = _ai_config()
+    if config is None:
+        return None, None
+    api_key, base_url, model = config
+    with _clients_lock:
+        client = _clients.get(('sync', api_key, base_url))
+        if client is None:
+            client = _clients[('sync', api_key, base_url)] = OpenAI(
+                api_key=api_key, base_url=base_url, max_retries=0,   # retried by rate_limit.complete
+                http_client=httpx.Client(limits=_pool_limits(), timeout=AI_REQUEST_TIMEOUT,
+                                         event_hooks={'request': [_on_request]})
+            )
+    return client, model
+
+
+def get_async_ai_client():
+    """Async variant of get_ai_client(), for callers on the event loop.
+
+    The client's connections belong to the loop that first uses it — use it
+    from the server's loop only.
+    """
+    if not HAS_OPENAI:
+        return None, None
+    config = _ai_config()
+    if config is None:
+        return None, None
+    api_key, base_url, model = config
+    with _clients_lock:
+        client = _clients.get(('async', api_key, base_url))
+        if client is None:
+            client = _clients[('async', api_key, base_url)] = AsyncOpenAI(
+                api_key=api_key, base_url=base_url, max_retries=0,   # retried by rate_limit.complete
+                http_client=httpx.AsyncClient(limits=_pool_limits(), timeout=AI_REQUEST_TIMEOUT,
+                                              event_hooks={'request': [_on_async_request]})
+            )
+    return client, model
+
+
+def ai_connection_stats() -> dict:
+    """Process-wide counts: requests, connections, tls_handshakes and reused."""
+    return _stats.snapshot()
+
+
+async def close_ai_clients():
+    """Close every pooled client (server shutdown)."""
+    with _clients_lock:
+        clients = list(_clients.items())
+        _clients.clear()
+    for (kind, _, _), client in clients:
+        try:
+            if kind == 'async':
+                await client.close()
+            else:
+                client.close()
+        except Exception:
+            pass
+
+
+class LineMap:
+    """Maps a scan's line numbers onto a file as earlier fix passes left it.
+
+    Fixes like E302, E401 or E701 insert lines (E303 removes one), shifting
+    every later line. Each pass records ``(scan line, lines added)`` per
+    edited line, so a scan line can be found in the fixed file (issues
+    applied afterwards, a fix's line on the next rescan). Only findings made
+    before the file was rewritten translate correctly. Use one map per scan.
+    """
+
+    def __init__(self):
+        self._shifts = {}
+
+    def translate(self, path: str, line: int) -> int:
+        return line + sum(delta for at, delta in self._shifts.get(path, ()) if at < line)
+
+    def record(self, path: str, line: int, delta: int):
+        if delta:
+            self._shifts.setdefault(path, []).append((line, delta))
+
+
+class FixCache:
+    """SQLite-backed AI fixes (cleaned replacement text) with TTL and size-bounded LRU eviction."""
+
+    def __init__(self, path: str = AI_FIX_CACHE_PATH, max_bytes: int = AI_FIX_CACHE_MAX_BYTES,
+                 ttl: int = AI_FIX_CACHE_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fixes ("
+            " key TEXT PRIMARY KEY, fixed TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS fixes_lru ON fixes (last_used)")
+        self._db.commit()
+
+    @staticmethod
+    def key(model: str, issue: dict, lines: list, line_idx: int) -> str:
+        """Model, language, rule and message plus the marked line and FIX_CACHE_WINDOW lines around it.
+
+        ``lines`` is the file as read, before any fix in this pass touched it.
+        """
+        start = max(0, line_idx - FIX_CACHE_WINDOW)
+        window = digest(line_idx - start, *lines[start:line_idx + FIX_CACHE_WINDOW + 1])
+        return digest(model, issue.get('language', 'python'), issue.get('rule_id', ''),
+                      issue.get('message', ''), window)
+
+    def get(self, key: str):
+        """The cached replacement for ``key``, or None if absent or older than the TTL."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT fixed, created FROM fixes WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM fixes WHERE key = ?", (key,))
+                row = None
+            elif row is not None:
+                self._db.execute("UPDATE fixes SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, fixed: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO fixes VALUES (?, ?, ?, ?, ?)",
+                             (key, fixed, len(fixed.encode('utf-8')) + len(key), now, now))
+            self._db.commit()
+            evict_lru(self._db, 'fixes', self.max_bytes, expired_before=now - self.ttl)
+
+
+_fix_cache = None
+_fix_cache_lock = threading.Lock()
+
+
+def get_fix_cache():
+    """Process-wide AI fix cache, or None when disabled or the database can't be opened."""
+    global _fix_cache
+    if AI_FIX_CACHE_MAX_BYTES <= 0:
+        return None
+    with _fix_cache_lock:
+        if _fix_cache is None:
+            try:
+                _fix_cache = FixCache()
+            except Exception as e:
+                print(f"⚠️  AI fix cache disabled: {e}")
+                _fix_cache = False
+        return _fix_cache or None
+
+
+PYTHON_SUFFIXES = ('.py', '.pyw')
+BRACE_SUFFIXES = ('.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx', '.go')
+BRACKETS = {')': '(', ']': '[', '}': '{'}
+
+
+def _python_error(text: str):
+    try:
+        ast.parse(text)
+    except SyntaxError as e:
+        return (e.lineno or 0, e.msg, (e.text or '').strip())
+    except ValueError as e:     # null bytes
+        return (0, str(e), '')
+    return None
+
+
+def _bracket_error(text: str, go: bool = False):
+    """First unbalanced bracket or unterminated string/comment, skipping string and comment contents."""
+    lines = text.split('\n')
+    stack = []
+    quote = None            # open ', " or ` (JS template / Go raw string)
+    block_comment = False
+    for lineno, line in enumerate(lines, 1):
+        i = 0
+        while i < len(line):
+            ch = line[i]
+            if block_comment:
+                if line.startswith('*/', i):
+                    block_comment = False
+                    i += 1
+            elif quote:
+                if ch == '\\' and not (go and quote == '`'):
+                    i += 1
+                elif ch == quote:
+                    quote = None
+            elif line.startswith('//', i):
+                break
+            elif line.startswith('/*', i):
+                block_comment = True
+                i += 1
+            elif ch in '\'"`':
+                quote = ch
+            elif ch in '([{':
+                stack.append((ch, lineno))
+            elif ch in ')]}':
+                if not stack or stack[-1][0] != BRACKETS[ch]:
+                    return (lineno, f"unmatched '{ch}'", line.strip())
+                stack.pop()
+            i += 1
+        if quote in ('"', "'") and not line.endswith('\\'):
+            return (lineno, "unterminated string", line.strip())
+    if quote or block_comment:
+        return (len(lines), "unterminated string or comment", '')
+    if stack:
+        ch, lineno = stack[-1]
+        return (lineno, f"unclosed '{ch}'", lines[lineno - 1].strip())
+    return None
+
+
+class SyntaxCheck:
+    """Syntax state of a file being fixed — each edit is kept only if it doesn't make it worse.
+
+    Python is parsed with ``ast``; JS/TS/Go get a bracket/quote balance
+    check. A file that already has an error (the SYNTAX findings) accepts
+    edits that leave that error as it was, move it later or clear it.
+    Other file types aren't checked.
+    """
+
+    def __init__(self, rel_path: str, lines: list):
+        if rel_path.endswith(PYTHON_SUFFIXES):
+            self._check = _python_error
+        elif rel_path.endswith(BRACE_SUFFIXES):
+            go = rel_path.endswith('.go')
+            self._check = lambda text: _bracket_error(text, go)
+        else:
+            self._check = None
+        self.error = self._check(''.join(lines)) if self._check else None
+
+    def verify(self, lines: list):
+        """None if ``lines`` passes (and becomes the new baseline), else the error message."""
+        if self._check is None:
+            return None
+        error = self._check(''.join(lines))
+        if (error is None or error[1:] == (self.error or ())[1:]
+                or (self.error is not None and error[0] > self.error[0])):
+            self.error = error
+            return None
+        return f"line {error[0]}: {error[1]}"
+
+
+def fix_issue(repo_path: str, issue: dict, file_index=None, workspace: Workspace = None):
     """Fix an issue — tries AI first, falls back to heuristics. Returns before/after."""
+    return fix_file(repo_path, issue['file'], [issue], file_index, workspace=workspace)[0]
+
+
+def fix_file(repo_path: str, rel_path: str, issues: list, file_index=None, line_map: LineMap = None,
+             workspace: Workspace = None) -> list:
+    """Fix every issue in one file: a single read, one in-memory pass, a single write.
+
+    Each issue edits the line its scan reported (translated through
+    ``line_map`` when given), so lines inserted by one fix don't shift the
+    others. Returns one result per issue, in order. When the run's
+    ``file_index`` is given, the file's entry is invalidated after the write;
+    the run's ``workspace`` supplies related modules for AI prompts. Every
+    edit must pass the file's ``SyntaxCheck``; one that breaks the syntax is
+    rolled back and the next strategy (AI, then heuristics) gets the issue.
+    The edits together must pass it as well, or the file is left as it was.
+    """
+    if workspace is None:
+        workspace = Workspace(repo_path)
+    file_full_path = os.path.join(repo_path, rel_path)
+    try:
+        lines = _read_file(file_full_path)
+    except OSError as e:
+        return [{"status": "failed", "error": str(e)} for _ in issues]
+    original = list(lines)
     client, model = get_ai_client()
+    check = SyntaxCheck(rel_path, lines)
+
+    results = [None] * len(issues)
+    targets = []    # (position in issues, issue, line index)
+    for pos, issue in enumerate(issues):
+        line = line_map.translate(rel_path, issue['line']) if line_map is not None else issue['line']
+        line_idx = line - 1
+        if line_idx < 0 or line_idx >= len(lines):
+            results[pos] = {"status": "failed", "error": "Line out of bounds"}
+        else:
+            targets.append((pos, issue, line_idx))
+
+    ai_targets = targets
+    if client:
+        # Mechanical rules and rules with a real heuristic try it first. A heuristic that
+        # doesn't apply (or breaks the syntax) counts against its rule and the AI gets the issue.
+        router = get_fix_router()
+        ai_targets = []
+        for pos, issue, line_idx in targets:
+            tier = router.tier(issue)
+            if tier == AI_FIRST:
+                ai_targets.append((pos, issue, line_idx))
+                continue
+            result = _heuristic_fix(issue, lines, line_idx, fallback=(tier == DETERMINISTIC), check=check)
+            if result['status'] == 'fixed':
+                results[pos] = result
+            else:
+                router.record(issue, 'heuristic', False)
+                ai_targets.append((pos, issue, line_idx))
+
+    cache = get_fix_cache() if client and ai_targets else None
+    keys = {}       # position in issues → FixCache key
+    if cache is not None:
+        # Answers already paid for are applied without a request. Keys come from
+        # the file as read — before the heuristics above edited it — the way
+        # every answer is stored, so a rerun finds them whatever those did.
+        keys = {pos: FixCache.key(model, issue, original, line_idx) for pos, issue, line_idx in ai_targets}
+        for pos, issue, line_idx in ai_targets:
+            fixed = cache.get(keys[pos])
+            if fixed is not None:
+                before = lines[line_idx]
+                if _apply(lines, line_idx, fixed, check) is None:
+                    results[pos] = {"status": "fixed", "method": "ai-cache",
+                                    "before": before.rstrip('\n'), "after": fixed.rstrip('\n')}
+    pending = [t for t in ai_targets if results[t[0]] is None]
+
+    if client and len(pending) > 1 and AI_BATCH_MAX_ISSUES > 1:
+        # One request per region; whatever a patch doesn't cover falls back to heuristics
+        for region in _ai_regions(pending, len(lines)):
+            try:
+                patch = _ai_fix_batch(client, model, workspace, rel_path, region, lines)
+            except Exception as e:
+                print(f"AI batch fix failed, using heuristics: {e}")
+                continue
+            before = {line_idx: lines[line_idx] for line_idx in patch}
+            on_line = {}
+            for pos, issue, line_idx in region:
+                on_line.setdefault(line_idx, []).append(issue)
+            # The patch is kept whole if it passes the syntax check; otherwise line by line
+            for line_idx, text in patch.items():
+                lines[line_idx] = text
+            if check.verify(lines) is not None:
+                for line_idx, text in patch.items():
+                    lines[line_idx] = before[line_idx]
+                patch = {line_idx: text for line_idx, text in patch.items()
+                         if _apply(lines, line_idx, text, check) is None}
+            for pos, issue, line_idx in region:
+                if line_idx in patch:
+                    results[pos] = {"status": "fixed", "method": "ai",
+                                    "before": before[line_idx].rstrip('\n'),
+                                    "after": patch[line_idx].rstrip('\n')}
+            if cache is not None:
+                # A line with several issues got one combined answer — not reusable per issue
+                for line_idx, text in patch.items():
+                    if len(on_line[line_idx]) == 1:
+                        cache.put(FixCache.key(model, on_line[line_idx][0], original, line_idx), text)
+        client = None
+
+    edited = {}     # line index → scan line
+    for pos, issue, line_idx in targets:
+        if results[pos] is None:
+            results[pos] = _fix_line(client, model, workspace, issue, lines, line_idx, cache, check,
+                                     keys.get(pos))
+        if results[pos].get('status') == 'fixed':
+            edited[line_idx] = issue['line']
+
+    if not edited:
+        return results
+    # Edits were checked one at a time, each against the last; the file written must pass
+    # as a whole against the file as read, or none of them is kept
+    error = SyntaxCheck(rel_path, original).verify(lines)
+    if error is not None:
+        return [r if r.get('status') != 'fixed' else
+                {"status": "failed", "error": f"Fix failed syntax check: {error}", "syntax": error}
+                for r in results]
+    try:
+        _write_file(file_full_path, lines)
+    except OSError as e:
+        return [r if r.get('status') != 'fixed' else {"status": "failed", "error": str(e)} for r in results]
+    if line_map is not None:
+        for line_idx, scan_line in edited.items():
+            line_map.record(rel_path, scan_line,
+                            len(lines[line_idx].splitlines()) - len(original[line_idx].splitlines()))
+    if file_index is not None:
+        file_index.invalidate(rel_path)
+    workspace.invalidate(rel_path)
+    return results
+
+
+def _fix_line(client, model, workspace, issue: dict, lines: list, line_idx: int, cache=None,
+              check: SyntaxCheck = None, key: str = None) -> dict:
+    """Fix one issue in ``lines`` (in memory) — AI first, then heuristics.
+
+    An AI answer is stored in ``cache`` under ``key`` (see ``FixCache.key``).
+    """
+    before_line = lines[line_idx]
     if client:
         try:
-            result = _ai_fix(client, model, repo_path, issue)
-            if result and result.get('status') == 'fixed':
-                return result
+            fixed = _ai_fix(client, model, workspace, issue, lines, line_idx)
+            error = _apply(lines, line_idx, fixed, check)
+            if error is None:
+                if cache is not None and key is not None:
+                    cache.put(key, fixed)
+                return {"status": "fixed", "method": "ai", "before": before_line.rstrip('\n'),
+                        "after": fixed.rstrip('\n')}
+            print(f"AI fix broke the syntax ({error}), using heuristic")
         except Exception as e:
             print(f"AI Fix failed, using heuristic: {e}")
+    return _heuristic_fix(issue, lines, line_idx, check=check)
+
+
+def _apply(lines: list, line_idx: int, text: str, check: SyntaxCheck = None):
+    """Put ``text`` at ``line_idx``; undo it and return the error if it fails the syntax check."""
+    before = lines[line_idx]
+    lines[line_idx] = text
+    error = check.verify(lines) if check is not None else None
+    if error is not None:
+        lines[line_idx] = before
+    return error
+
 
-    lang = issue.get('language', 'python')
-    if lang in ('javascript', 'js', 'jsx', 'ts', 'tsx', 'typescript'):
-        return _heuristic_fix_javascript(repo_path, issue)
-    elif lang == 'go':
-        return _heuristic_fix_go(repo_path, issue)
-    return _heuristic_fix_python(repo_path, issue)
+def _heuristic_fix(issue: dict, lines: list, line_idx: int, fallback: bool = True,
+                   check: SyntaxCheck = None) -> dict:
+    """Fix one issue in ``lines`` with its rule's heuristics (see ``agent.heuristics``).
+
+    A no-op edit counts as not fixed; an edit that fails ``check`` is undone
+    and reported with a ``syntax`` error.
+    """
+    before_line = lines[line_idx]
+    try:
+        if not apply_heuristic(lines, line_idx, issue, fallback):
+            return {"status": "failed", "error": "No heuristic available"}
+    except Exception as e:
+        lines[line_idx] = before_line
+        return {"status": "failed", "error": str(e)}
+    if lines[line_idx] == before_line:
+        return {"status": "failed", "error": "Heuristic made no change"}
+    fixed = lines[line_idx]
+    lines[line_idx] = before_line
+    error = _apply(lines, line_idx, fixed, check)
+    if error is not None:
+        return {"status": "failed", "error": f"Fix failed syntax check: {error}", "syntax": error}
+    return {"status": "fixed", "method": "heuristic", "before": before_line.rstrip('\n'),
+            "after": fixed.rstrip('\n')}
 
 
 def _read_file(path):
@@ -54,94 +563,59 @@ def _read_file(path):
 
 
 def _write_file(path, lines):
-    with open(path, 'w', encoding='utf-8') as f:
-        f.writelines(lines)
-
-
-def _get_related_imports(repo_path, issue, lines):
-    """Find related files for import resolution context."""
-    related = []
-    file_ext = os.path.splitext(issue['file'])[1]
-
-    for line in lines:
-        stripped = line.strip()
-        # Python: from module import ...
-        if stripped.startswith('from ') and 'import' in stripped:
-            module = stripped.split('from ')[1].split(' import')[0].strip()
-            if module.startswith('.'):
-                rel = module.replace('.', os.sep) + '.py'
-                candidates = [
-                    os.path.join(repo_path, os.path.dirname(issue['file']), rel),
-                    os.path.join(repo_path, rel.lstrip(os.sep)),
-                ]
-                for c in candidates:
-                    if os.path.isfile(c) and len(related) < 2:
-                        try:
-                            with open(c, 'r', encoding='utf-8', errors='ignore') as f:
-                                content = f.read()[:1000]
-                            related.append(f"--- {os.path.basename(c)} ---\n{content}")
-                        except Exception:
-                            pass
-        # JS/TS: import ... from './module'
-        elif file_ext in ('.js', '.jsx', '.ts', '.tsx'):
-            match = re.search(r"from\s+['\"](\.[^'\"]+)['\"]", stripped)
-            if match:
-                module_path = match.group(1)
-                for ext in ['', '.js', '.jsx', '.ts', '.tsx', '/index.js', '/index.ts']:
-                    candidate = os.path.join(
-                        repo_path, os.path.dirname(issue['file']),
-                        module_path + ext
-                    )
-                    if os.path.isfile(candidate) and len(related) < 2:
-                        try:
-                            with open(candidate, 'r', encoding='utf-8', errors='ignore') as f:
-                                content = f.read()[:1000]
-                            related.append(f"--- {os.path.basename(candidate)} ---\n{content}")
-                        except Exception:
-                            pass
-                        break
-    return related
-
-
-def _ai_fix(client, model, repo_path: str, issue: dict):
-    """AI fix with whole-file context + related files."""
-    file_full_path = os.path.join(repo_path, issue['file'])
-    lines = _read_file(file_full_path)
-
-    line_idx = issue['line'] - 1
-    if line_idx < 0 or line_idx >= len(lines):
-        return {"status": "failed", "error": "Line out of bounds"}
-
-    before_line = lines[line_idx].rstrip('\n')
-
-    # Build FULL file context (cap at 200 lines to avoid token limits)
-    if len(lines) <= 200:
-        context = ''
-        for ci, cl in enumerate(lines):
-            marker = ' >>>' if ci == line_idx else '    '
-            context += f"{marker} {ci + 1}: {cl}"
-    else:
-        # Large file: show ±30 lines + imports section
-        import_lines = []
-        for ci, cl in enumerate(lines[:30]):
-            import_lines.append(f"     {ci + 1}: {cl}")
-
-        start = max(0, line_idx - 30)
-        end = min(len(lines), line_idx + 31)
-        context = "=== File head (imports/declarations) ===\n"
-        context += ''.join(import_lines)
-        if start > 30:
-            context += f"\n... (lines {31}-{start} omitted) ...\n\n"
-        context += "=== Context around issue ===\n"
-        for ci in range(start, end):
-            marker = ' >>>' if ci == line_idx else '    '
-            context += f"{marker} {ci + 1}: {lines[ci]}"
-
-    # Get related files for import resolution
-    related_files = _get_related_imports(repo_path, issue, lines)
-    related_context = ""
-    if related_files:
-        related_context = "\n\n=== Related files (for reference) ===\n" + "\n".join(related_files)
+    """Replace the file atomically — linters still scanning it never see a partial write."""
+    path = os.path.realpath(path)      # rewrite a symlink's target, not the link
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _file_context(lines: list, marked, language: str = 'python') -> str:
+    """Numbered file listing with ``>>>`` on the ``marked`` line indices.
+
+    Files up to FULL_CONTEXT_LINES are listed whole; larger ones are cut to
+    the code around the marked lines that matters (see context_extractor).
+    """
+    if len(lines) <= FULL_CONTEXT_LINES:
+        return ''.join([f"{' >>>' if ci in marked else '    '} {ci + 1}: {cl}" for ci, cl in enumerate(lines)])
+    return extract_context(lines, marked, language)
+
+
+def _related_context(workspace, rel_path: str, lines: list) -> str:
+    related_files = workspace.related_snippets(rel_path, lines)
+    if not related_files:
+        return ""
+    return "\n\n=== Related files (for reference) ===\n" + "\n".join(related_files)
+
+
+def _clean_ai_line(fixed_line: str, original: str) -> str:
+    """Strip fences and line-number prefixes from an AI line; keep the original indent."""
+    if fixed_line.startswith('```'):
+        fixed_line = '\n'.join(fixed_line.split('\n')[1:-1]).strip()
+    # Remove line number prefix if AI added one
+    fixed_line = re.sub(r'^>>>\s*\d+:\s*', '', fixed_line)
+    fixed_line = re.sub(r'^\d+:\s*', '', fixed_line)
+
+    original_indent = len(original) - len(original.lstrip())
+    if len(fixed_line) == len(fixed_line.lstrip()) and original_indent > 0:
+        fixed_line = ' ' * original_indent + fixed_line
+
+    if not fixed_line.endswith('\n'):
+        fixed_line += '\n'
+    return fixed_line
+
+
+def _ai_fix(client, model, workspace, issue: dict, lines: list, line_idx: int) -> str:
+    """AI fix with whole-file context + related files. Returns the fixed line."""
+    context = _file_context(lines, {line_idx}, issue.get('language', 'python'))
+    related_context = _related_context(workspace, issue['file'], lines)
 
     language = issue.get('language', 'python')
     tool = issue.get('tool', 'linter')
@@ -164,285 +638,101 @@ def _ai_fix(client, model, repo_path: str, issue: dict):
         f"Issue: {issue['message']}\n\n"
         f"Full file ({issue['file']}):\n{context}"
         f"{related_context}\n\n"
-        f"Return ONLY the fixed line {issue['line']}."
+        f"Return ONLY the fixed line {line_idx + 1}."
     )
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
+    response = complete(
+        client, model,
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ],
         temperature=0, max_tokens=300
     )
-    fixed_line = response.choices[0].message.content.strip()
-
-    # Clean up AI response
-    if fixed_line.startswith('```'):
-        fixed_line = '\n'.join(fixed_line.split('\n')[1:-1]).strip()
-    # Remove line number prefix if AI added one
-    fixed_line = re.sub(r'^>>>\s*\d+:\s*', '', fixed_line)
-    fixed_line = re.sub(r'^\d+:\s*', '', fixed_line)
-
-    original_indent = len(lines[line_idx]) - len(lines[line_idx].lstrip())
-    if len(fixed_line) == len(fixed_line.lstrip()) and original_indent > 0:
-        fixed_line = ' ' * original_indent + fixed_line
-
-    if not fixed_line.endswith('\n'):
-        fixed_line += '\n'
-    lines[line_idx] = fixed_line
-    after_line = fixed_line.rstrip('\n')
-
-    _write_file(file_full_path, lines)
-    return {"status": "fixed", "method": "ai", "before": before_line, "after": after_line}
-
-
-# ─── Heuristic Fixers ────────────────────────────────────────────────
-
-
-def _heuristic_fix_python(repo_path: str, issue: dict):
-    file_full_path = os.path.join(repo_path, issue['file'])
-    try:
-        lines = _read_file(file_full_path)
-        line_idx = issue['line'] - 1
-        if line_idx < 0 or line_idx >= len(lines):
-            return {"status": "failed", "error": "Line out of bounds"}
-
-        before_line = lines[line_idx].rstrip('\n')
-        msg = issue['message'].lower()
-        raw = issue.get('raw', '')
-        rule = issue.get('rule_id', '')
-
-        if "F401" in raw or rule == "F401" or "unused import" in msg:
-            if not lines[line_idx].strip().startswith("#"):
-                lines[line_idx] = f"# {lines[line_idx]}"
-        elif ("syntax" in msg or "E999" in raw) and not lines[line_idx].strip().endswith(":"):
-            lines[line_idx] = lines[line_idx].rstrip() + ":\n"
-
-        # ── Whitespace & Formatting Fixes (ACTUALLY FIX, not noqa) ──
-
-        elif "E261" in raw or "at least two spaces before inline comment" in msg:
-            # Fix: ensure 2 spaces before #
-            line = lines[line_idx]
-            match = re.search(r'(\S)\s*(#)', line)
-            if match:
-                idx = match.start(2)
-                lines[line_idx] = line[:match.end(1)] + '  ' + line[idx:]
-
-        elif "E262" in raw or "inline comment should start with" in msg:
-            # Fix: # must be followed by a space
-            lines[line_idx] = re.sub(r'#(\S)', r'# \1', lines[line_idx])
-
-        elif "E265" in raw or "block comment should start with" in msg:
-            # Fix: block comment must be "# " not "#text"
-            line = lines[line_idx]
-            stripped = line.lstrip()
-            indent = len(line) - len(stripped)
-            if stripped.startswith('#') and not stripped.startswith('# ') and not stripped.startswith('#!'):
-                lines[line_idx] = ' ' * indent + '# ' + stripped[1:].lstrip()
-                if not lines[line_idx].endswith('\n'):
-                    lines[line_idx] += '\n'
-
-        elif "E266" in raw or "too many leading '#'" in msg:
-            # Fix: remove extra # from block comment
-            line = lines[line_idx]
-            stripped = line.lstrip()
-            indent = len(line) - len(stripped)
-            content = stripped.lstrip('#').lstrip()
-            lines[line_idx] = ' ' * indent + '# ' + content
-            if not lines[line_idx].endswith('\n'):
-                lines[line_idx] += '\n'
-
-        elif "W291" in raw or "W293" in raw or "trailing whitespace" in msg:
-            lines[line_idx] = lines[line_idx].rstrip() + '\n'
-
-        elif "W292" in raw or "no newline" in msg:
-            if not lines[line_idx].endswith('\n'):
-                lines[line_idx] += '\n'
-
-        elif "E303" in raw or "too many blank lines" in msg:
-            # Remove extra blank line (replace with empty)
-            lines[line_idx] = ''
-
-        elif "E302" in raw or "expected 2 blank" in msg:
-            lines[line_idx] = '\n' + lines[line_idx]
-
-        elif "E301" in raw or "expected 1 blank" in msg:
-            lines[line_idx] = '\n' + lines[line_idx]
-
-        elif "E251" in raw or "unexpected spaces around keyword" in msg:
-            # Fix: def foo(x = 1) → def foo(x=1)
-            lines[line_idx] = re.sub(r'\s*=\s*', '=', lines[line_idx])
-            if not lines[line_idx].endswith('\n'):
-                lines[line_idx] += '\n'
-
-        elif "E225" in raw or "missing whitespace around operator" in msg:
-            # Fix: x=1 → x = 1 (but NOT in function defaults)
-            line = lines[line_idx]
-            if 'def ' not in line and 'lambda' not in line:
-                line = re.sub(r'(\w)([+\-*/]=?|[<>!=]=|==)(\w)', r'\1 \2 \3', line)
-                lines[line_idx] = line
-
-        elif "E226" in raw or "missing whitespace around arithmetic" in msg:
-            line = lines[line_idx]
-            line = re.sub(r'(\w)([*/%])(\w)', r'\1 \2 \3', line)
-            lines[line_idx] = line
-
-        elif "E228" in raw or "missing whitespace around modulo" in msg:
-            lines[line_idx] = re.sub(r'(\S)%(\S)', r'\1 % \2', lines[line_idx])
-
-        elif "E231" in raw or "missing whitespace after" in msg:
-            # Fix: [1,2,3] → [1, 2, 3]
-            lines[line_idx] = re.sub(r',(\S)', r', \1', lines[line_idx])
-            lines[line_idx] = re.sub(r':(\S)', r': \1', lines[line_idx])
-
-        elif "E241" in raw or "multiple spaces after" in msg:
-            lines[line_idx] = re.sub(r':\s{2,}', ': ', lines[line_idx])
-
-        elif "E271" in raw or "multiple spaces after keyword" in msg:
-            lines[line_idx] = re.sub(r'(import|from|class|def|if|elif|else|return|raise|except|with|as|in|not|and|or)\s{2,}', r'\1 ', lines[line_idx])
-
-        elif "E401" in raw or "multiple imports on one line" in msg:
-            # Fix: import os, sys → import os\nimport sys
-            line = lines[line_idx]
-            stripped = line.strip()
-            indent = len(line) - len(line.lstrip())
-            if stripped.startswith('import ') and ',' in stripped:
-                modules = stripped.replace('import ', '').split(',')
-                new_lines = ''.join(f"{' ' * indent}import {m.strip()}\n" for m in modules)
-                lines[line_idx] = new_lines
-
-        elif "E711" in raw:
-            lines[line_idx] = lines[line_idx].replace('== None', 'is None').replace('!= None', 'is not None')
-            if not lines[line_idx].endswith('\n'):
-                lines[line_idx] += '\n'
-
-        elif "E712" in raw:
-            lines[line_idx] = lines[line_idx].replace('== True', '').replace('== False', '')
-            if not lines[line_idx].endswith('\n'):
-                lines[line_idx] += '\n'
-
-        elif "E501" in raw or "line too long" in msg:
-            # Line too long — only suppress if we can't easily fix it
-            if "# noqa" not in lines[line_idx]:
-                lines[line_idx] = lines[line_idx].rstrip() + "  # noqa: E501\n"
-
-        elif "E701" in raw or "multiple statements on one line" in msg:
-            # Try to split on colon for things like `if x: return y`
-            line = lines[line_idx]
-            stripped = line.strip()
-            indent = len(line) - len(line.lstrip())
-            match = re.match(r'(if|elif|else|for|while|with|try|except|finally)\s*.*?:\s*(.+)', stripped)
-            if match:
-                keyword_part = stripped[:stripped.rindex(':') - len(match.group(2)) + len(match.group(2))]
-                # Just split into two lines
-                colon_idx = stripped.index(':')
-                first = stripped[:colon_idx + 1]
-                second = stripped[colon_idx + 1:].strip()
-                lines[line_idx] = ' ' * indent + first + '\n' + ' ' * (indent + 4) + second + '\n'
-            else:
-                if "# noqa" not in lines[line_idx]:
-                    lines[line_idx] = lines[line_idx].rstrip() + "  # noqa: E701\n"
-
-        elif "F811" in raw or "redefinition of unused" in msg:
-            if not lines[line_idx].strip().startswith("#"):
-                lines[line_idx] = f"# {lines[line_idx]}"
-
-        # ── Fallback: only use noqa as LAST RESORT ──
-        elif issue['type'] == 'SECURITY':
-            indent = len(lines[line_idx]) - len(lines[line_idx].lstrip())
-            lines[line_idx] = ' ' * indent + '# [AI-AGENT] SECURITY: ' + lines[line_idx].lstrip()
-        elif issue['type'] in ('LINTING', 'WARNING') and "# noqa" not in lines[line_idx]:
-            lines[line_idx] = lines[line_idx].rstrip() + "  # noqa\n"
+    return _clean_ai_line(response.choices[0].message.content.strip(), lines[line_idx])
+
+
+def _ai_regions(targets: list, line_count: int) -> list:
+    """Split ``(pos, issue, line_idx)`` targets into groups that share one AI request.
+
+    A file short enough to send whole is one region; in larger files, issues
+    within AI_REGION_SPAN lines share a context window. Regions hold at most
+    AI_BATCH_MAX_ISSUES issues.
+    """
+    regions = []
+    for target in sorted(targets, key=lambda t: t[2]):
+        region = regions[-1] if regions else None
+        if (region is None or len(region) >= AI_BATCH_MAX_ISSUES
+                or (line_count > FULL_CONTEXT_LINES and target[2] - region[0][2] > AI_REGION_SPAN)):
+            regions.append([target])
         else:
-            return {"status": "failed", "error": "No heuristic available"}
+            region.append(target)
+    return regions
 
 
-        after_line = lines[line_idx].rstrip('\n')
-        _write_file(file_full_path, lines)
-        return {"status": "fixed", "method": "heuristic", "before": before_line, "after": after_line}
-    except Exception as e:
-        return {"status": "failed", "error": str(e)}
-
+def _ai_fix_batch(client, model, workspace, rel_path: str, region: list, lines: list) -> dict:
+    """Fix every issue in ``region`` with one request. Returns {line index: fixed text}.
 
-def _heuristic_fix_javascript(repo_path: str, issue: dict):
-    file_full_path = os.path.join(repo_path, issue['file'])
-    try:
-        lines = _read_file(file_full_path)
-        line_idx = issue['line'] - 1
-        if line_idx < 0 or line_idx >= len(lines):
-            return {"status": "failed", "error": "Line out of bounds"}
-
-        before_line = lines[line_idx].rstrip('\n')
-        msg = issue['message'].lower()
-        rule = issue.get('rule_id', '')
-        original = lines[line_idx]
-
-        if 'console.log' in msg or rule == 'no-console':
-            lines[line_idx] = original.replace('console.log(', '// console.log(')
-        elif ('var' in msg and ('let' in msg or 'const' in msg)) or rule == 'no-var':
-            lines[line_idx] = re.sub(r'\bvar\b', 'let', original, count=1)
-        elif '===' in msg or 'strict equality' in msg or rule == 'eqeqeq':
-            lines[line_idx] = re.sub(r'(?<!=)(?<!!)(?<!<)(?<!>)==(?!=)', '===', original)
-        elif 'debugger' in msg or rule == 'no-debugger':
-            lines[line_idx] = original.replace('debugger', '// debugger')
-        elif 'eval' in msg or rule == 'no-eval':
-            indent = len(original) - len(original.lstrip())
-            lines[line_idx] = ' ' * indent + '// [AI-AGENT] SECURITY: ' + original.lstrip()
-        elif 'innerhtml' in msg:
-            indent = len(original) - len(original.lstrip())
-            lines[line_idx] = ' ' * indent + '// [AI-AGENT] XSS-RISK: ' + original.lstrip()
-        elif 'no-unused-vars' in rule or 'no-unused' in rule:
-            indent = len(original) - len(original.lstrip())
-            lines[line_idx] = ' ' * indent + '// ' + original.lstrip()
-        elif 'semi' in rule:
-            if not original.rstrip().endswith(';'):
-                lines[line_idx] = original.rstrip() + ';\n'
-        else:
-            indent = len(original) - len(original.lstrip())
-            lines[line_idx] = ' ' * indent + '// [AI-AGENT] ' + original.lstrip()
+    The model answers with a JSON patch mapping marked line numbers to their
+    replacement. The patch is checked as a whole — an unparseable reply or
+    any entry for a line that wasn't marked raises, so nothing is applied.
+    Lines the model leaves out are simply absent from the result.
+    """
+    marked = {line_idx for _, _, line_idx in region}
+    first_issue = region[0][1]
+    context = _file_context(lines, marked, first_issue.get('language', 'python'))
+    related_context = _related_context(workspace, rel_path, lines)
 
-        after_line = lines[line_idx].rstrip('\n')
-        _write_file(file_full_path, lines)
-        return {"status": "fixed", "method": "heuristic", "before": before_line, "after": after_line}
-    except Exception as e:
-        return {"status": "failed", "error": str(e)}
+    language = first_issue.get('language', 'python')
+    issue_list = ''.join([
+        f"- Line {line_idx + 1} [{issue.get('tool', 'linter')} {issue.get('rule_id', '')}]: {issue['message']}\n"
+        for _, issue, line_idx in region
+    ])
 
+    system_prompt = (
+        "You are an expert code fixer. You fix real bugs in production code.\n"
+        "RULES:\n"
+        "1. Fix every listed issue. Only the marked lines (>>>) may change.\n"
+        "2. Reply with ONLY a JSON object mapping each changed line number to its\n"
+        "   fixed text, e.g. {\"12\": \"    x = 1\", \"40\": \"\"}. No explanations, no markdown.\n"
+        "3. A replacement may span several lines (use \\n); an empty string removes the line.\n"
+        "4. If several issues are on one line, return one replacement that fixes them all.\n"
+        "5. Preserve the original coding style and indentation.\n"
+        "6. Consider the full file context to make the best fix."
+    )
 
-def _heuristic_fix_go(repo_path: str, issue: dict):
-    """Go heuristic fixer — handles common Go issues."""
-    file_full_path = os.path.join(repo_path, issue['file'])
-    try:
-        lines = _read_file(file_full_path)
-        line_idx = issue['line'] - 1
-        if line_idx < 0 or line_idx >= len(lines):
-            return {"status": "failed", "error": "Line out of bounds"}
-
-        before_line = lines[line_idx].rstrip('\n')
-        msg = issue['message'].lower()
-        original = lines[line_idx]
-
-        if 'declared but not used' in msg or 'declared and not used' in msg:
-            # Comment out unused variable
-            indent = len(original) - len(original.lstrip())
-            lines[line_idx] = ' ' * indent + '// ' + original.lstrip()
-        elif 'imported and not used' in msg:
-            # Comment out unused import
-            indent = len(original) - len(original.lstrip())
-            lines[line_idx] = ' ' * indent + '// ' + original.lstrip()
-        elif 'should have comment' in msg or 'exported' in msg:
-            # Add a comment for exported func/type
-            func_name = original.strip().split('(')[0].split()[-1] if '(' in original else 'function'
-            lines[line_idx] = f"// {func_name} ...\n" + original
-        elif 'error return value not checked' in msg:
-            indent = len(original) - len(original.lstrip())
-            lines[line_idx] = ' ' * indent + '// [AI-AGENT] TODO: handle error\n' + original
-        else:
-            indent = len(original) - len(original.lstrip())
-            lines[line_idx] = ' ' * indent + '// [AI-AGENT] ' + original.lstrip()
+    user_prompt = (
+        f"Fix these {language} issues in {rel_path}:\n"
+        f"{issue_list}\n"
+        f"File:\n{context}"
+        f"{related_context}\n\n"
+        f"Return ONLY the JSON patch."
+    )
 
-        after_line = lines[line_idx].rstrip('\n')
-        _write_file(file_full_path, lines)
-        return {"status": "fixed", "method": "heuristic", "before": before_line, "after": after_line}
-    except Exception as e:
-        return {"status": "failed", "error": str(e)}
+    response = complete(
+        client, model,
+        [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=0, max_tokens=min(4096, 200 + 200 * len(marked))
+    )
+    reply = response.choices[0].message.content.strip()
+    if reply.startswith('```'):
+        reply = '\n'.join(reply.split('\n')[1:-1]).strip()
+    patch = json.loads(reply)
+    if not isinstance(patch, dict):
+        raise ValueError("AI patch is not a JSON object")
+
+    fixed = {}
+    for key, text in patch.items():
+        try:
+            line_idx = int(key) - 1
+        except (TypeError, ValueError):
+            raise ValueError(f"AI patch has a bad line number: {key!r}")
+        if line_idx not in marked:
+            raise ValueError(f"AI patch edits unmarked line {key}")
+        if not isinstance(text, str):
+            raise ValueError(f"AI patch has a non-string replacement for line {key}")
+        fixed[line_idx] = _clean_ai_line(text.rstrip('\n'), lines[line_idx]) if text.strip() else ''
+    return fixed
@@ -0,0 +1,108 @@
+"""
+Go Build Cache — persistent GOCACHE / GOMODCACHE shared by every Go scan.
+Each run clones into a fresh directory, so without this go vet and
+staticcheck re-download modules and rebuild dependencies every time.
+"""
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+GO_CACHE_DIR = os.getenv("GO_CACHE_DIR", os.path.abspath("./.scan_cache/go"))
+GO_CACHE_MAX_BYTES = int(os.getenv("GO_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))  # per cache
+GO_CACHE_PRUNE_INTERVAL = 3600      # walking a multi-GB cache isn't free — at most hourly
+
+GOCACHE = os.path.join(GO_CACHE_DIR, "build")
+GOMODCACHE = os.path.join(GO_CACHE_DIR, "mod")
+
+_last_prune = 0.0
+_prune_lock = threading.Lock()
+# Its own thread: a `go clean` can take minutes and mustn't hold up the default executor
+_prune_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="go-cache-prune")
+_prune_future = None
+
+
+def go_env() -> dict:
+    """Environment for go / staticcheck subprocesses, pointing at the shared caches."""
+    os.makedirs(GOCACHE, exist_ok=True)
+    os.makedirs(GOMODCACHE, exist_ok=True)
+    env = os.environ.copy()
+    env['GOCACHE'] = GOCACHE
+    env['GOMODCACHE'] = GOMODCACHE
+    return env
+
+
+def _files_by_age(root: str):
+    files = []
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+    files.sort()
+    return files, total
+
+
+def schedule_prune():
+    """Prune the caches in the background, unless a prune is already running."""
+    global _prune_future
+    with _prune_lock:
+        if _prune_future is not None and not _prune_future.done():
+            return _prune_future
+        _prune_future = _prune_executor.submit(prune_go_caches)
+        _prune_future.add_done_callback(_report_prune)
+        return _prune_future
+
+
+def _report_prune(future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"⚠️  Go cache prune failed: {future.exception()}")
+
+
+def shutdown_pruner():
+    """Drop a queued prune; one already running finishes in the background."""
+    _prune_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def prune_go_caches(force: bool = False):
+    """Keep both caches under GO_CACHE_MAX_BYTES.
+
+    The build cache is content-addressed and go touches entries it uses, so
+    the oldest files are deleted down to 90%. Module files are read-only and
+    interdependent, so an oversized module cache is cleared as a whole.
+    """
+    global _last_prune
+    with _prune_lock:
+        now = time.time()
+        if not force and now - _last_prune < GO_CACHE_PRUNE_INTERVAL:
+            return
+        _last_prune = now
+
+    if os.path.isdir(GOCACHE):
+        files, total = _files_by_age(GOCACHE)
+        target = int(GO_CACHE_MAX_BYTES * 0.9)
+        if total > GO_CACHE_MAX_BYTES:
+            for _, size, path in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    continue
+
+    if os.path.isdir(GOMODCACHE):
+        _, total = _files_by_age(GOMODCACHE)
+        if total > GO_CACHE_MAX_BYTES:
+            try:
+                subprocess.run(['go', 'clean', '-modcache'], env=go_env(),
+                               capture_output=True, timeout=300)
+            except (OSError, subprocess.SubprocessError):
+                shutil.rmtree(GOMODCACHE, ignore_errors=True)
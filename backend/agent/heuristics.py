@@ -0,0 +1,393 @@
+"""
+Heuristics — rule-specific line fixes, looked up by (tool, rule_id).
+Each handler is registered for the rules it fixes, so dispatch is one dict
+lookup instead of a chain of message substring tests. Suppressions (noqa,
+commenting a line out) are marked as such and only run as a last resort;
+rules with no handler of their own are counted for the run's report.
+"""
+import re
+import threading
+from collections import Counter
+
+HANDLERS = {}       # (tool, rule) → [(handler, suppress)], tried in order
+FALLBACKS = {}      # language family → [(handler, suppress)] for rules without a handler
+
+TOOL_ALIASES = {'pattern': 'eslint', 'go vet': 'go', 'staticcheck': 'go'}
+DEFAULT_TOOLS = {'python': 'flake8', 'javascript': 'eslint', 'go': 'go'}
+JS_LANGUAGES = {'javascript', 'js', 'jsx', 'ts', 'tsx', 'typescript', 'mjs', 'cjs'}
+
+# go vet / staticcheck issues share one rule_id per tool; the real rule is in the message
+STATICCHECK_CODE_RE = re.compile(r'\(([A-Z]+\d+)\)\s*$')
+GO_MESSAGE_RULES = (
+    (re.compile(r'declared (?:and|but) not used'), 'unused-var'),
+    (re.compile(r'imported and not used'), 'unused-import'),
+    (re.compile(r'^exported \S+ \S+ should have comment'), 'exported-comment'),
+    (re.compile(r'error return value .*not checked'), 'errcheck'),
+)
+
+_unmatched = Counter()
+_unmatched_lock = threading.Lock()
+
+
+def language_family(issue) -> str:
+    lang = issue.get('language', 'python')
+    if lang in JS_LANGUAGES:
+        return 'javascript'
+    return 'go' if lang == 'go' else 'python'
+
+
+def handler_key(issue) -> tuple:
+    """Normalized ``(tool, rule)`` for an issue, e.g. ``('flake8', 'E501')``, ``('eslint', 'no-var')``."""
+    family = language_family(issue)
+    tool = issue.get('tool') or DEFAULT_TOOLS[family]
+    tool = TOOL_ALIASES.get(tool, tool)
+    rule = issue.get('rule_id') or ''
+    if tool == 'go':
+        msg = issue.get('message', '')
+        code = STATICCHECK_CODE_RE.search(msg)
+        if code:
+            rule = code.group(1)
+        else:
+            for pattern, name in GO_MESSAGE_RULES:
+                if pattern.search(msg):
+                    rule = name
+                    break
+    elif tool == 'eslint':
+        rule = rule.rsplit('/', 1)[-1]     # @typescript-eslint/no-unused-vars → no-unused-vars
+    elif tool == 'flake8':
+        rule = rule.upper()
+    return tool, rule
+
+
+def heuristic(tool: str, *rules: str, suppress: bool = False):
+    """Register a handler ``(lines, line_idx, issue) -> bool`` for ``rules`` of ``tool``.
+
+    Handlers get the whole file buffer and edit it in place; a change in
+    line count goes into ``lines[line_idx]`` (as embedded newlines) so the
+    line map can account for it. They return False when they don't apply.
+    """
+    def register(handler):
+        for rule in rules:
+            HANDLERS.setdefault((tool, rule), []).append((handler, suppress))
+        return handler
+    return register
+
+
+def fallback(family: str):
+    """Register a last-resort suppression for a language's rules without a handler."""
+    def register(handler):
+        FALLBACKS.setdefault(family, []).append((handler, True))
+        return handler
+    return register
+
+
+def apply_heuristic(lines: list, line_idx: int, issue: dict, allow_suppress: bool = True) -> bool:
+    """Fix ``issue`` in ``lines`` with its rule's handlers; False if none applies.
+
+    ``allow_suppress=False`` leaves out the noqa/comment-out suppressions, so only real fixes apply.
+    """
+    key = handler_key(issue)
+    handlers = HANDLERS.get(key)
+    if handlers is None:
+        with _unmatched_lock:
+            _unmatched[f"{key[0]}:{key[1] or '?'}"] += 1
+        handlers = FALLBACKS.get(language_family(issue), ())
+    for handler, suppress in handlers:
+        if (allow_suppress or not suppress) and handler(lines, line_idx, issue):
+            return True
+    return False
+
+
+def unmatched_rules() -> dict:
+    """``{"tool:rule": count}`` of issues that reached the heuristics with no handler for their rule."""
+    with _unmatched_lock:
+        return dict(_unmatched)
+
+
+def _indent(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _with_newline(text: str) -> str:
+    return text if text.endswith('\n') else text + '\n'
+
+
+def _comment_out(lines: list, line_idx: int, marker: str = '// ') -> bool:
+    line = lines[line_idx]
+    lines[line_idx] = _indent(line) + marker + line.lstrip()
+    return True
+
+
+# ─── Python (flake8) ─────────────────────────────────────────────────
+
+
+@heuristic('flake8', 'F401', 'F811')
+def _py_comment_out(lines, line_idx, issue):
+    if not lines[line_idx].strip().startswith("#"):
+        lines[line_idx] = f"# {lines[line_idx]}"
+    return True
+
+
+@heuristic('flake8', 'E999')
+def _py_missing_colon(lines, line_idx, issue):
+    if lines[line_idx].strip().endswith(":"):
+        return False
+    lines[line_idx] = lines[line_idx].rstrip() + ":\n"
+    return True
+
+
+@heuristic('flake8', 'E261')
+def _py_inline_comment_spacing(lines, line_idx, issue):
+    # Ensure 2 spaces before #
+    line = lines[line_idx]
+    match = re.search(r'(\S)\s*(#)', line)
+    if match:
+        lines[line_idx] = line[:match.end(1)] + '  ' + line[match.start(2):]
+    return True
+
+
+@heuristic('flake8', 'E262')
+def _py_inline_comment_start(lines, line_idx, issue):
+    # # must be followed by a space
+    lines[line_idx] = re.sub(r'#(\S)', r'# \1', lines[line_idx])
+    return True
+
+
+@heuristic('flake8', 'E265')
+def _py_block_comment_start(lines, line_idx, issue):
+    # Block comment must be "# " not "#text"
+    stripped = lines[line_idx].lstrip()
+    if stripped.startswith('#') and not stripped.startswith('# ') and not stripped.startswith('#!'):
+        lines[line_idx] = _with_newline(_indent(lines[line_idx]) + '# ' + stripped[1:].lstrip())
+    return True
+
+
+@heuristic('flake8', 'E266')
+def _py_block_comment_hashes(lines, line_idx, issue):
+    # Remove extra # from block comment
+    content = lines[line_idx].lstrip().lstrip('#').lstrip()
+    lines[line_idx] = _with_newline(_indent(lines[line_idx]) + '# ' + content)
+    return True
+
+
+@heuristic('flake8', 'W291', 'W293')
+def _py_trailing_whitespace(lines, line_idx, issue):
+    lines[line_idx] = lines[line_idx].rstrip() + '\n'
+    return True
+
+
+@heuristic('flake8', 'W292')
+def _py_final_newline(lines, line_idx, issue):
+    lines[line_idx] = _with_newline(lines[line_idx])
+    return True
+
+
+@heuristic('flake8', 'E303')
+def _py_extra_blank_line(lines, line_idx, issue):
+    # Remove extra blank line (replace with empty)
+    lines[line_idx] = ''
+    return True
+
+
+@heuristic('flake8', 'E302', 'E305')
+def _py_missing_blank_lines(lines, line_idx, issue):
+    # Insert every missing blank line at once ("expected 2 blank lines, found 0")
+    counts = re.search(r'expected (\d+) blank lines?.*?found (\d+)', issue.get('message', ''))
+    missing = int(counts.group(1)) - int(counts.group(2)) if counts else 1
+    lines[line_idx] = '\n' * max(1, missing) + lines[line_idx]
+    return True
+
+
+@heuristic('flake8', 'E301')
+def _py_missing_blank_line(lines, line_idx, issue):
+    lines[line_idx] = '\n' + lines[line_idx]
+    return True
+
+
+@heuristic('flake8', 'E251')
+def _py_keyword_equals(lines, line_idx, issue):
+    # def foo(x = 1) → def foo(x=1)
+    lines[line_idx] = _with_newline(re.sub(r'\s*=\s*', '=', lines[line_idx]))
+    return True
+
+
+@heuristic('flake8', 'E225')
+def _py_operator_spacing(lines, line_idx, issue):
+    # x=1 → x = 1 (but NOT in function defaults)
+    line = lines[line_idx]
+    if 'def ' not in line and 'lambda' not in line:
+        lines[line_idx] = re.sub(r'(\w)([+\-*/]=?|[<>!=]=|==)(\w)', r'\1 \2 \3', line)
+    return True
+
+
+@heuristic('flake8', 'E226')
+def _py_arithmetic_spacing(lines, line_idx, issue):
+    lines[line_idx] = re.sub(r'(\w)([*/%])(\w)', r'\1 \2 \3', lines[line_idx])
+    return True
+
+
+@heuristic('flake8', 'E228')
+def _py_modulo_spacing(lines, line_idx, issue):
+    lines[line_idx] = re.sub(r'(\S)%(\S)', r'\1 % \2', lines[line_idx])
+    return True
+
+
+@heuristic('flake8', 'E231')
+def _py_comma_spacing(lines, line_idx, issue):
+    # [1,2,3] → [1, 2, 3]
+    line = re.sub(r',(\S)', r', \1', lines[line_idx])
+    lines[line_idx] = re.sub(r':(\S)', r': \1', line)
+    return True
+
+
+@heuristic('flake8', 'E241')
+def _py_multiple_spaces(lines, line_idx, issue):
+    lines[line_idx] = re.sub(r':\s{2,}', ': ', lines[line_idx])
+    return True
+
+
+@heuristic('flake8', 'E271')
+def _py_keyword_spacing(lines, line_idx, issue):
+    lines[line_idx] = re.sub(
+        r'(import|from|class|def|if|elif|else|return|raise|except|with|as|in|not|and|or)\s{2,}',
+        r'\1 ', lines[line_idx])
+    return True
+
+
+@heuristic('flake8', 'E401')
+def _py_split_imports(lines, line_idx, issue):
+    # import os, sys → import os\nimport sys
+    stripped = lines[line_idx].strip()
+    if stripped.startswith('import ') and ',' in stripped:
+        indent = _indent(lines[line_idx])
+        lines[line_idx] = ''.join(f"{indent}import {m.strip()}\n"
+                                  for m in stripped[len('import '):].split(','))
+    return True
+
+
+@heuristic('flake8', 'E711')
+def _py_none_comparison(lines, line_idx, issue):
+    lines[line_idx] = _with_newline(lines[line_idx].replace('== None', 'is None').replace('!= None', 'is not None'))
+    return True
+
+
+@heuristic('flake8', 'E712')
+def _py_bool_comparison(lines, line_idx, issue):
+    lines[line_idx] = _with_newline(lines[line_idx].replace('== True', '').replace('== False', ''))
+    return True
+
+
+@heuristic('flake8', 'E701')
+def _py_split_statement(lines, line_idx, issue):
+    # `if x: return y` → two lines
+    line = lines[line_idx]
+    stripped = line.strip()
+    if not re.match(r'(if|elif|else|for|while|with|try|except|finally)\s*.*?:\s*(.+)', stripped):
+        return False
+    indent = _indent(line)
+    colon_idx = stripped.index(':')
+    lines[line_idx] = (f"{indent}{stripped[:colon_idx + 1]}\n"
+                       f"{indent}    {stripped[colon_idx + 1:].strip()}\n")
+    return True
+
+
+@heuristic('flake8', 'E501', 'E701', suppress=True)
+def _py_noqa_rule(lines, line_idx, issue):
+    if "# noqa" in lines[line_idx]:
+        return False
+    lines[line_idx] = lines[line_idx].rstrip() + f"  # noqa: {handler_key(issue)[1]}\n"
+    return True
+
+
+@heuristic('security-scanner', 'dangerous-function', suppress=True)
+def _flag_dangerous_call(lines, line_idx, issue):
+    marker = '# ' if language_family(issue) == 'python' else '// '
+    label = 'XSS-RISK' if 'innerHTML' in lines[line_idx] else 'SECURITY'
+    return _comment_out(lines, line_idx, f"{marker}[AI-AGENT] {label}: ")
+
+
+@fallback('python')
+def _py_suppress(lines, line_idx, issue):
+    if issue['type'] == 'SECURITY':
+        return _comment_out(lines, line_idx, '# [AI-AGENT] SECURITY: ')
+    if issue['type'] in ('LINTING', 'WARNING') and "# noqa" not in lines[line_idx]:
+        lines[line_idx] = lines[line_idx].rstrip() + "  # noqa\n"
+        return True
+    return False
+
+
+# ─── JavaScript / TypeScript (ESLint and pattern checks) ─────────────
+
+
+@heuristic('eslint', 'no-console')
+def _js_console(lines, line_idx, issue):
+    lines[line_idx] = lines[line_idx].replace('console.log(', '// console.log(')
+    return True
+
+
+@heuristic('eslint', 'no-var')
+def _js_var(lines, line_idx, issue):
+    lines[line_idx] = re.sub(r'\bvar\b', 'let', lines[line_idx], count=1)
+    return True
+
+
+@heuristic('eslint', 'eqeqeq')
+def _js_strict_equality(lines, line_idx, issue):
+    lines[line_idx] = re.sub(r'(?<!=)(?<!!)(?<!<)(?<!>)==(?!=)', '===', lines[line_idx])
+    return True
+
+
+@heuristic('eslint', 'no-debugger')
+def _js_debugger(lines, line_idx, issue):
+    lines[line_idx] = lines[line_idx].replace('debugger', '// debugger')
+    return True
+
+
+@heuristic('eslint', 'no-unused-vars')
+def _js_unused(lines, line_idx, issue):
+    return _comment_out(lines, line_idx)
+
+
+@heuristic('eslint', 'semi')
+def _js_semicolon(lines, line_idx, issue):
+    if not lines[line_idx].rstrip().endswith(';'):
+        lines[line_idx] = lines[line_idx].rstrip() + ';\n'
+    return True
+
+
+@heuristic('eslint', 'no-eval', 'no-implied-eval', suppress=True)
+def _js_flag_eval(lines, line_idx, issue):
+    return _comment_out(lines, line_idx, '// [AI-AGENT] SECURITY: ')
+
+
+@fallback('javascript')
+def _js_suppress(lines, line_idx, issue):
+    return _comment_out(lines, line_idx, '// [AI-AGENT] ')
+
+
+# ─── Go (go vet, staticcheck) ────────────────────────────────────────
+
+
+@heuristic('go', 'unused-var', 'unused-import')
+def _go_unused(lines, line_idx, issue):
+    return _comment_out(lines, line_idx)
+
+
+@heuristic('go', 'exported-comment')
+def _go_doc_comment(lines, line_idx, issue):
+    # Add a comment for an exported func/type
+    original = lines[line_idx]
+    name = original.strip().split('(')[0].split()[-1] if '(' in original else 'function'
+    lines[line_idx] = f"// {name} ...\n" + original
+    return True
+
+
+@heuristic('go', 'errcheck', suppress=True)
+def _go_unchecked_error(lines, line_idx, issue):
+    lines[line_idx] = _indent(lines[line_idx]) + '// [AI-AGENT] TODO: handle error\n' + lines[line_idx]
+    return True
+
+
+@fallback('go')
+def _go_suppress(lines, line_idx, issue):
+    return _comment_out(lines, line_idx, '// [AI-AGENT] ')
@@ -0,0 +1,115 @@
+"""
+Issue Budget — global severity-ranked selection of the best K findings.
+Scanners push findings into a bounded min-heap instead of stopping at a
+per-scanner cap, so a SYNTAX or SECURITY error deep in the tree outranks
+trailing-whitespace warnings that happen to be walked first.
+"""
+import heapq
+from collections import Counter
+
+from agent.issue_store import SEVERITY_RANK, fingerprint
+
+TYPE_RANK = {'SYNTAX': 5, 'SECURITY': 4, 'LOGIC': 3, 'IMPORT': 2, 'LINTING': 1, 'WARNING': 0}
+
+# Findings here matter less than the same finding in shipped source
+LOW_PRIORITY_DIRS = {'test', 'tests', '__tests__', 'spec', 'specs', 'fixtures',
+                     'example', 'examples', 'docs', 'doc', 'scripts', 'vendor', 'third_party'}
+LOW_PRIORITY_SUFFIXES = ('_test.py', '_test.go', '.test.js', '.test.ts', '.test.jsx', '.test.tsx',
+                         '.spec.js', '.spec.ts', '.spec.jsx', '.spec.tsx')
+
+
+def file_priority(path: str) -> int:
+    """1 for application source, 0 for tests, examples, docs and vendored code."""
+    parts = path.replace('\\', '/').split('/')
+    name = parts[-1]
+    if name.startswith('test_') or name.endswith(LOW_PRIORITY_SUFFIXES):
+        return 0
+    if any(part in LOW_PRIORITY_DIRS for part in parts[:-1]):
+        return 0
+    return 1
+
+
+def rank(issue) -> tuple:
+    """Higher is more important: severity, then issue type, then file priority."""
+    return (SEVERITY_RANK.get(issue.get('severity'), 0),
+            TYPE_RANK.get(issue.get('type'), 0),
+            file_priority(issue.get('file', '')))
+
+
+class _Entry:
+    """Heap entry — ordered by rank, ties broken by position (a later file/line ranks lower)."""
+
+    __slots__ = ('rank', 'position', 'issue')
+
+    def __init__(self, issue):
+        self.rank = rank(issue)
+        self.position = (issue.get('file', ''), issue.get('line', 0), issue.get('rule_id') or '',
+                         issue.get('tool') or '')
+        self.issue = issue
+
+    def __lt__(self, other):
+        if self.rank != other.rank:
+            return self.rank < other.rank
+        return self.position > other.position
+
+
+class TopK:
+    """Bounded min-heap holding the ``k`` best-ranked issues pushed so far.
+
+    Ties go to the issue earlier in path order, so the selection doesn't
+    depend on which scanner reported first. A finding another tool already
+    reported at the same place (see ``issue_store.fingerprint``) takes no
+    second slot; the higher-severity report is kept.
+    """
+
+    def __init__(self, k: int):
+        self.k = max(0, k)
+        self.seen = 0
+        self.duplicates = 0
+        self.offered = Counter()    # findings pushed, by tool
+        self._heap = []
+        self._held = {}             # fingerprint → entry, for the issues in the heap
+
+    def push(self, issue) -> bool:
+        """Offer ``issue``; True if it is (for now) among the best ``k``."""
+        self.offered[issue.get('tool')] += 1
+        entry = _Entry(issue)
+        key = fingerprint(issue)
+        held = self._held.get(key)
+        if held is not None:
+            self.duplicates += 1
+            if entry.rank > held.rank:
+                self._heap[self._heap.index(held)] = self._held[key] = entry
+                heapq.heapify(self._heap)
+            return False
+        self.seen += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif self._heap and self._heap[0] < entry:
+            del self._held[fingerprint(heapq.heapreplace(self._heap, entry).issue)]
+        else:
+            return False
+        self._held[key] = entry
+        return True
+
+    def extend(self, issues):
+        for issue in issues:
+            self.push(issue)
+
+    @property
+    def dropped(self) -> int:
+        return self.seen - len(self._heap)
+
+    def issues(self) -> list:
+        """The kept issues, best first."""
+        return [entry.issue for entry in sorted(self._heap, reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def top_k(issues, k: int) -> list:
+    """The ``k`` best-ranked of ``issues``, best first."""
+    top = TopK(k)
+    top.extend(issues)
+    return top.issues()
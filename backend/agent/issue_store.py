@@ -0,0 +1,208 @@
+"""
+Issue Store — cross-tool deduplication with a compact issue representation.
+Several agents report the same problem (bandit B307 and the security agent
+both flag `eval(`); each location is kept once, keyed by a stable
+fingerprint, and indexed by file, severity and rule.
+"""
+import re
+import sys
+from collections.abc import MutableMapping
+
+FIELDS = ('file', 'type', 'line', 'message', 'raw', 'severity',
+          'rule_id', 'tool', 'language', 'agent')
+# Low-cardinality fields repeated on every issue — one shared string each
+INTERNED = frozenset({'file', 'type', 'severity', 'rule_id', 'tool', 'language', 'agent'})
+
+SEVERITY_RANK = {'critical': 4, 'high': 3, 'error': 3, 'medium': 2,
+                 'warning': 1, 'low': 1, 'info': 0}
+
+# Same finding, different tools → one normalised rule
+RULE_ALIASES = {
+    ('bandit', 'B307'): 'eval',
+    ('bandit', 'B102'): 'exec',
+    ('bandit', 'B602'): 'shell-injection',
+    ('bandit', 'B604'): 'shell-injection',
+    ('bandit', 'B105'): 'hardcoded-secret',
+    ('bandit', 'B106'): 'hardcoded-secret',
+    ('bandit', 'B107'): 'hardcoded-secret',
+    ('flake8', 'F401'): 'unused-import',
+    ('flake8', 'F811'): 'unused-import',
+}
+# The security agent's "dangerous-function" rule covers several calls
+SECURITY_MESSAGE_ALIASES = (
+    ('eval()', 'eval'),
+    ('exec()', 'exec'),
+    ('shell=true', 'shell-injection'),
+    ('innerhtml', 'inner-html'),
+)
+
+# A rule can fire several times on one line (F401 for both names in `import os, sys`);
+# the symbol quoted in its message tells those findings apart. The cross-tool
+# aliases below name no common symbol, so they stay one finding per line.
+SUBJECT_RE = re.compile(r"""['"`]([^'"`]+)['"`]""")
+LINE_RULES = ({*RULE_ALIASES.values(), *(name for _, name in SECURITY_MESSAGE_ALIASES)}
+              - {'unused-import'})
+
+_MISSING = object()
+
+
+class Issue(MutableMapping):
+    """An issue dict in ``__slots__`` form — reads and writes like the dict it replaces."""
+
+    __slots__ = FIELDS + ('_extra',)
+
+    def __init__(self, data=None, **kwargs):
+        self._extra = None
+        for source in (data or {}, kwargs):
+            for key, value in source.items():
+                self[key] = value
+
+    def __getitem__(self, key):
+        if key in FIELDS:
+            value = getattr(self, key, _MISSING)
+            if value is _MISSING:
+                raise KeyError(key)
+            return value
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in FIELDS:
+            if key in INTERNED and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in FIELDS:
+            if getattr(self, key, _MISSING) is _MISSING:
+                raise KeyError(key)
+            delattr(self, key)
+        elif self._extra is None or key not in self._extra:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __iter__(self):
+        for key in FIELDS:
+            if getattr(self, key, _MISSING) is not _MISSING:
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Issue({dict(self)!r})"
+
+    def __reduce__(self):
+        return (Issue, (dict(self),))
+
+
+def normalize_rule(issue) -> str:
+    tool = issue.get('tool', '')
+    rule = issue.get('rule_id') or ''
+    alias = RULE_ALIASES.get((tool, rule))
+    if alias:
+        return alias
+    if tool == 'security-scanner' and rule == 'dangerous-function':
+        message = issue.get('message', '').lower()
+        for needle, name in SECURITY_MESSAGE_ALIASES:
+            if needle in message:
+                return name
+    return rule.lower() or issue.get('message', '').lower()
+
+
+def subject(issue, rule: str = None) -> str:
+    """The symbol a finding is about (first quoted name in its message), or '' for per-line rules."""
+    if (rule or normalize_rule(issue)) in LINE_RULES:
+        return ''
+    match = SUBJECT_RE.search(issue.get('message', ''))
+    return match.group(1) if match else ''
+
+
+def fingerprint(issue) -> tuple:
+    """(file, line, normalised rule, subject) — stable across tools and runs."""
+    rule = normalize_rule(issue)
+    return (issue.get('file', '').replace('\\', '/'), issue.get('line', 0), rule, subject(issue, rule))
+
+
+class IssueStore:
+    """Deduplicated issues in insertion order, indexed by file, severity and rule."""
+
+    def __init__(self, issues=None):
+        self._issues = {}
+        self.by_file = {}
+        self.by_severity = {}
+        self.by_rule = {}
+        self.duplicates = 0
+        if issues:
+            self.extend(issues)
+
+    def add(self, issue):
+        """Store ``issue`` and return its compact form; None if its location/rule is already held.
+
+        A duplicate with a higher severity replaces the held issue in place.
+        """
+        key = fingerprint(issue)
+        held = self._issues.get(key)
+        if held is not None:
+            self.duplicates += 1
+            if SEVERITY_RANK.get(issue.get('severity'), 0) > SEVERITY_RANK.get(held.get('severity'), 0):
+                self._unindex(key, held)
+                self._issues[key] = self._compact(issue)
+                self._index(key, self._issues[key])
+            return None
+        stored = self._issues[key] = self._compact(issue)
+        self._index(key, stored)
+        return stored
+
+    def extend(self, issues) -> list:
+        """Add every issue; returns the ones that were new, in compact form."""
+        added = (self.add(issue) for issue in issues)
+        return [issue for issue in added if issue is not None]
+
+    @staticmethod
+    def _compact(issue) -> Issue:
+        return issue if isinstance(issue, Issue) else Issue(issue)
+
+    def _index(self, key, issue):
+        self.by_file.setdefault(issue.get('file'), []).append(key)
+        self.by_severity.setdefault(issue.get('severity'), []).append(key)
+        self.by_rule.setdefault(key[2], []).append(key)
+
+    def _unindex(self, key, issue):
+        for index, value in ((self.by_file, issue.get('file')),
+                             (self.by_severity, issue.get('severity')),
+                             (self.by_rule, key[2])):
+            keys = index.get(value)
+            if keys and key in keys:
+                keys.remove(key)
+                if not keys:
+                    del index[value]
+
+    def for_file(self, path: str) -> list:
+        return [self._issues[k] for k in self.by_file.get(path, ())]
+
+    def with_severity(self, severity: str) -> list:
+        return [self._issues[k] for k in self.by_severity.get(severity, ())]
+
+    def for_rule(self, rule: str) -> list:
+        return [self._issues[k] for k in self.by_rule.get(rule, ())]
+
+    def issues(self) -> list:
+        return list(self._issues.values())
+
+    def __len__(self):
+        return len(self._issues)
+
+    def __iter__(self):
+        return iter(self._issues.values())
+
+    def __contains__(self, issue):
+        return fingerprint(issue) in self._issues
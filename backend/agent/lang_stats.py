@@ -0,0 +1,215 @@
+"""
+Language Statistics — per-language and per-directory file/line counts.
+Files and sizes come from git metadata (`git ls-files`, `git cat-file
+--batch-check`), newlines are counted over binary chunks, and results are
+memoised per commit SHA (in-process and in the scan cache) so repeated calls
+within a run and across runs are free.
+"""
+import mmap
+import os
+import subprocess
+import threading
+from collections import Counter, defaultdict
+
+from agent.file_index import DEFAULT_FILTER, LANGUAGE_MAP, RepoFileIndex
+from agent.scan_cache import digest, get_scan_cache
+
+STATS_VERSION = "1"             # bump when the counting rules change
+COUNT_CHUNK_BYTES = 1024 * 1024
+MMAP_THRESHOLD = 8 * 1024 * 1024
+MAX_BLOB_MEMO = 200_000         # in-process {blob id: line count} entries
+
+_by_commit = {}
+_by_blob = {}
+_memo_lock = threading.Lock()
+
+
+def count_lines(path: str, size: int = None) -> int:
+    """Line count matching text-mode iteration: newlines, plus an unterminated last line."""
+    try:
+        with open(path, 'rb') as f:
+            if size is None:
+                size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return 0
+            if size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    lines = 0
+                    for start in range(0, size, COUNT_CHUNK_BYTES):
+                        lines += mm[start:start + COUNT_CHUNK_BYTES].count(b'\n')
+                    last = mm[size - 1:size]
+            else:
+                lines = 0
+                last = b''
+                while True:
+                    chunk = f.read(COUNT_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    lines += chunk.count(b'\n')
+                    last = chunk[-1:]
+    except OSError:
+        return 0
+    return lines + (last != b'\n')
+
+
+def _git(repo_path: str, *args, input_data: bytes = None) -> bytes:
+    result = subprocess.run(['git', *args], cwd=repo_path, input=input_data,
+                            capture_output=True, timeout=60)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', errors='replace').strip()[:200])
+    return result.stdout
+
+
+def _tracked_sources(repo_path: str):
+    """``[(path, blob id, language)]`` for tracked files of a known language the file filter keeps."""
+    out = _git(repo_path, 'ls-files', '-s', '-z')
+    files = []
+    for record in out.split(b'\0'):
+        if not record:
+            continue
+        meta, _, path = record.decode('utf-8', errors='replace').partition('\t')
+        parts = meta.split()
+        if len(parts) < 3 or parts[0] == '160000':      # submodule
+            continue
+        language = LANGUAGE_MAP.get(os.path.splitext(path)[1].lower())
+        if language is None or DEFAULT_FILTER.excludes(path):
+            continue
+        files.append((path, parts[1], language))
+    return files
+
+
+def _blob_sizes(repo_path: str, blobs) -> dict:
+    unique = sorted(set(blobs))
+    if not unique:
+        return {}
+    out = _git(repo_path, 'cat-file', '--batch-check', input_data='\n'.join(unique).encode() + b'\n')
+    sizes = {}
+    for line in out.decode('utf-8', errors='replace').splitlines():
+        parts = line.split()
+        if len(parts) == 3 and parts[1] == 'blob':
+            sizes[parts[0]] = int(parts[2])
+    return sizes
+
+
+def _summarise(rows) -> dict:
+    """``rows`` of (path, language, lines, bytes) → the stats payload."""
+    file_counts = Counter()
+    line_counts = Counter()
+    byte_counts = Counter()
+    dirs = defaultdict(lambda: {"files": 0, "lines": 0, "languages": Counter()})
+    total_files = 0
+    for path, lang, lines, size in rows:
+        total_files += 1
+        file_counts[lang] += 1
+        line_counts[lang] += lines
+        byte_counts[lang] += size
+        top = path.split('/', 1)[0] if '/' in path else '.'
+        d = dirs[top]
+        d["files"] += 1
+        d["lines"] += lines
+        d["languages"][lang] += lines
+
+    total_lines = max(sum(line_counts.values()), 1)
+    distribution = {}
+    for lang in sorted(line_counts, key=line_counts.get, reverse=True):
+        pct = round((line_counts[lang] / total_lines) * 100, 1)
+        distribution[lang] = {
+            "files": file_counts[lang],
+            "lines": line_counts[lang],
+            "bytes": byte_counts[lang],
+            "percentage": pct,
+        }
+
+    directories = {}
+    for name in sorted(dirs, key=lambda n: dirs[n]["lines"], reverse=True):
+        d = dirs[name]
+        directories[name] = {
+            "files": d["files"],
+            "lines": d["lines"],
+            "languages": dict(d["languages"].most_common()),
+        }
+
+    return {
+        "total_files": total_files,
+        "total_lines": total_lines,
+        "languages": distribution,
+        "directories": directories,
+    }
+
+
+def _git_stats(repo_path: str):
+    """Stats from git metadata, memoised per commit; None if this isn't a git checkout."""
+    try:
+        head = _git(repo_path, 'rev-parse', 'HEAD').decode().strip()
+        dirty = {
+            p for p in _git(repo_path, 'diff', '--name-only', '-z', 'HEAD')
+            .decode('utf-8', errors='replace').split('\0') if p
+        }
+    except (OSError, RuntimeError, subprocess.SubprocessError):
+        return None
+
+    memo_key = f"lang-stats:{STATS_VERSION}:{digest(*DEFAULT_FILTER.patterns)}:{head}"
+    if not dirty:
+        with _memo_lock:
+            if head in _by_commit:
+                return _by_commit[head]
+        cache = get_scan_cache()
+        stats = cache.get_memo(memo_key) if cache is not None else None
+        if stats is not None:
+            with _memo_lock:
+                _by_commit[head] = stats
+            return stats
+
+    try:
+        sources = _tracked_sources(repo_path)
+        sizes = _blob_sizes(repo_path, (blob for path, blob, _ in sources if path not in dirty))
+    except (OSError, RuntimeError, subprocess.SubprocessError):
+        return None
+
+    rows = []
+    for path, blob, lang in sources:
+        abspath = os.path.join(repo_path, path)
+        if path in dirty:
+            # Working tree differs from the index blob — count what's on disk
+            try:
+                size = os.path.getsize(abspath)
+            except OSError:
+                continue
+            rows.append((path, lang, count_lines(abspath, size), size))
+            continue
+        size = sizes.get(blob, 0)
+        lines = _by_blob.get(blob)
+        if lines is None:
+            lines = count_lines(abspath, size)
+            with _memo_lock:
+                if len(_by_blob) >= MAX_BLOB_MEMO:
+                    _by_blob.clear()
+                _by_blob[blob] = lines
+        rows.append((path, lang, lines, size))
+
+    stats = _summarise(rows)
+    if not dirty:
+        with _memo_lock:
+            _by_commit[head] = stats
+        cache = get_scan_cache()
+        if cache is not None:
+            cache.put_memo(memo_key, stats)
+    return stats
+
+
+def detect_languages(repo_path: str, file_index: RepoFileIndex = None) -> dict:
+    """Scan repo and return language distribution statistics.
+
+    Uses git metadata when ``repo_path`` is a git checkout, otherwise the
+    file index.
+    """
+    stats = _git_stats(repo_path)
+    if stats is not None:
+        return stats
+
+    if file_index is None:
+        file_index = RepoFileIndex(repo_path)
+    return _summarise(
+        (entry.path, entry.language, count_lines(file_index.abspath(entry.path), entry.size), entry.size)
+        for entry in file_index.files(languages=set(LANGUAGE_MAP.values()), include_skipped=True)
+    )
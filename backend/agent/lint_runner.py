@@ -0,0 +1,114 @@
+"""
+Lint Runner — streams linter output line by line from an asyncio subprocess.
+Callers stop reading as soon as their issue budget is met; the linter's whole
+process tree is then killed instead of being left to run to its timeout.
+"""
+import asyncio
+import os
+import signal
+import subprocess
+from contextlib import aclosing
+
+# LINT_JOBS=1 keeps flake8 single-process
+LINT_JOBS = int(os.getenv("LINT_JOBS", "0")) or (os.cpu_count() or 1)
+LINT_BATCH_FILES = int(os.getenv("LINT_BATCH_FILES", "250"))   # files per linter invocation
+STREAM_LINE_LIMIT = 1024 * 1024
+
+# One bandit finding per line, so its output can be parsed as it streams
+BANDIT_MSG_TEMPLATE = "{relpath}\t{line}\t{test_id}\t{severity}\t{msg}"
+
+
+def batched(paths: list, size: int = LINT_BATCH_FILES):
+    """Split ``paths`` into linter invocations of at most ``size`` files."""
+    size = max(1, size)
+    return [paths[i:i + size] for i in range(0, len(paths), size)]
+
+
+def kill_process_tree(proc):
+    """Kill ``proc`` and every child it spawned (flake8 --jobs forks workers)."""
+    if proc.returncode is not None:
+        return
+    try:
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(proc.pid)],
+                           capture_output=True, timeout=10)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+
+
+async def stream_lines(cmd: list, cwd: str, timeout: float, stderr=False):
+    """Yield ``cmd``'s output lines as they arrive.
+
+    Raises FileNotFoundError if the tool is missing and
+    subprocess.TimeoutExpired once ``timeout`` seconds have passed. Closing
+    the generator early (``break`` inside ``aclosing``) kills the process tree.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT if stderr else asyncio.subprocess.DEVNULL,
+        start_new_session=os.name != 'nt',
+        limit=STREAM_LINE_LIMIT,
+    )
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            try:
+                line = await asyncio.wait_for(proc.stdout.readline(), remaining)
+            except asyncio.TimeoutError:
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            if not line:
+                break
+            yield line.decode('utf-8', errors='replace').rstrip('\r\n')
+        await proc.wait()
+    finally:
+        if proc.returncode is None:
+            kill_process_tree(proc)
+            await proc.wait()
+
+
+async def run_command(cmd: list, cwd: str, timeout: float, env=None) -> subprocess.CompletedProcess:
+    """``subprocess.run(cmd, capture_output=True, text=True)`` that stops when its task does.
+
+    The process tree is killed on timeout (raising TimeoutExpired) and when
+    the awaiting task is cancelled, e.g. an agent stopped at the scan
+    deadline — a thread running ``subprocess.run`` would leave it running.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, cwd=cwd, env=env,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        start_new_session=os.name != 'nt',
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), max(0, timeout))
+    except asyncio.TimeoutError:
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    finally:
+        if proc.returncode is None:
+            kill_process_tree(proc)
+            await proc.wait()
+    return subprocess.CompletedProcess(cmd, proc.returncode,
+                                       stdout.decode('utf-8', errors='replace'),
+                                       stderr.decode('utf-8', errors='replace'))
+
+
+async def cli_batches(make_cmd, batches: list, cwd: str, timeout: float):
+    """Yield ``(batch, lines)``, running ``make_cmd(batch)`` one batch at a time.
+
+    The next batch only starts once the caller asks for it, so breaking out
+    early means later batches never run. ``timeout`` covers all batches.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    for batch in batches:
+        async with aclosing(stream_lines(make_cmd(batch), cwd, deadline - loop.time())) as lines:
+            yield batch, lines
@@ -0,0 +1,352 @@
+"""
+Lint Workers — warm, long-lived linter processes shared across scans.
+Python workers keep flake8 (pycodestyle/pyflakes) and bandit imported and are
+recycled after LINT_WORKER_MAX_JOBS jobs; each run gets a Node process that
+keeps ESLint loaded. Callers fall back to one-shot CLI runs when a worker can't serve.
+"""
+import asyncio
+import configparser
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+
+from agent.lint_runner import BANDIT_MSG_TEMPLATE
+
+# LINT_WORKERS=0 disables the Python workers (every scan spawns the CLI)
+LINT_WORKERS = int(os.getenv("LINT_WORKERS", str(min(4, os.cpu_count() or 1))))
+LINT_WORKER_MAX_JOBS = int(os.getenv("LINT_WORKER_MAX_JOBS", "50"))
+# Small jobs: no per-job startup cost to amortise, and they spread across workers
+LINT_WORKER_BATCH_FILES = int(os.getenv("LINT_WORKER_BATCH_FILES", "25"))
+ESLINT_WORKER_ENABLED = os.getenv("ESLINT_WORKER", "1") != "0"
+ESLINT_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eslint_worker.js")
+ESLINT_WORKER_TIMEOUT = 90
+
+PYTHON_TOOLS = ('flake8', 'bandit')
+BANDIT_INI_OPTIONS = ('configfile', 'tests', 'skips', 'exclude', 'profile')
+
+
+# ─── Python workers ───────────────────────────────────────────────────
+
+
+def _init_worker():
+    """Import the linters once per worker so jobs only pay for linting."""
+    logging.getLogger('bandit').setLevel(logging.ERROR)
+    for tool in PYTHON_TOOLS:
+        try:
+            __import__(tool)
+        except ImportError:
+            pass
+
+
+def _ping():
+    return os.getpid()
+
+
+def _run_flake8(argv: list) -> list:
+    from flake8.main.application import Application
+
+    # --output-file rather than stdout, so the report can be read back
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'flake8.txt')
+        app = Application()
+        app.initialize([*argv, f'--output-file={output}', '--color=never'])
+        app.run_checks()
+        app.report()
+        if not os.path.exists(output):
+            return []
+        with open(output, encoding='utf-8') as f:
+            return f.read().splitlines()
+
+
+def _run_bandit(targets: list, excluded: str, options: dict) -> list:
+    from bandit.core import config as b_config, manager as b_manager
+
+    # Same profile the CLI builds from its config file and -t/-s/-p flags
+    b_conf = b_config.BanditConfig(config_file=options.get('configfile'))
+    if options.get('profile'):
+        profile = (b_conf.get_option('profiles') or {})[options['profile']]
+    else:
+        profile = {'include': b_conf.get_option('tests'), 'exclude': b_conf.get_option('skips')}
+    profile = {
+        'include': set(profile.get('include') or []) | set(filter(None, options.get('tests', '').split(','))),
+        'exclude': set(profile.get('exclude') or []) | set(filter(None, options.get('skips', '').split(','))),
+    }
+    mgr = b_manager.BanditManager(b_conf, 'file', quiet=True, profile=profile)
+    mgr.discover_files(targets, recursive=True, excluded_paths=excluded)
+    mgr.run_tests()
+    return [
+        BANDIT_MSG_TEMPLATE.format(relpath=os.path.relpath(i.fname), line=i.lineno,
+                                   test_id=i.test_id, severity=i.severity, msg=i.text)
+        for i in mgr.get_issue_list()
+    ]
+
+
+def bandit_options(repo_path: str) -> dict:
+    """The repo's own bandit settings — what the CLI would read from them.
+
+    A ``.bandit`` INI at the repo root wins (its [bandit] section's
+    configfile, tests, skips, exclude and profile); otherwise pyproject.toml
+    is the config file when it has a [tool.bandit] table. {} for neither.
+    """
+    ini = configparser.ConfigParser()
+    try:
+        ini.read(os.path.join(repo_path, '.bandit'), encoding='utf-8')
+        if ini.has_section('bandit'):
+            return {k: v for k, v in ini.items('bandit') if k in BANDIT_INI_OPTIONS and v}
+    except configparser.Error:
+        pass
+    try:
+        with open(os.path.join(repo_path, 'pyproject.toml'), 'rb') as f:
+            if 'bandit' in tomllib.load(f).get('tool', {}):
+                return {'configfile': 'pyproject.toml'}
+    except (OSError, tomllib.TOMLDecodeError):
+        pass
+    return {}
+
+
+def bandit_cli_flags(options: dict) -> list:
+    """``bandit_options`` as CLI flags (excludes are passed separately)."""
+    flags = []
+    for option, flag in (('configfile', '-c'), ('tests', '-t'), ('skips', '-s'), ('profile', '-p')):
+        if options.get(option):
+            flags += [flag, options[option]]
+    return flags
+
+
+def _run_job(tool: str, repo_path: str, args: list, batch: list) -> list:
+    """One lint job inside a worker — returns the same lines the CLI would print."""
+    os.chdir(repo_path)  # config discovery and relative paths, as for the CLI
+    if tool == 'flake8':
+        return _run_flake8([*batch, *args])
+    if tool == 'bandit':
+        return _run_bandit(batch, *args)
+    raise ValueError(f"unknown lint tool: {tool}")
+
+
+_pool = None
+_pool_jobs = 0      # jobs the current pool has been given
+_pool_users = 0     # scans using it right now
+_pool_lock = threading.Lock()
+
+
+def python_tool_available(tool: str) -> bool:
+    """Workers run in this interpreter, so they need the tool importable here."""
+    return LINT_WORKERS > 0 and importlib.util.find_spec(tool) is not None
+
+
+def get_lint_pool() -> ProcessPoolExecutor:
+    """The shared pool, started on first use."""
+    global _pool, _pool_jobs
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=LINT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            _pool_jobs = 0
+        return _pool
+
+
+def _checkout(jobs: int) -> ProcessPoolExecutor:
+    """The shared pool, for a scan about to queue ``jobs`` jobs on it."""
+    global _pool_jobs, _pool_users
+    pool = get_lint_pool()
+    with _pool_lock:
+        _pool_jobs += jobs
+        _pool_users += 1
+    return pool
+
+
+def _checkin():
+    """A scan is done with the pool; recycle it if it is idle and past its job limit.
+
+    Workers are recycled by replacing the whole pool once it has run about
+    LINT_WORKER_MAX_JOBS jobs per worker — ``max_tasks_per_child`` can
+    deadlock the executor on Python 3.11 when a worker exits with jobs queued.
+    Recycling waits until no scan is using the pool, and the replacement is
+    started straight away so the next scan finds it warm.
+    """
+    global _pool, _pool_users
+    with _pool_lock:
+        _pool_users -= 1
+        if _pool is None or _pool_users or _pool_jobs < LINT_WORKER_MAX_JOBS * LINT_WORKERS:
+            return
+        old, _pool = _pool, None
+    old.shutdown(wait=False)
+    threading.Thread(target=warm_up, name="lint-warm-up", daemon=True).start()
+
+
+def reset_lint_pool():
+    """Drop a broken pool; the next job starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def _lines(lines):
+    for line in lines:
+        yield line
+
+
+async def pooled_batches(tool: str, repo_path: str, args: list, batches: list, timeout: float):
+    """Yield ``(batch, lines)`` in batch order, linting every batch on the worker pool.
+
+    Batches are all queued up front so idle workers pick them up; closing
+    the generator early cancels the ones that have not started.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _checkout(len(batches))
+    deadline = loop.time() + timeout
+    try:
+        futures = [loop.run_in_executor(pool, _run_job, tool, repo_path, args, batch) for batch in batches]
+    except BaseException:
+        _checkin()
+        raise
+    try:
+        for batch, fut in zip(batches, futures):
+            try:
+                lines = await asyncio.wait_for(fut, max(0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                raise subprocess.TimeoutExpired(tool, timeout)
+            yield batch, _lines(lines)
+    finally:
+        for fut in futures:
+            fut.cancel()
+        _checkin()
+
+
+# ─── ESLint worker ────────────────────────────────────────────────────
+
+
+class EslintWorker:
+    """A persistent ``node eslint_worker.js`` speaking one JSON object per line.
+
+    It loads the linted repo's own ESLint, config and plugins, so one worker
+    only ever serves one run (see ``get_eslint_worker``).
+    """
+
+    def __init__(self):
+        self._proc = None
+        self._jobs = 0
+        self._lock = threading.Lock()
+
+    def _start(self):
+        self._proc = subprocess.Popen(
+            ['node', ESLINT_WORKER_SCRIPT],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding='utf-8', bufsize=1,
+        )
+        self._jobs = 0
+
+    def _stop(self):
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+                self._proc.wait(timeout=5)
+            except (OSError, subprocess.SubprocessError):
+                pass
+            self._proc = None
+
+    def lint(self, repo_path: str, targets: list, ignore_patterns: list, timeout: float = ESLINT_WORKER_TIMEOUT):
+        """ESLint JSON results (as ``eslint -f json`` prints them), or None if the worker can't serve."""
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None or self._jobs >= LINT_WORKER_MAX_JOBS:
+                self._stop()
+                try:
+                    self._start()
+                except OSError:
+                    return None
+            self._jobs += 1
+            request = {"cwd": repo_path, "targets": targets, "ignorePatterns": ignore_patterns}
+            # A hung lint is killed, which unblocks readline() with EOF
+            timer = threading.Timer(timeout, self._stop)
+            timer.start()
+            try:
+                self._proc.stdin.write(json.dumps(request) + '\n')
+                self._proc.stdin.flush()
+                reply = self._proc.stdout.readline()
+            except (OSError, ValueError, AttributeError):
+                reply = ''
+            finally:
+                timer.cancel()
+            try:
+                response = json.loads(reply) if reply else None
+            except json.JSONDecodeError:
+                response = None
+            if response is None:
+                self._stop()  # crashed or timed out — restart on the next job
+                return None
+            if not response.get('ok'):
+                return None  # eslint not resolvable from this repo, or a config error
+            return response['results']
+
+    def abort(self):
+        """Kill a lint in progress from another thread; ``lint`` then returns None."""
+        proc = self._proc
+        if proc is not None:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            self._stop()
+
+
+_eslint_workers = {}    # repo path → that run's worker
+
+
+def get_eslint_worker(repo_path: str):
+    """The ESLint worker for the run linting ``repo_path``, or None when disabled or Node is missing.
+
+    Repo code runs inside the worker, so it is never shared between runs;
+    ``close_eslint_worker`` stops it when the run ends.
+    """
+    if not ESLINT_WORKER_ENABLED or shutil.which('node') is None:
+        return None
+    with _pool_lock:
+        worker = _eslint_workers.get(repo_path)
+        if worker is None:
+            worker = _eslint_workers[repo_path] = EslintWorker()
+        return worker
+
+
+def close_eslint_worker(repo_path: str):
+    with _pool_lock:
+        worker = _eslint_workers.pop(repo_path, None)
+    if worker is not None:
+        worker.close()
+
+
+# ─── Lifecycle ────────────────────────────────────────────────────────
+
+
+def warm_up():
+    """Start every Python worker now so the first scan doesn't pay for spawning."""
+    if not any(python_tool_available(t) for t in PYTHON_TOOLS):
+        return
+    try:
+        pool = get_lint_pool()
+        for fut in [pool.submit(_ping) for _ in range(LINT_WORKERS)]:
+            fut.result()
+    except Exception as e:
+        reset_lint_pool()
+        print(f"⚠️  Lint workers failed to start: {e}")
+
+
+def shutdown_workers():
+    reset_lint_pool()
+    for repo_path in list(_eslint_workers):
+        close_eslint_worker(repo_path)
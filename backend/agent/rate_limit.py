@@ -0,0 +1,164 @@
+"""
+AI Rate Limiter — per-provider request and token budgets for concurrent fixes.
+Each model gets two token buckets (requests/min, tokens/min) that every fix
+thread draws from; a 429 pauses the whole provider for its Retry-After, so
+parallel fixes back off together instead of each hammering the API.
+"""
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# (requests per minute, tokens per minute) — the providers' entry-tier limits
+PROVIDER_LIMITS = {
+    'gpt-4o-mini': (int(os.getenv("OPENAI_RPM", "500")), int(os.getenv("OPENAI_TPM", "200000"))),
+    'gemini-2.0-flash': (int(os.getenv("GEMINI_RPM", "15")), int(os.getenv("GEMINI_TPM", "1000000"))),
+}
+DEFAULT_LIMITS = (60, 100000)
+MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "4"))     # retries per request (429, 5xx, dropped connections)
+BACKOFF_BASE = 2.0          # seconds; doubled per retry when the server sends no Retry-After
+MAX_BACKOFF = 60.0
+CHARS_PER_TOKEN = 4         # rough prompt-size estimate before the real usage is known
+
+
+class TokenBucket:
+    """``per_minute`` units, refilled continuously; starts full."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = max(1, per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` is available (requests larger than the bucket wait for a full one)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def give(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class ProviderLimiter:
+    """Requests-per-minute and tokens-per-minute budgets for one model."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int):
+        """Block until one request of about ``tokens`` tokens fits both budgets, then spend it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(self.blocked_until - now,
+                           self.requests.wait_time(1, now),
+                           self.tokens.wait_time(tokens, now))
+                if wait <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    return
+            time.sleep(wait)
+
+    def settle(self, estimated: int, actual: int):
+        """Correct the token budget once the response reports real usage."""
+        with self._lock:
+            if actual < estimated:
+                self.tokens.give(estimated - actual)
+            else:
+                self.tokens.take(actual - estimated)
+
+    def backoff(self, seconds: float):
+        """Hold every caller of this provider for ``seconds`` (after a 429)."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(model: str) -> ProviderLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            limiter = _limiters[model] = ProviderLimiter(*PROVIDER_LIMITS.get(model, DEFAULT_LIMITS))
+        return limiter
+
+
+def estimate_tokens(messages: list, max_tokens: int) -> int:
+    return sum(len(m.get('content', '')) for m in messages) // CHARS_PER_TOKEN + max_tokens
+
+
+def retry_after(error) -> float:
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), or None."""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def is_rate_limited(error) -> bool:
+    return getattr(error, 'status_code', None) == 429
+
+
+def is_transient(error) -> bool:
+    """Timeouts, conflicts, 5xx and dropped connections — worth retrying, no provider-wide pause."""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in (408, 409) or status >= 500
+    return type(error).__name__ in ('APIConnectionError', 'APITimeoutError')
+
+
+def complete(client, model: str, messages: list, **kwargs):
+    """``client.chat.completions.create`` within the model's budgets, retrying 429s and transient errors.
+
+    The pooled clients don't retry on their own, so a 429 pauses every
+    thread using this provider for the server's Retry-After (or an
+    exponential backoff), not just the one that hit it.
+    """
+    limiter = get_limiter(model)
+    estimated = estimate_tokens(messages, kwargs.get('max_tokens', 0))
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire(estimated)
+        try:
+            response = client.chat.completions.create(model=model, messages=messages, **kwargs)
+        except Exception as e:
+            limited = is_rate_limited(e)
+            if not (limited or is_transient(e)) or attempt == MAX_RETRIES:
+                raise
+            delay = retry_after(e)
+            if delay is None:
+                delay = BACKOFF_BASE * 2 ** attempt
+            delay = min(MAX_BACKOFF, delay)
+            if limited:
+                print(f"⏳ {model} rate limited — retrying in {delay:.1f}s")
+                limiter.backoff(delay)
+            else:
+                time.sleep(delay)
+            continue
+        usage = getattr(response, 'usage', None)
+        if usage is not None and getattr(usage, 'total_tokens', None):
+            limiter.settle(estimated, usage.total_tokens)
+        return response
@@ -0,0 +1,241 @@
+"""
+Scan Result Cache — persistent, content-addressed store of per-file findings.
+Keyed by scanner, tool version, lint config, path and the file's git blob
+hash, so unchanged files are served from disk and only new blobs are linted.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import Counter
+
+SCAN_CACHE_PATH = os.getenv("SCAN_CACHE_PATH", os.path.abspath("./.scan_cache/scan_results.sqlite3"))
+SCAN_CACHE_MAX_BYTES = int(os.getenv("SCAN_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # 0 disables
+MEMO_MAX_ROWS = 500          # whole-repo memos kept (most recently used)
+TOOL_VERSION_TTL = 3600     # re-probe `tool --version` hourly so upgrades invalidate entries
+TOOL_PROBE_TIMEOUT = 60     # seconds a version probe may take (npx may be downloading)
+CACHE_SCHEMA = 2            # bump when the stored payload format changes
+
+
+def blob_hash(data: bytes) -> str:
+    """Git blob id of ``data`` — identical to what `git hash-object` prints."""
+    h = hashlib.sha1(b'blob %d\0' % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+
+def digest(*parts) -> str:
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(str(part).encode('utf-8', errors='ignore'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def evict_lru(db: sqlite3.Connection, table: str, max_bytes: int, expired_before: float = None):
+    """Bound ``table`` (``key``, ``size``, ``last_used`` columns) to ``max_bytes``.
+
+    Rows with ``created`` before ``expired_before`` go first; then the least
+    recently used until the table is back under 90% of ``max_bytes``. The
+    caller holds the cache's lock.
+    """
+    if expired_before is not None:
+        db.execute(f"DELETE FROM {table} WHERE created < ?", (expired_before,))
+    total = db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+    if total > max_bytes:
+        target = int(max_bytes * 0.9)
+        doomed = []
+        for key, size in db.execute(f"SELECT key, size FROM {table} ORDER BY last_used"):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        db.executemany(f"DELETE FROM {table} WHERE key = ?", doomed)
+    db.commit()
+
+
+_versions: dict = {}
+_versions_lock = threading.Lock()
+
+
+def tool_version(cmd: tuple, timeout: float = TOOL_PROBE_TIMEOUT) -> str:
+    """First line of the version command ``cmd`` prints (memoised for TOOL_VERSION_TTL).
+
+    A probe cut short by ``timeout`` reports 'unavailable' but isn't memoised.
+    """
+    now = time.time()
+    with _versions_lock:
+        cached = _versions.get(cmd)
+        if cached and now - cached[1] < TOOL_VERSION_TTL:
+            return cached[0]
+    try:
+        result = subprocess.run(list(cmd), capture_output=True, text=True, timeout=max(0.1, timeout))
+        output = (result.stdout or result.stderr).strip()
+        if result.returncode != 0:
+            version = 'unavailable'
+        else:
+            version = output.splitlines()[0] if output else 'unknown'
+    except subprocess.TimeoutExpired:
+        return 'unavailable'
+    except Exception:
+        version = 'unavailable'
+    with _versions_lock:
+        _versions[cmd] = (version, now)
+    return version
+
+
+class ScanCache:
+    """SQLite-backed per-file issue lists with size-bounded LRU eviction."""
+
+    def __init__(self, path: str = SCAN_CACHE_PATH, max_bytes: int = SCAN_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+        self._purged = set()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, scanner TEXT NOT NULL, version TEXT NOT NULL,"
+            " payload TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (last_used)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS memo ("
+            " key TEXT PRIMARY KEY, payload TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def _key(scanner, version, config, path, blob):
+        return digest(CACHE_SCHEMA, scanner, version, config, path, blob)
+
+    def _purge_stale(self, scanner: str, version: str):
+        """Drop entries written by any other version of ``scanner`` (once per process)."""
+        if (scanner, version) in self._purged:
+            return
+        self._purged.add((scanner, version))
+        self._db.execute("DELETE FROM results WHERE scanner = ? AND version <> ?", (scanner, version))
+        self._db.commit()
+
+    def get_many(self, scanner: str, version: str, config: str, blobs: dict) -> dict:
+        """``{path: issues}`` for every path in ``blobs`` ({path: blob hash}) that is cached."""
+        rows = self._fetch(scanner, version, config, blobs, "key, payload")
+        found = {}
+        for path, (_, payload) in rows.items():
+            found[path] = [{'file': path, **issue} for issue in json.loads(payload)]
+        self.hits[scanner] += len(found)
+        self.misses[scanner] += len(blobs) - len(found)
+        return found
+
+    def cached_paths(self, scanner: str, version: str, config: str, blobs: dict) -> set:
+        """The paths in ``blobs`` that are cached, without loading their issues."""
+        return set(self._fetch(scanner, version, config, blobs, "key"))
+
+    def _fetch(self, scanner, version, config, blobs, columns) -> dict:
+        """``{path: row}`` for the cached paths in ``blobs``; the rows are marked as used."""
+        keys = {self._key(scanner, version, config, p, b): p for p, b in blobs.items()}
+        found = {}
+        with self._lock:
+            self._purge_stale(scanner, version)
+            key_list = list(keys)
+            for i in range(0, len(key_list), 500):
+                batch = key_list[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT {columns} FROM results WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for row in rows:
+                    found[keys[row[0]]] = row
+            if found:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE results SET last_used = ? WHERE key = ?",
+                    [(now, k) for k, p in keys.items() if p in found]
+                )
+                self._db.commit()
+        return found
+
+    def put_many(self, scanner: str, version: str, config: str, blobs: dict, results: dict):
+        """Store ``results`` ({path: issues}) for the paths listed in ``blobs``.
+
+        An issue's ``file`` is only left out when it is the unit's path, so
+        units that group several files (Go packages) keep each issue's file.
+        """
+        now = time.time()
+        rows = []
+        for path, issues in results.items():
+            if path not in blobs:
+                continue
+            payload = json.dumps([{k: v for k, v in i.items() if k != 'file' or v != path} for i in issues])
+            rows.append((self._key(scanner, version, config, path, blobs[path]),
+                         scanner, version, payload, len(payload), now))
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+            evict_lru(self._db, 'results', self.max_bytes)
+
+    def forget_many(self, scanner: str, version: str, config: str, blobs: dict):
+        """Drop the entries stored for ``blobs`` ({path: blob hash})."""
+        keys = [(self._key(scanner, version, config, p, b),) for p, b in blobs.items()]
+        if not keys:
+            return
+        with self._lock:
+            self._db.executemany("DELETE FROM results WHERE key = ?", keys)
+            self._db.commit()
+
+    def get_memo(self, key: str):
+        """A whole-repo result memoised under ``key`` (e.g. stats per commit), or None."""
+        with self._lock:
+            row = self._db.execute("SELECT payload FROM memo WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE memo SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def put_memo(self, key: str, value):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO memo VALUES (?, ?, ?)",
+                             (key, json.dumps(value), time.time()))
+            self._db.execute(
+                "DELETE FROM memo WHERE key NOT IN"
+                " (SELECT key FROM memo ORDER BY last_used DESC LIMIT ?)", (MEMO_MAX_ROWS,))
+            self._db.commit()
+
+    def invalidate(self, scanner: str = None):
+        """Forget everything (or everything for one scanner)."""
+        with self._lock:
+            if scanner:
+                self._db.execute("DELETE FROM results WHERE scanner = ?", (scanner,))
+            else:
+                self._db.execute("DELETE FROM results")
+                self._db.execute("DELETE FROM memo")
+            self._db.commit()
+            self._purged.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_scan_cache():
+    """Process-wide cache, or None when disabled or the database can't be opened."""
+    global _cache
+    if SCAN_CACHE_MAX_BYTES <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = ScanCache()
+            except Exception as e:
+                print(f"⚠️  Scan cache disabled: {e}")
+                _cache = False
+        return _cache or None
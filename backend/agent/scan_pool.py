@@ -0,0 +1,97 @@
+"""
+Scan Pool — process-pool sharded execution for the in-Python pattern scanners.
+Their regex loops are GIL-bound, so large repos are split into shards that
+run on every core; tiny repos stay in-thread where pool startup would dominate.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# SCAN_WORKERS=1 disables sharding entirely
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "0")) or (os.cpu_count() or 1)
+SHARD_MIN_FILES = int(os.getenv("SCAN_SHARD_MIN_FILES", "500"))
+SHARD_MIN_BYTES = int(os.getenv("SCAN_SHARD_MIN_BYTES", str(16 * 1024 * 1024)))
+SHARDS_PER_WORKER = 4   # more shards than workers evens out uneven file sizes
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Process-wide pool, started on first use and reused across runs."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs asyncio worker threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=SCAN_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def should_shard(entries) -> bool:
+    """Only worth paying for IPC on repos with many files or many bytes."""
+    if SCAN_WORKERS <= 1:
+        return False
+    return len(entries) >= SHARD_MIN_FILES or sum(e.size for e in entries) >= SHARD_MIN_BYTES
+
+
+def _split(jobs: list, n: int) -> list:
+    """Contiguous shards, so concatenating results keeps the in-thread order."""
+    size = max(1, -(-len(jobs) // n))
+    return [jobs[i:i + size] for i in range(0, len(jobs), size)]
+
+
+async def run_sharded(scan_fn, repo_path: str, jobs: list, budget: int, on_shard=None):
+    """Run ``scan_fn(repo_path, shard, budget)`` across the pool.
+
+    ``scan_fn`` must be a top-level function returning ``({path: issues},
+    skipped)``. Results are merged in shard order, so the output matches a
+    sequential scan. Once the completed prefix of shards fills ``budget``,
+    shards that have not started yet are cancelled. With ``on_shard``, each
+    shard's results are awaited through it instead of being merged.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    shards = _split(jobs, SCAN_WORKERS * SHARDS_PER_WORKER)
+    futures = {
+        loop.run_in_executor(pool, scan_fn, repo_path, shard, budget): idx
+        for idx, shard in enumerate(shards)
+    }
+    results = [None] * len(shards)
+    merged = {}
+    found = 0
+    skipped = Counter()
+    next_idx = 0
+    pending = set(futures)
+    try:
+        while pending and found < budget:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                results[futures[fut]] = fut.result()
+            while next_idx < len(results) and results[next_idx] is not None and found < budget:
+                shard_results, shard_skipped = results[next_idx]
+                results[next_idx] = ()
+                if on_shard is not None:
+                    await on_shard(shard_results)
+                else:
+                    merged.update(shard_results)
+                found += sum(len(v) for v in shard_results.values())
+                skipped.update(shard_skipped)
+                next_idx += 1
+    finally:
+        for fut in pending:
+            fut.cancel()
+    return merged, skipped
@@ -0,0 +1,113 @@
+"""
+Scan Scheduler — one wall-clock deadline for a whole repository scan.
+Agents run side by side until the deadline; tools that run one after another
+inside an agent split its time by predicted runtime (file count × historical
+seconds per file). A tool that runs over returns what it finished and the
+scan is marked truncated.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from agent.scan_cache import TOOL_PROBE_TIMEOUT, get_scan_cache
+
+SCAN_DEADLINE = float(os.getenv("SCAN_DEADLINE", "0"))    # seconds per scan; 0 = per-tool timeouts only
+DEADLINE_GRACE = 5          # agents still running this long after the deadline are cancelled
+HISTORY_WEIGHT = 0.3        # weight of the newest run in the seconds-per-file average
+RUNTIME_MEMO_KEY = "scan-runtime:1"
+
+# Per-tool timeouts without a deadline (the old fixed limits)
+DEFAULT_TIMEOUTS = {'flake8': 60, 'bandit': 60, 'eslint': 90, 'go': 60}
+# Seconds per file (per package for go) until a tool has history
+DEFAULT_SECONDS_PER_UNIT = {'flake8': 0.02, 'bandit': 0.03, 'eslint': 0.05, 'go': 0.5,
+                            'security': 0.002, 'js-pattern': 0.002}
+
+_rates_lock = threading.Lock()
+
+
+class ScanResult(list):
+    """An issue list that may be partial — ``truncated`` names the tools that ran out of time."""
+
+    def __init__(self, issues=(), truncated=()):
+        super().__init__(issues)
+        self.truncated = set(truncated)
+
+    def merge(self, other):
+        self.extend(other)
+        self.truncated |= getattr(other, 'truncated', set())
+
+
+class ScanScheduler:
+    """Time allotments for one scan. ``deadline`` is in seconds; None or 0 disables it."""
+
+    def __init__(self, deadline: float = None):
+        self.deadline = deadline or None
+        self.started = time.monotonic()
+        self.truncated = set()
+        self._rates = dict(DEFAULT_SECONDS_PER_UNIT)
+        cache = get_scan_cache()
+        history = cache.get_memo(RUNTIME_MEMO_KEY) if cache is not None else None
+        if history:
+            self._rates.update(history)
+        self._measured = {}
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - (time.monotonic() - self.started))
+
+    def probe_timeout(self) -> float:
+        """Seconds a tool's version probe may take — never past the deadline."""
+        remaining = self.remaining()
+        return TOOL_PROBE_TIMEOUT if remaining is None else min(TOOL_PROBE_TIMEOUT, remaining)
+
+    def estimate(self, tool: str, units: int) -> float:
+        return self._rates.get(tool, 0.01) * units
+
+    def timeout(self, tool: str, units: int, then=()) -> float:
+        """Seconds ``tool`` may spend on ``units`` files.
+
+        ``then`` lists the ``(tool, units)`` still to run after it in the
+        same agent; the time left is shared in proportion to predicted runtime,
+        and whatever a tool doesn't use rolls over to the next.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return DEFAULT_TIMEOUTS.get(tool, 60)
+        own = self.estimate(tool, units)
+        total = own + sum(self.estimate(t, u) for t, u in then)
+        return remaining * own / total if total > 0 else remaining
+
+    def truncate(self, tool: str):
+        self.truncated.add(tool)
+
+    @contextmanager
+    def track(self, tool: str, units: int):
+        """Time a tool run; runs that finish feed the tool's seconds-per-file history."""
+        start = time.monotonic()
+        yield
+        if units and tool not in self.truncated:
+            self._measured[tool] = (time.monotonic() - start) / units
+
+    def plan(self, work: dict) -> str:
+        """``work`` ({label: [(tool, units)]}) → a one-line summary of predicted runtimes."""
+        return ", ".join(
+            f"{label} ~{sum(self.estimate(t, u) for t, u in tools):.1f}s"
+            for label, tools in work.items()
+        )
+
+    def save(self):
+        """Fold this scan's measured runtimes into the persisted history."""
+        if not self._measured:
+            return
+        cache = get_scan_cache()
+        if cache is None:
+            return
+        with _rates_lock:
+            history = cache.get_memo(RUNTIME_MEMO_KEY) or {}
+            for tool, rate in self._measured.items():
+                old = history.get(tool)
+                history[tool] = rate if old is None else (1 - HISTORY_WEIGHT) * old + HISTORY_WEIGHT * rate
+            cache.put_memo(RUNTIME_MEMO_KEY, history)
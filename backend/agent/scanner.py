@@ -9,491 +9,1092 @@ import subprocess
 import asyncio
 import json
 from collections import Counter
+from contextlib import aclosing
+from concurrent.futures.process import BrokenProcessPool
+
+from agent.file_index import RepoFileIndex, normalize_path
+from agent.lang_stats import detect_languages
+from agent.issue_store import IssueStore
+from agent.issue_budget import TopK
+from agent.security_rules import DEFAULT_ENGINE
+from agent.file_classifier import CLASSIFIER_VERSION, SCANNABLE, classify_file, iter_lines, iter_text_chunks
+from agent.scan_pool import run_sharded, should_shard
+from agent.scan_cache import digest, get_scan_cache, tool_version
+from agent.lint_runner import BANDIT_MSG_TEMPLATE, LINT_JOBS, batched, cli_batches, run_command
+from agent import lint_workers
+from agent.go_cache import go_env, schedule_prune
+from agent.scan_scheduler import DEADLINE_GRACE, SCAN_DEADLINE, ScanResult, ScanScheduler
 
 MAX_ISSUES_PER_SCANNER = 30
-SKIP_DIRS = {'node_modules', '.git', 'dist', 'build', '.next', 'coverage',
-             '__pycache__', 'venv', '.venv', 'env', '.env', 'vendor', 'target'}
-
-LANGUAGE_MAP = {
-    '.py': 'python', '.pyw': 'python',
-    '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript',
-    '.ts': 'typescript', '.tsx': 'typescript',
-    '.go': 'go',
-    '.java': 'java', '.kt': 'kotlin',
-    '.rs': 'rust',
-    '.c': 'c', '.cpp': 'cpp', '.h': 'c', '.hpp': 'cpp',
-    '.rb': 'ruby',
-    '.php': 'php',
-    '.css': 'css', '.scss': 'scss',
-    '.html': 'html', '.htm': 'html',
-    '.json': 'json', '.yaml': 'yaml', '.yml': 'yaml',
-    '.md': 'markdown', '.txt': 'text',
-    '.sh': 'shell', '.bash': 'shell',
-}
-
-# ─── Language Detection ────────────────────────────────────────────────
-
-
-def detect_languages(repo_path: str) -> dict:
-    """Scan repo and return language distribution statistics."""
-    file_counts = Counter()
-    line_counts = Counter()
-    total_files = 0
-
-    for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-        for f in files:
-            ext = os.path.splitext(f)[1].lower()
-            lang = LANGUAGE_MAP.get(ext)
-            if not lang:
-                continue
-            total_files += 1
-            file_counts[lang] += 1
-            try:
-                fp = os.path.join(root, f)
-                with open(fp, 'r', encoding='utf-8', errors='ignore') as fh:
-                    line_counts[lang] += sum(1 for _ in fh)
-            except Exception:
-                pass
-
-    total_lines = max(sum(line_counts.values()), 1)
-    distribution = {}
-    for lang in sorted(line_counts, key=line_counts.get, reverse=True):
-        pct = round((line_counts[lang] / total_lines) * 100, 1)
-        distribution[lang] = {
-            "files": file_counts[lang],
-            "lines": line_counts[lang],
-            "percentage": pct,
-        }
+JS_EXTS = ('.js', '.jsx', '.ts', '.tsx')
+SECURITY_EXTS = {'.py', '.js', '.jsx', '.ts', '.tsx', '.go', '.env', '.rb', '.php'}
+BANDIT_MAX_ISSUES = 10
+MAX_EXPLICIT_TARGETS = 1000     # above this many files, lint '.' instead of listing them
+
+# Bump when the in-Python pattern rules change so cached results are dropped
+JS_PATTERN_VERSION = "1"
+CACHE_READ_CHUNK = 500         # cached units read (and ranked) at a time in budgeted scans
+SECURITY_RULES_VERSION = digest(*(r._replace(exts=sorted(r.exts or ())) for r in DEFAULT_ENGINE.rules))
+
+FLAKE8_CONFIG_FILES = ('setup.cfg', 'tox.ini', '.flake8')
+BANDIT_CONFIG_FILES = ('.bandit', 'pyproject.toml')
+ESLINT_CONFIG_FILES = ('.eslintrc', '.eslintrc.js', '.eslintrc.cjs', '.eslintrc.json', '.eslintrc.yml',
+                       '.eslintrc.yaml', 'eslint.config.js', 'eslint.config.mjs', 'eslint.config.cjs',
+                       '.eslintignore', 'package.json')
+ESLINT_IGNORE_PATTERNS = ['node_modules', 'dist', 'build']
+GO_CONFIG_FILES = ('go.mod', 'go.sum', 'staticcheck.conf')
+# Git ref (e.g. origin/main): full scans then only vet packages with .go files changed since it
+GO_CHANGED_BASE = os.getenv("GO_CHANGED_BASE", "")
+
+
+def _select(entries, paths):
+    """Restrict index entries to ``paths`` (None means the whole repo)."""
+    if paths is None:
+        return entries
+    return [e for e in entries if e.path in paths]
+
+
+def _lint_targets(misses: list, units: dict, paths, default='.'):
+    """CLI targets for a linter run over the uncached ``misses``.
+
+    A full scan with nothing cached (or too many files to list) lints
+    ``default`` instead of passing every path on the command line.
+    """
+    if paths is None and (len(misses) == len(units) or len(misses) > MAX_EXPLICIT_TARGETS):
+        return [default]
+    return misses
+
+
+def _config_digest(file_index: RepoFileIndex, names, *extra) -> str:
+    """Digest of the repo's lint config files plus CLI flags — part of every cache key."""
+    parts = list(extra)
+    for name in names:
+        try:
+            with open(file_index.abspath(name), 'rb') as f:
+                parts.append(f"{name}:{digest(f.read())}")
+        except OSError:
+            continue
+    return digest(*parts)
+
+
+def _flatten(results: dict, limit: int) -> list:
+    """Per-file results → one issue list in path order, capped at ``limit``."""
+    issues = []
+    for path in sorted(results):
+        issues.extend(results[path])
+        if len(issues) >= limit:
+            break
+    return issues[:limit]
+
+
+def _scan_limit(limit: int, budget: int = None):
+    """How many findings a scanner collects before stopping early.
+
+    Under a global ``budget`` nothing stops early — a severe finding in the
+    last file must still get the chance to outrank the first file's warnings.
+    """
+    return limit if budget is None else float('inf')
+
+
+def _collect(results: dict, limit: int, budget: int = None) -> list:
+    """A scanner's issue list: the first ``limit`` in path order (budgeted findings went to a TopK)."""
+    return _flatten(results, limit) if budget is None else []
+
+
+def _found(issues: list, top: TopK, *tools) -> int:
+    """How many findings a scanner reported — under a budget, what its tools pushed into ``top``."""
+    return len(issues) if top is None else sum(top.offered[tool] for tool in tools)
+
+
+async def _cached_lint(tool: str, version: str, config: str, units: dict, lint_fn,
+                       log_callback=None, label='', recheck=None, cacheable=None, top: TopK = None,
+                       all_or_nothing=False):
+    """Per-unit results for ``units`` ({path: content hash}) — cache hits plus a lint of the rest.
+
+    ``lint_fn(misses, flush)`` gets the sorted uncached paths and returns
+    ``{path: [issues]}`` for every path it checked (clean ones as ``[]``),
+    or None if the tool could not run — then nothing is cached. ``flush``
+    is None here; see ``_budgeted_lint`` for what it does under ``top``.
+    ``recheck()`` re-hashes the units after linting; results are only cached
+    for units that did not change meanwhile (the pipelined fixer may rewrite
+    files while slower agents are still scanning them). ``cacheable()``
+    returning False keeps this run's results out of the cache (e.g. one of
+    several tools behind them ran out of time).
+    With ``all_or_nothing``, a failed run discards the cache hits as well
+    (the caller falls back to another scanner for every unit).
+    Returns ``(results, ok)``; ``ok`` is False only when the tool failed.
+    """
+    if top is not None:
+        return await _budgeted_lint(tool, version, config, units, lint_fn, top,
+                                    log_callback, label, recheck, cacheable, all_or_nothing)
+    cache = get_scan_cache() if version != 'unavailable' else None
+    cached = {}
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get_many, tool, version, config, units)
+    misses = sorted(p for p in units if p not in cached)
+    fresh = await lint_fn(misses, None) if misses else {}
+
+    if cache is not None:
+        if fresh and misses and (cacheable is None or cacheable()):
+            current = await recheck() if recheck else units
+            unchanged = {p: h for p, h in units.items() if current.get(p) == h}
+            await asyncio.to_thread(cache.put_many, tool, version, config, unchanged,
+                                    {p: fresh[p] for p in misses if p in fresh})
+        if log_callback:
+            await log_callback(f"{label} cache: {len(cached)} hits, {len(misses)} misses.", "INFO")
+
+    if fresh is None and all_or_nothing:
+        return {}, False
+    results = dict(cached)
+    results.update(fresh or {})
+    return results, fresh is not None
+
+
+async def _budgeted_lint(tool, version, config, units, lint_fn, top: TopK, log_callback, label,
+                         recheck, cacheable, all_or_nothing):
+    """``_cached_lint`` for a budgeted scan — findings go into ``top``, never into one big dict.
+
+    ``lint_fn`` awaits ``flush({path: issues})`` for each batch it finishes;
+    the batch is ranked and cached right away (entries for units that
+    changed while linting are dropped again afterwards). Whatever it returns
+    is handled the same way at the end; with a ``cacheable`` check, results
+    are only cached then. Cache hits are read CACHE_READ_CHUNK units at a
+    time once the lint is over. Returns ``({}, ok)``.
+    """
+    cache = get_scan_cache() if version != 'unavailable' else None
+    hits = set()
+    if cache is not None:
+        hits = await asyncio.to_thread(cache.cached_paths, tool, version, config, units)
+    misses = sorted(p for p in units if p not in hits)
+    done = set()
+    written = {}
+
+    async def take(results: dict, store: bool):
+        results = {p: issues for p, issues in results.items() if p in units and p not in done}
+        done.update(results)
+        for path in sorted(results):
+            top.extend(results[path])
+        if store and cache is not None and results:
+            blobs = {p: units[p] for p in results}
+            await asyncio.to_thread(cache.put_many, tool, version, config, blobs, results)
+            written.update(blobs)
+
+    async def flush(results: dict):
+        await take(results, cacheable is None)
+
+    fresh = await lint_fn(misses, flush) if misses else {}
+    if fresh:
+        await take(fresh, cacheable is None or cacheable())
+    if cache is None:
+        return {}, fresh is not None
+
+    if fresh is not None or not all_or_nothing:
+        hit_paths = sorted(hits)
+        for i in range(0, len(hit_paths), CACHE_READ_CHUNK):
+            chunk = {p: units[p] for p in hit_paths[i:i + CACHE_READ_CHUNK]}
+            cached = await asyncio.to_thread(cache.get_many, tool, version, config, chunk)
+            for path in sorted(cached):
+                top.extend(cached[path])
+    if written and recheck:
+        current = await recheck()
+        stale = {p: h for p, h in written.items() if current.get(p) != h}
+        if stale:
+            await asyncio.to_thread(cache.forget_many, tool, version, config, stale)
+    if log_callback:
+        await log_callback(f"{label} cache: {len(hits)} hits, {len(misses)} misses.", "INFO")
+    return {}, fresh is not None
+
+
+async def _stream_lint(batch_outputs, parse_line, budget: int, on_timeout=None, flush=None):
+    """Consume ``(batch, lines)`` pairs from a batch runner, parsing lines as they arrive.
+
+    Linters print their findings grouped by file, so once ``budget`` is met
+    the current file is read to its end and the runner is closed — killing
+    the linter and skipping later batches. Returns ``{path: issues}`` holding
+    only files whose results are complete (clean files as ``[]`` when their
+    batch ran to the end).
+
+    If the runner times out and ``on_timeout`` is given, it is called and the
+    files finished so far are returned; otherwise TimeoutExpired propagates.
+    With ``flush``, each batch's finished files are awaited through it
+    instead of being collected, and ``{}`` is returned.
+    """
+    results = {}
+    found = 0
+    batch_results = {}
+    current = None
+    try:
+        async with aclosing(batch_outputs) as outputs:
+            async for batch, lines in outputs:
+                batch_results = {}
+                current = None
+                finished = True
+                async for line in lines:
+                    issue = parse_line(line)
+                    if issue is None:
+                        continue
+                    if issue['file'] != current:
+                        if found >= budget:
+                            finished = False
+                            break
+                        current = issue['file']
+                    batch_results.setdefault(current, []).append(issue)
+                    found += 1
+                finished_files = {p: [] for p in batch} if finished else {}
+                finished_files.update(batch_results)
+                batch_results = {}
+                if flush is not None:
+                    await flush(finished_files)
+                else:
+                    results.update(finished_files)
+                if found >= budget:
+                    break
+    except subprocess.TimeoutExpired:
+        if on_timeout is None:
+            raise
+        # The file being read when time ran out may be incomplete
+        batch_results.pop(current, None)
+        if flush is not None:
+            await flush(batch_results)
+        else:
+            results.update(batch_results)
+        on_timeout()
+    return results
+
+
+async def _tool_version(cmd: tuple, scheduler: ScanScheduler) -> str:
+    """``tool_version`` within the scan deadline — the probe's time comes out of the scan's budget."""
+    return await asyncio.to_thread(tool_version, cmd, scheduler.probe_timeout())
+
+
+async def _python_lint(tool: str, cli_cmd, worker_args: list, misses: list, parse_line,
+                       budget: int, repo_path: str, timeout: float, on_timeout=None, flush=None):
+    """Lint ``misses`` on the warm worker pool, or via the CLI when workers can't serve."""
+    if lint_workers.python_tool_available(tool):
+        batches = batched(misses, lint_workers.LINT_WORKER_BATCH_FILES)
+        try:
+            return await _stream_lint(
+                lint_workers.pooled_batches(tool, repo_path, worker_args, batches, timeout),
+                parse_line, budget, on_timeout, flush)
+        except BrokenProcessPool as e:
+            lint_workers.reset_lint_pool()
+            print(f"Lint workers crashed, running {tool} CLI: {e}")
+    return await _stream_lint(cli_batches(cli_cmd, batched(misses), repo_path, timeout),
+                              parse_line, budget, on_timeout, flush)
+
+
+async def _run_pattern_scan(scan_fn, file_index: RepoFileIndex, entries: list, budget: int, flush=None):
+    """Run a pattern scanner over ``entries`` — sharded across processes on big repos.
+
+    Small inputs stay in a single thread, where pool start-up and pickling
+    would cost more than the scan itself. With ``flush``, results are
+    awaited through it (per shard) and ``{}`` is returned in their place.
+    """
+    if budget <= 0:
+        return {}, Counter()
+    if should_shard(entries):
+        jobs = [(e, file_index.cached_kind(e)) for e in entries]
+        try:
+            return await run_sharded(scan_fn, file_index.repo_path, jobs, budget, flush)
+        except (BrokenProcessPool, OSError) as e:
+            print(f"Scan pool unavailable, scanning in-thread: {e}")
+
+    def _in_thread():
+        jobs = [(e, file_index.kind(e)) for e in entries]
+        return scan_fn(file_index.repo_path, jobs, budget)
+
+    results, skipped = await asyncio.to_thread(_in_thread)
+    if flush is not None:
+        await flush(results)
+        results = {}
+    return results, skipped
+
+
+# ─── Python Scanner ───────────────────────────────────────────────────
+
+
+def _parse_flake8_line(line: str):
+    if not line.strip():
+        return None
+    parts = line.split(':')
+    if len(parts) < 4:
+        return None
+    file_path = normalize_path(parts[0])
+    try:
+        line_num = int(parts[1])
+    except ValueError:
+        return None
+    message = ':'.join(parts[3:]).strip()
+    raw_code = message.split()[0] if message else ''
+
+    issue_type = "LINTING"
+    if "E999" in message or "SyntaxError" in message:
+        issue_type = "SYNTAX"
+    elif "F401" in message:
+        issue_type = "IMPORT"
+    elif "F821" in message or "F811" in message:
+        issue_type = "LOGIC"
+    elif "E711" in message or "E712" in message:
+        issue_type = "LOGIC"
+    elif "W" in raw_code:
+        issue_type = "WARNING"
+
+    severity = "error" if issue_type in ("SYNTAX", "LOGIC") else "warning"
 
     return {
-        "total_files": total_files,
-        "total_lines": total_lines,
-        "languages": distribution,
+        "file": file_path, "type": issue_type, "line": line_num,
+        "message": message, "raw": line, "severity": severity,
+        "rule_id": raw_code, "tool": "flake8",
+        "language": "python", "agent": "Python Agent"
     }
 
 
-# ─── Python Scanner ───────────────────────────────────────────────────
+def _parse_bandit_line(line: str):
+    parts = line.split('\t', 4)
+    if len(parts) < 5:
+        return None
+    try:
+        line_num = int(parts[1])
+    except ValueError:
+        return None
+    fp = normalize_path(parts[0])
+    return {
+        "file": fp,
+        "type": "SECURITY",
+        "line": line_num,
+        "message": parts[4].strip() or 'Security issue',
+        "raw": parts[2],
+        "severity": (parts[3] or 'MEDIUM').lower(),
+        "rule_id": parts[2],
+        "tool": "bandit",
+        "language": "python", "agent": "Security Agent"
+    }
+
 
+async def scan_python(repo_path: str, log_callback=None, file_index: RepoFileIndex = None,
+                      paths: set = None, budget: int = None, scheduler: ScanScheduler = None,
+                      top: TopK = None):
+    """Python Linting Agent — flake8 + bandit security scan.
 
-async def scan_python(repo_path: str, log_callback=None):
-    """Python Linting Agent — flake8 + bandit security scan."""
+    ``paths`` limits linting to those repo-relative files (incremental rescan).
+    Unchanged files are served from the scan cache. ``scheduler`` sets the
+    time each tool gets; a tool that runs over keeps the files it finished.
+    """
     if log_callback:
         await log_callback("[🐍 Python Agent] Initializing comprehensive analysis...", "INFO")
 
-    issues = []
-    has_py = any(
-        f.endswith('.py')
-        for root, _, files in os.walk(repo_path)
-        for f in files
-        if not any(skip in root for skip in SKIP_DIRS)
-    )
-    if not has_py:
+    if file_index is None:
+        file_index = RepoFileIndex(repo_path)
+    if scheduler is None:
+        scheduler = await asyncio.to_thread(ScanScheduler)
+    own_top = budget is not None and top is None
+    if own_top:
+        top = TopK(budget)
+    entries = _select(file_index.files(extensions={'.py'}), paths)
+    if not entries:
         if log_callback:
             await log_callback("[🐍 Python Agent] No Python files found. Skipping.", "INFO")
-        return issues
+        return []
+    blobs = await asyncio.to_thread(file_index.blob_hashes, entries)
+
+    async def rehash():
+        return await asyncio.to_thread(file_index.blob_hashes, entries)
 
     # ── flake8 ──
-    try:
-        result = await asyncio.to_thread(
-            subprocess.run,
-            ['flake8', '.', '--format=default', '--max-line-length=120',
-             '--statistics', '--count',
-             '--exclude=node_modules,.git,__pycache__,venv,dist,.venv,env'],
-            capture_output=True, text=True, cwd=repo_path, timeout=60
-        )
-        for line in result.stdout.splitlines():
-            if not line.strip():
-                continue
-            parts = line.split(':')
-            if len(parts) >= 4:
-                file_path = parts[0].replace('\\', '/').lstrip('./')
-                try:
-                    line_num = int(parts[1])
-                except ValueError:
-                    continue
-                message = ':'.join(parts[3:]).strip()
-                raw_code = message.split()[0] if message else ''
-
-                issue_type = "LINTING"
-                if "E999" in message or "SyntaxError" in message:
-                    issue_type = "SYNTAX"
-                elif "F401" in message:
-                    issue_type = "IMPORT"
-                elif "F821" in message or "F811" in message:
-                    issue_type = "LOGIC"
-                elif "E711" in message or "E712" in message:
-                    issue_type = "LOGIC"
-                elif "W" in raw_code:
-                    issue_type = "WARNING"
-
-                severity = "error" if issue_type in ("SYNTAX", "LOGIC") else "warning"
-
-                issues.append({
-                    "file": file_path, "type": issue_type, "line": line_num,
-                    "message": message, "raw": line, "severity": severity,
-                    "rule_id": raw_code, "tool": "flake8",
-                    "language": "python", "agent": "Python Agent"
-                })
-                if len(issues) >= MAX_ISSUES_PER_SCANNER:
-                    break
-    except subprocess.TimeoutExpired:
-        if log_callback:
-            await log_callback("[🐍 Python Agent] flake8 timed out.", "WARNING")
-    except FileNotFoundError:
-        if log_callback:
-            await log_callback("[🐍 Python Agent] flake8 not installed. Skipping.", "WARNING")
-    except Exception as e:
-        if log_callback:
-            await log_callback(f"[🐍 Python Agent] flake8 error: {str(e)[:100]}", "ERROR")
+    flake8_flags = ['--format=default', '--max-line-length=120',
+                    '--exclude=node_modules,.git,__pycache__,venv,dist,.venv,env']
+
+    async def _flake8(misses, flush):
+        try:
+            # bandit runs next over the same files, so leave it its share
+            timeout = scheduler.timeout('flake8', len(misses), then=[('bandit', len(misses))])
+            with scheduler.track('flake8', len(misses)):
+                return await _python_lint(
+                    'flake8', lambda batch: ['flake8', *batch, *flake8_flags, f'--jobs={LINT_JOBS}'],
+                    [*flake8_flags, '--jobs=1'], misses, _parse_flake8_line,
+                    _scan_limit(MAX_ISSUES_PER_SCANNER, budget), repo_path,
+                    timeout, lambda: scheduler.truncate('flake8'), flush)
+        except FileNotFoundError:
+            if log_callback:
+                await log_callback("[🐍 Python Agent] flake8 not installed. Skipping.", "WARNING")
+            return None
+        except Exception as e:
+            if log_callback:
+                await log_callback(f"[🐍 Python Agent] flake8 error: {str(e)[:100]}", "ERROR")
+            return None
+
+    flake8_results, _ = await _cached_lint(
+        'flake8', await _tool_version(('flake8', '--version'), scheduler),
+        _config_digest(file_index, FLAKE8_CONFIG_FILES, *flake8_flags),
+        blobs, _flake8, log_callback, "[🐍 Python Agent] flake8", rehash, top=top)
+    issues = _collect(flake8_results, MAX_ISSUES_PER_SCANNER, budget)
+    if 'flake8' in scheduler.truncated and log_callback:
+        await log_callback("[🐍 Python Agent] flake8 timed out — keeping results for the files it finished.",
+                           "WARNING")
 
     # ── bandit (security) ──
-    try:
-        bandit_result = await asyncio.to_thread(
-            subprocess.run,
-            ['bandit', '-r', '.', '-f', 'json', '-q',
-             '--exclude=node_modules,.git,__pycache__,venv,dist'],
-            capture_output=True, text=True, cwd=repo_path, timeout=60
-        )
-        if bandit_result.stdout.strip():
-            try:
-                bandit_data = json.loads(bandit_result.stdout)
-                for result_item in bandit_data.get('results', [])[:10]:
-                    fp = result_item.get('filename', '').replace('\\', '/').lstrip('./')
-                    issues.append({
-                        "file": fp,
-                        "type": "SECURITY",
-                        "line": result_item.get('line_number', 0),
-                        "message": result_item.get('issue_text', 'Security issue'),
-                        "raw": result_item.get('test_id', ''),
-                        "severity": result_item.get('issue_severity', 'MEDIUM').lower(),
-                        "rule_id": result_item.get('test_id', ''),
-                        "tool": "bandit",
-                        "language": "python", "agent": "Security Agent"
-                    })
-            except json.JSONDecodeError:
-                pass
-        if log_callback:
-            await log_callback("[🐍 Python Agent] bandit security scan complete.", "INFO")
-    except FileNotFoundError:
-        pass  # bandit not installed — skip silently
-    except Exception:
-        pass
+    # Targets come from the file index, already filtered — bandit's own
+    # excludes are substring tests ('dist' would drop src/distance.py), so
+    # only the ones the repo's config asks for are passed
+    bandit_config = await asyncio.to_thread(lint_workers.bandit_options, repo_path)
+    bandit_excludes = bandit_config.get('exclude', '')
+    bandit_flags = ['-f', 'custom', '--msg-template', BANDIT_MSG_TEMPLATE, '-q',
+                    f'--exclude={bandit_excludes}', *lint_workers.bandit_cli_flags(bandit_config)]
+
+    async def _bandit(misses, flush):
+        try:
+            with scheduler.track('bandit', len(misses)):
+                return await _python_lint(
+                    'bandit', lambda batch: ['bandit', *batch, *bandit_flags], [bandit_excludes, bandit_config],
+                    misses, _parse_bandit_line, _scan_limit(BANDIT_MAX_ISSUES, budget), repo_path,
+                    scheduler.timeout('bandit', len(misses)), lambda: scheduler.truncate('bandit'), flush)
+        except Exception:
+            return None  # bandit not installed or failed — skip silently
+
+    bandit_results, bandit_ok = await _cached_lint(
+        'bandit', await _tool_version(('bandit', '--version'), scheduler),
+        _config_digest(file_index, (*BANDIT_CONFIG_FILES, bandit_config.get('configfile', '.bandit')),
+                       *bandit_flags),
+        blobs, _bandit, log_callback, "[🐍 Python Agent] bandit", rehash, top=top)
+    issues.extend(_collect(bandit_results, BANDIT_MAX_ISSUES, budget))
+    if 'bandit' in scheduler.truncated and log_callback:
+        await log_callback("[🐍 Python Agent] bandit timed out — keeping results for the files it finished.",
+                           "WARNING")
+    elif bandit_ok and log_callback:
+        await log_callback("[🐍 Python Agent] bandit security scan complete.", "INFO")
 
     if log_callback:
-        await log_callback(f"[🐍 Python Agent] Complete — {len(issues)} issues found.", "INFO")
-    return issues
+        await log_callback(f"[🐍 Python Agent] Complete — {_found(issues, top, 'flake8', 'bandit')} issues found.",
+                           "INFO")
+    return top.issues() if own_top else issues
 
 
 # ─── JavaScript / TypeScript Scanner ──────────────────────────────────
 
 
-async def scan_javascript(repo_path: str, log_callback=None):
+def _js_pattern_scan_files(repo_path: str, jobs: list, budget: int):
+    """JS pattern rules over ``jobs`` — (FileEntry, kind or None) pairs.
+
+    Top-level so scan-pool workers can run it. Returns ``({path: issues},
+    skipped kinds)``; every file it got to is listed, clean ones as ``[]``,
+    and it stops after the file that fills ``budget``.
+    """
+    results = {}
+    found = 0
+    skipped = Counter()
+    for entry, kind in jobs:
+        filepath = os.path.join(repo_path, entry.path)
+        kind = kind or classify_file(filepath, entry.size)
+        rel_path = entry.path
+        issues = results[rel_path] = []
+        if kind not in SCANNABLE:
+            skipped[kind] += 1
+            continue
+        try:
+            for i, line in enumerate(iter_lines(filepath, entry.size), 1):
+                stripped = line.strip()
+                if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*'):
+                    continue
+                if 'console.log(' in stripped:
+                    issues.append({
+                        "file": rel_path, "type": "LINTING", "line": i,
+                        "message": "console.log() found — remove for production",
+                        "raw": "no-console", "severity": "warning",
+                        "rule_id": "no-console", "tool": "pattern",
+                        "language": "javascript", "agent": "JS/TS Agent"
+                    })
+                if re.match(r'^var\s+', stripped):
+                    issues.append({
+                        "file": rel_path, "type": "LINTING", "line": i,
+                        "message": "Use 'let' or 'const' instead of 'var'",
+                        "raw": "no-var", "severity": "warning",
+                        "rule_id": "no-var", "tool": "pattern",
+                        "language": "javascript", "agent": "JS/TS Agent"
+                    })
+                if re.search(r'[^=!<>]==[^=]', stripped):
+                    issues.append({
+                        "file": rel_path, "type": "LOGIC", "line": i,
+                        "message": "Use strict equality (===) instead of (==)",
+                        "raw": "eqeqeq", "severity": "error",
+                        "rule_id": "eqeqeq", "tool": "pattern",
+                        "language": "javascript", "agent": "JS/TS Agent"
+                    })
+                if stripped in ('debugger;', 'debugger'):
+                    issues.append({
+                        "file": rel_path, "type": "LINTING", "line": i,
+                        "message": "debugger statement — remove for production",
+                        "raw": "no-debugger", "severity": "error",
+                        "rule_id": "no-debugger", "tool": "pattern",
+                        "language": "javascript", "agent": "JS/TS Agent"
+                    })
+        except Exception:
+            del results[rel_path]
+            continue
+        found += len(issues)
+        if found >= budget:
+            break
+    return results, skipped
+
+
+def _parse_eslint_output(stdout: str, repo_path: str):
+    """ESLint JSON → ``{path: [issues]}``, or None if the output isn't ESLint JSON."""
+    stdout = stdout.strip()
+    if not stdout or not stdout.startswith('['):
+        return None
+    try:
+        eslint_data = json.loads(stdout)
+    except json.JSONDecodeError:
+        return None
+    return _eslint_issues(eslint_data, repo_path)
+
+
+def _eslint_issues(eslint_data: list, repo_path: str) -> dict:
+    results = {}
+    for file_result in eslint_data:
+        fp = file_result.get('filePath', '').replace('\\', '/')
+        # Make path relative
+        try:
+            fp = os.path.relpath(fp, repo_path).replace('\\', '/')
+        except ValueError:
+            pass
+        issues = results.setdefault(fp, [])
+        for msg in file_result.get('messages', []):
+            severity = 'error' if msg.get('severity', 1) == 2 else 'warning'
+            rule = msg.get('ruleId', '')
+            issue_type = 'LINTING'
+            if rule and ('no-unused' in rule):
+                issue_type = 'IMPORT'
+            elif rule and ('no-undef' in rule or 'no-redeclare' in rule):
+                issue_type = 'LOGIC'
+            elif msg.get('fatal', False):
+                issue_type = 'SYNTAX'
+
+            issues.append({
+                "file": fp, "type": issue_type,
+                "line": msg.get('line', 0),
+                "message": msg.get('message', ''),
+                "raw": rule, "severity": severity,
+                "rule_id": rule, "tool": "eslint",
+                "language": "javascript", "agent": "JS/TS Agent"
+            })
+    return results
+
+
+async def scan_javascript(repo_path: str, log_callback=None, file_index: RepoFileIndex = None,
+                          paths: set = None, budget: int = None, scheduler: ScanScheduler = None,
+                          top: TopK = None):
     """JS/TS Agent — tries ESLint first, falls back to pattern analysis."""
     if log_callback:
         await log_callback("[⚡ JS/TS Agent] Scanning JavaScript/TypeScript files...", "INFO")
 
-    issues = []
-
-    has_js = any(
-        f.endswith(('.js', '.jsx', '.ts', '.tsx'))
-        for root, _, files in os.walk(repo_path)
-        for f in files
-        if not any(skip in root for skip in SKIP_DIRS)
-    )
-    if not has_js:
+    if file_index is None:
+        file_index = RepoFileIndex(repo_path)
+    if scheduler is None:
+        scheduler = await asyncio.to_thread(ScanScheduler)
+    own_top = budget is not None and top is None
+    if own_top:
+        top = TopK(budget)
+    lint_entries = _select(file_index.files(extensions=set(JS_EXTS)), paths)
+    if not lint_entries:
         if log_callback:
             await log_callback("[⚡ JS/TS Agent] No JS/TS files found. Skipping.", "INFO")
-        return issues
+        return []
 
     # ── Try ESLint first ──
-    eslint_success = False
-    try:
-        # Check if eslint is available (global or local)
-        npx_cmd = 'npx.cmd' if os.name == 'nt' else 'npx'
-        eslint_result = await asyncio.to_thread(
-            subprocess.run,
-            [npx_cmd, '--yes', 'eslint', '.', '-f', 'json', '--no-error-on-unmatched-pattern',
-             '--ignore-pattern', 'node_modules', '--ignore-pattern', 'dist', '--ignore-pattern', 'build'],
-            capture_output=True, text=True, cwd=repo_path, timeout=90
-        )
-        stdout = eslint_result.stdout.strip()
-        if stdout and stdout.startswith('['):
+    npx_cmd = 'npx.cmd' if os.name == 'nt' else 'npx'
+    eslint_flags = ['-f', 'json', '--no-error-on-unmatched-pattern']
+    for pattern in ESLINT_IGNORE_PATTERNS:
+        eslint_flags += ['--ignore-pattern', pattern]
+    blobs = await asyncio.to_thread(file_index.blob_hashes, lint_entries)
+    # No npx (or offline): the worker may still find the repo's own ESLint, but the CLI is skipped
+    eslint_version = await _tool_version((npx_cmd, '--yes', 'eslint', '--version'), scheduler)
+
+    async def rehash():
+        return await asyncio.to_thread(file_index.blob_hashes, lint_entries)
+
+    async def _eslint(misses, flush):
+        targets = _lint_targets(misses, blobs, paths)
+        loop = asyncio.get_running_loop()
+        timeout = scheduler.timeout('eslint', len(misses))
+        ends = loop.time() + timeout
+        worker = lint_workers.get_eslint_worker(repo_path)
+        with scheduler.track('eslint', len(misses)):
+            if worker is not None:
+                # No command line to overflow: always the indexed files, never '.',
+                # so ESLint doesn't walk into .gitignore'd output
+                try:
+                    eslint_data = await asyncio.to_thread(
+                        worker.lint, repo_path, misses, ESLINT_IGNORE_PATTERNS, timeout)
+                except asyncio.CancelledError:
+                    worker.abort()  # stopped at the deadline — don't leave Node linting
+                    raise
+                if eslint_data is not None:
+                    results = {p: [] for p in misses}
+                    results.update(_eslint_issues(eslint_data, repo_path))
+                    return results
+            if eslint_version == 'unavailable':
+                return None
+            # The CLI fallback gets whatever the worker left of the allotment
+            if ends - loop.time() <= 0:
+                scheduler.truncate('eslint')
+                return None
             try:
-                eslint_data = json.loads(stdout)
-                for file_result in eslint_data:
-                    fp = file_result.get('filePath', '').replace('\\', '/')
-                    # Make path relative
-                    try:
-                        fp = os.path.relpath(fp, repo_path).replace('\\', '/')
-                    except ValueError:
-                        pass
-                    for msg in file_result.get('messages', []):
-                        severity = 'error' if msg.get('severity', 1) == 2 else 'warning'
-                        rule = msg.get('ruleId', '')
-                        issue_type = 'LINTING'
-                        if rule and ('no-unused' in rule):
-                            issue_type = 'IMPORT'
-                        elif rule and ('no-undef' in rule or 'no-redeclare' in rule):
-                            issue_type = 'LOGIC'
-                        elif msg.get('fatal', False):
-                            issue_type = 'SYNTAX'
-
-                        issues.append({
-                            "file": fp, "type": issue_type,
-                            "line": msg.get('line', 0),
-                            "message": msg.get('message', ''),
-                            "raw": rule, "severity": severity,
-                            "rule_id": rule, "tool": "eslint",
-                            "language": "javascript", "agent": "JS/TS Agent"
-                        })
-                        if len(issues) >= MAX_ISSUES_PER_SCANNER:
-                            break
-                    if len(issues) >= MAX_ISSUES_PER_SCANNER:
-                        break
-                eslint_success = True
-                if log_callback:
-                    await log_callback(f"[⚡ JS/TS Agent] ESLint analysis — {len(issues)} issues.", "INFO")
-            except json.JSONDecodeError:
-                pass
-    except Exception:
-        pass
+                eslint_result = await run_command(
+                    [npx_cmd, '--yes', 'eslint', *targets, *eslint_flags], repo_path, ends - loop.time())
+            except subprocess.TimeoutExpired:
+                scheduler.truncate('eslint')
+                return None
+            except Exception:
+                return None
+        parsed = _parse_eslint_output(eslint_result.stdout, repo_path)
+        if parsed is None:
+            return None
+        results = {p: [] for p in misses}
+        results.update(parsed)
+        return results
+
+    eslint_results, eslint_success = await _cached_lint(
+        'eslint', eslint_version,
+        _config_digest(file_index, ESLINT_CONFIG_FILES, *eslint_flags),
+        blobs, _eslint, log_callback, "[⚡ JS/TS Agent] ESLint", rehash, top=top, all_or_nothing=True)
+    issues = []
+    if eslint_success:
+        issues = _collect(eslint_results, MAX_ISSUES_PER_SCANNER, budget)
+        if log_callback:
+            await log_callback(f"[⚡ JS/TS Agent] ESLint analysis — {_found(issues, top, 'eslint')} issues.",
+                               "INFO")
 
     # ── Fallback: Pattern-based scanning ──
     if not eslint_success:
         if log_callback:
-            await log_callback("[⚡ JS/TS Agent] ESLint unavailable. Using pattern analysis...", "INFO")
+            reason = "timed out" if 'eslint' in scheduler.truncated else "unavailable"
+            await log_callback(f"[⚡ JS/TS Agent] ESLint {reason}. Using pattern analysis...", "INFO")
 
-        def _pattern_scan():
-            for root, dirs, files in os.walk(repo_path):
-                dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-                for filename in files:
-                    if not filename.endswith(('.js', '.jsx', '.ts', '.tsx')):
-                        continue
-                    if filename.endswith(('.min.js', '.bundle.js', '.config.js', '.config.ts',
-                                         '.config.cjs', '.config.mjs')):
-                        continue
-                    filepath = os.path.join(root, filename)
-                    rel_path = os.path.relpath(filepath, repo_path).replace('\\', '/')
-                    try:
-                        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                            lines = f.readlines()
-                        for i, line in enumerate(lines, 1):
-                            stripped = line.strip()
-                            if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*'):
-                                continue
-                            if 'console.log(' in stripped:
-                                issues.append({
-                                    "file": rel_path, "type": "LINTING", "line": i,
-                                    "message": "console.log() found — remove for production",
-                                    "raw": "no-console", "severity": "warning",
-                                    "rule_id": "no-console", "tool": "pattern",
-                                    "language": "javascript", "agent": "JS/TS Agent"
-                                })
-                            if re.match(r'^var\s+', stripped):
-                                issues.append({
-                                    "file": rel_path, "type": "LINTING", "line": i,
-                                    "message": "Use 'let' or 'const' instead of 'var'",
-                                    "raw": "no-var", "severity": "warning",
-                                    "rule_id": "no-var", "tool": "pattern",
-                                    "language": "javascript", "agent": "JS/TS Agent"
-                                })
-                            if re.search(r'[^=!<>]==[^=]', stripped):
-                                issues.append({
-                                    "file": rel_path, "type": "LOGIC", "line": i,
-                                    "message": "Use strict equality (===) instead of (==)",
-                                    "raw": "eqeqeq", "severity": "error",
-                                    "rule_id": "eqeqeq", "tool": "pattern",
-                                    "language": "javascript", "agent": "JS/TS Agent"
-                                })
-                            if stripped in ('debugger;', 'debugger'):
-                                issues.append({
-                                    "file": rel_path, "type": "LINTING", "line": i,
-                                    "message": "debugger statement — remove for production",
-                                    "raw": "no-debugger", "severity": "error",
-                                    "rule_id": "no-debugger", "tool": "pattern",
-                                    "language": "javascript", "agent": "JS/TS Agent"
-                                })
-                            if len(issues) >= MAX_ISSUES_PER_SCANNER:
-                                return
-                    except Exception:
-                        continue
+        entries = {
+            e.path: e for e in lint_entries
+            if not e.path.endswith(('.config.js', '.config.ts', '.config.cjs', '.config.mjs'))
+        }
+        pattern_blobs = {p: b for p, b in blobs.items() if p in entries}
+
+        async def _patterns(misses, flush):
+            with scheduler.track('js-pattern', len(misses)):
+                results, _ = await _run_pattern_scan(
+                    _js_pattern_scan_files, file_index, [entries[p] for p in misses],
+                    _scan_limit(MAX_ISSUES_PER_SCANNER, budget), flush)
+            return results
 
-        await asyncio.to_thread(_pattern_scan)
+        pattern_results, _ = await _cached_lint(
+            'js-pattern', JS_PATTERN_VERSION, CLASSIFIER_VERSION,
+            pattern_blobs, _patterns, log_callback, "[⚡ JS/TS Agent] Pattern", rehash, top=top)
+        issues = _collect(pattern_results, MAX_ISSUES_PER_SCANNER, budget)
 
     if log_callback:
-        await log_callback(f"[⚡ JS/TS Agent] Complete — {len(issues)} issues found.", "INFO")
-    return issues
+        await log_callback(f"[⚡ JS/TS Agent] Complete — {_found(issues, top, 'eslint', 'pattern')} issues found.",
+                           "INFO")
+    return top.issues() if own_top else issues
 
 
 # ─── Go Scanner ───────────────────────────────────────────────────────
 
+GO_LINE_RE = re.compile(r'^(.+\.go):(\d+):(\d+)?:?\s*(.*)')
 
-async def scan_go(repo_path: str, log_callback=None):
-    """Go Agent — uses go vet + staticcheck if available."""
-    if log_callback:
-        await log_callback("[🔵 Go Agent] Scanning Go files...", "INFO")
 
+def _go_package(path: str) -> str:
+    return os.path.dirname(normalize_path(path))
+
+
+def _parse_go_output(output: str, issue_type: str, severity: str, rule_id: str, tool: str) -> list:
     issues = []
-    has_go = any(
-        f.endswith('.go')
-        for root, _, files in os.walk(repo_path)
-        for f in files
-        if not any(skip in root for skip in SKIP_DIRS)
-    )
-    if not has_go:
-        if log_callback:
-            await log_callback("[🔵 Go Agent] No Go files found. Skipping.", "INFO")
-        return issues
+    for line in output.splitlines():
+        if not line.strip() or line.startswith('#'):
+            continue
+        # Format: path/file.go:line:col: message
+        match = GO_LINE_RE.match(line)
+        if match:
+            issues.append({
+                "file": normalize_path(match.group(1)), "type": issue_type,
+                "line": int(match.group(2)), "message": match.group(4).strip(),
+                "raw": line, "severity": severity,
+                "rule_id": rule_id, "tool": tool,
+                "language": "go", "agent": "Go Agent"
+            })
+    return issues
+
 
-    # ── go vet ──
+def _go_changed_since(repo_path: str, base: str, file_index: RepoFileIndex):
+    """Every .go file in a package that has a .go file changed since ``base``, or None if git can't tell."""
     try:
-        vet_result = await asyncio.to_thread(
-            subprocess.run,
-            ['go', 'vet', './...'],
-            capture_output=True, text=True, cwd=repo_path, timeout=60
+        result = subprocess.run(
+            ['git', 'diff', '--name-only', '--relative', base, '--', '*.go'],
+            capture_output=True, text=True, cwd=repo_path, timeout=30
         )
-        output = vet_result.stderr + '\n' + vet_result.stdout
-        for line in output.splitlines():
-            if not line.strip() or line.startswith('#'):
-                continue
-            # Format: path/file.go:line:col: message
-            match = re.match(r'^(.+\.go):(\d+):(\d+)?:?\s*(.*)', line)
-            if match:
-                fp = match.group(1).replace('\\', '/').lstrip('./')
-                issues.append({
-                    "file": fp, "type": "LOGIC", "line": int(match.group(2)),
-                    "message": match.group(4).strip(),
-                    "raw": line, "severity": "error",
-                    "rule_id": "go-vet", "tool": "go vet",
-                    "language": "go", "agent": "Go Agent"
-                })
-                if len(issues) >= MAX_ISSUES_PER_SCANNER:
-                    break
-        if log_callback:
-            await log_callback(f"[🔵 Go Agent] go vet — {len(issues)} issues.", "INFO")
-    except FileNotFoundError:
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    changed = {normalize_path(p) for p in result.stdout.splitlines() if p.strip()}
+    return _expand_changed(changed, file_index) if changed else set()
+
+
+async def _run_go_tool(cmd: list, repo_path: str, timeout: float):
+    return await run_command(cmd, repo_path, timeout, env=go_env())
+
+
+async def scan_go(repo_path: str, log_callback=None, file_index: RepoFileIndex = None,
+                  paths: set = None, budget: int = None, scheduler: ScanScheduler = None,
+                  top: TopK = None):
+    """Go Agent — uses go vet + staticcheck if available.
+
+    With ``paths``, only the packages containing those files are analysed;
+    GO_CHANGED_BASE applies the same narrowing to full scans. Both tools run
+    concurrently against the shared build/module caches, and results are
+    cached per package (digest of all its .go files).
+    """
+    if log_callback:
+        await log_callback("[🔵 Go Agent] Scanning Go files...", "INFO")
+
+    if file_index is None:
+        file_index = RepoFileIndex(repo_path)
+    if scheduler is None:
+        scheduler = await asyncio.to_thread(ScanScheduler)
+    own_top = budget is not None and top is None
+    if own_top:
+        top = TopK(budget)
+    if paths is None and GO_CHANGED_BASE:
+        paths = await asyncio.to_thread(_go_changed_since, repo_path, GO_CHANGED_BASE, file_index)
+        if paths is not None and log_callback:
+            await log_callback(
+                f"[🔵 Go Agent] Limiting analysis to {len(paths)} files in packages changed "
+                f"since {GO_CHANGED_BASE}.", "INFO")
+    entries = _select(file_index.files(extensions={'.go'}), paths)
+    if not entries:
         if log_callback:
-            await log_callback("[🔵 Go Agent] Go not installed. Skipping.", "WARNING")
-        return issues
-    except Exception as e:
+            await log_callback("[🔵 Go Agent] No Go files found. Skipping.", "INFO")
+        return []
+
+    async def package_hashes():
+        file_blobs = await asyncio.to_thread(file_index.blob_hashes, entries)
+        by_package = {}
+        for path, blob in sorted(file_blobs.items()):
+            by_package.setdefault(_go_package(path), []).append(f"{path}:{blob}")
+        return {pkg: digest(*blobs) for pkg, blobs in by_package.items()}
+
+    packages = await package_hashes()
+
+    async def _vet(misses, flush):
+        targets = _lint_targets([f"./{p}" if p else '.' for p in misses], packages, paths, './...')
+        results = {p: [] for p in misses}
+        timeout = scheduler.timeout('go', len(misses))
+        # go vet and staticcheck share the build cache, so run them side by side
+        with scheduler.track('go', len(misses)):
+            vet_run, sc_run = await asyncio.gather(
+                _run_go_tool(['go', 'vet', *targets], repo_path, timeout),
+                _run_go_tool(['staticcheck', *targets], repo_path, timeout),
+                return_exceptions=True,
+            )
+            if isinstance(vet_run, subprocess.TimeoutExpired):
+                scheduler.truncate('go')
+            if isinstance(sc_run, subprocess.TimeoutExpired):
+                scheduler.truncate('staticcheck')
+
+        # ── go vet ──
+        if isinstance(vet_run, FileNotFoundError):
+            if log_callback:
+                await log_callback("[🔵 Go Agent] Go not installed. Skipping.", "WARNING")
+            return None
+        if isinstance(vet_run, subprocess.TimeoutExpired):
+            if log_callback:
+                await log_callback("[🔵 Go Agent] go vet timed out.", "WARNING")
+            return None
+        if isinstance(vet_run, Exception):
+            if log_callback:
+                await log_callback(f"[🔵 Go Agent] go vet error: {str(vet_run)[:80]}", "WARNING")
+            return None
+        vet_issues = _parse_go_output(vet_run.stderr + '\n' + vet_run.stdout,
+                                      "LOGIC", "error", "go-vet", "go vet")
+        for issue in vet_issues:
+            results.setdefault(_go_package(issue['file']), []).append(issue)
         if log_callback:
-            await log_callback(f"[🔵 Go Agent] go vet error: {str(e)[:80]}", "WARNING")
+            await log_callback(f"[🔵 Go Agent] go vet — {len(vet_issues)} issues.", "INFO")
 
-    # ── staticcheck (if available) ──
-    try:
-        sc_result = await asyncio.to_thread(
-            subprocess.run,
-            ['staticcheck', './...'],
-            capture_output=True, text=True, cwd=repo_path, timeout=60
-        )
-        for line in sc_result.stdout.splitlines():
-            match = re.match(r'^(.+\.go):(\d+):(\d+)?:?\s*(.*)', line)
-            if match:
-                fp = match.group(1).replace('\\', '/').lstrip('./')
-                issues.append({
-                    "file": fp, "type": "LINTING", "line": int(match.group(2)),
-                    "message": match.group(4).strip(),
-                    "raw": line, "severity": "warning",
-                    "rule_id": "staticcheck", "tool": "staticcheck",
-                    "language": "go", "agent": "Go Agent"
-                })
-                if len(issues) >= MAX_ISSUES_PER_SCANNER:
-                    break
-    except FileNotFoundError:
-        pass  # staticcheck not installed — skip silently
-    except Exception:
-        pass
+        # ── staticcheck (if available — missing or failing is skipped silently) ──
+        if not isinstance(sc_run, Exception):
+            for issue in _parse_go_output(sc_run.stdout, "LINTING", "warning",
+                                          "staticcheck", "staticcheck"):
+                results.setdefault(_go_package(issue['file']), []).append(issue)
+        return results
+
+    go_version, sc_version = await asyncio.gather(
+        _tool_version(('go', 'version'), scheduler),
+        _tool_version(('staticcheck', '-version'), scheduler),
+    )
+    results, ok = await _cached_lint(
+        'go', go_version if go_version == 'unavailable' else f"{go_version}|{sc_version}",
+        _config_digest(file_index, GO_CONFIG_FILES),
+        packages, _vet, log_callback, "[🔵 Go Agent] go vet/staticcheck", package_hashes,
+        cacheable=lambda: 'staticcheck' not in scheduler.truncated, top=top)
+    issues = _collect(results, MAX_ISSUES_PER_SCANNER, budget)
+    if ok:
+        schedule_prune()
 
     if log_callback:
-        await log_callback(f"[🔵 Go Agent] Complete — {len(issues)} issues found.", "INFO")
-    return issues
+        await log_callback(f"[🔵 Go Agent] Complete — {_found(issues, top, 'go vet', 'staticcheck')} issues found.",
+                           "INFO")
+    return top.issues() if own_top else issues
 
 
 # ─── Security Scanner ─────────────────────────────────────────────────
 
 
-async def scan_security(repo_path: str, log_callback=None):
-    """Security Agent — Scans all languages for common vulnerabilities."""
+def _security_scan_files(repo_path: str, jobs: list, budget: int):
+    """Security rules over ``jobs`` — (FileEntry, kind or None) pairs.
+
+    Top-level so scan-pool workers can run it. Returns ``({path: issues},
+    skipped kinds)``; every file it got to is listed, clean ones as ``[]``,
+    and it stops after the file that fills ``budget``.
+    """
+    results = {}
+    found = 0
+    skipped = Counter()
+    for entry, kind in jobs:
+        filepath = os.path.join(repo_path, entry.path)
+        kind = kind or classify_file(filepath, entry.size)
+        issues = results[entry.path] = []
+        if kind not in SCANNABLE:
+            skipped[kind] += 1
+            continue
+        first_line = 1
+        try:
+            # Chunks end on line boundaries; large files are mmap-streamed
+            for text in iter_text_chunks(filepath, entry.size):
+                for line_no, rule in DEFAULT_ENGINE.scan_text(text, entry.ext, first_line):
+                    issues.append({
+                        "file": entry.path, "type": "SECURITY", "line": line_no,
+                        "message": rule.message, "raw": "security", "severity": rule.severity,
+                        "rule_id": rule.rule_id, "tool": "security-scanner",
+                        "language": entry.ext.lstrip('.'), "agent": "Security Agent"
+                    })
+                first_line += text.count('\n')
+        except Exception:
+            del results[entry.path]
+            continue
+        found += len(issues)
+        if found >= budget:
+            break
+    return results, skipped
+
+
+async def scan_security(repo_path: str, log_callback=None, file_index: RepoFileIndex = None,
+                        paths: set = None, budget: int = None, scheduler: ScanScheduler = None,
+                        top: TopK = None):
+    """Security Agent — Scans all languages for common vulnerabilities.
+
+    With a ``budget``, findings go into ``top`` (the scan's shared TopK) and
+    the returned list is empty; without a ``top`` one is made for the call.
+    """
     if log_callback:
         await log_callback("[🔒 Security Agent] Scanning for vulnerabilities...", "INFO")
-    issues = []
+    if file_index is None:
+        file_index = RepoFileIndex(repo_path)
+    if scheduler is None:
+        scheduler = await asyncio.to_thread(ScanScheduler)
+    own_top = budget is not None and top is None
+    if own_top:
+        top = TopK(budget)
+    entries = {e.path: e for e in _select(
+        file_index.files(extensions=SECURITY_EXTS, include_skipped=True), paths)}
+    blobs = await asyncio.to_thread(file_index.blob_hashes, entries.values())
 
-    secret_patterns = [
-        (r'(?i)(api[_-]?key|apikey)\s*[=:]\s*["\'][A-Za-z0-9_\-]{16,}', "Potential hardcoded API key"),
-        (r'(?i)(secret|password|passwd)\s*[=:]\s*["\'][^"\']{8,}', "Potential hardcoded secret"),
-        (r'(?i)(access[_-]?token|auth[_-]?token)\s*[=:]\s*["\'][A-Za-z0-9_\-]{16,}', "Hardcoded access token"),
-        (r'(?i)(private[_-]?key)\s*[=:]\s*["\']', "Potential private key exposure"),
-    ]
-    code_patterns = [
-        (r'\beval\s*\(', "eval() usage — code injection risk", ['.js', '.jsx', '.ts', '.tsx', '.py']),
-        (r'\.innerHTML\s*=', "innerHTML assignment — XSS risk", ['.js', '.jsx', '.ts', '.tsx']),
-        (r'(?i)exec\s*\(', "exec() usage — potential injection risk", ['.py']),
-        (r'subprocess\.call\(.+shell\s*=\s*True', "Shell injection risk (shell=True)", ['.py']),
-    ]
-
-    def _scan():
-        for root, dirs, files in os.walk(repo_path):
-            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-            for filename in files:
-                ext = os.path.splitext(filename)[1].lower()
-                if ext not in ['.py', '.js', '.jsx', '.ts', '.tsx', '.go', '.env', '.rb', '.php']:
-                    continue
-                if filename in ('package-lock.json', 'yarn.lock', 'pnpm-lock.yaml'):
-                    continue
-                filepath = os.path.join(root, filename)
-                rel_path = os.path.relpath(filepath, repo_path).replace('\\', '/')
-                try:
-                    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                        lines = f.readlines()
-                    for i, line in enumerate(lines, 1):
-                        stripped = line.strip()
-                        if stripped.startswith('//') or stripped.startswith('#'):
-                            continue
-                        if "r'" in stripped or 'r"' in stripped or '\\b' in stripped:
-                            continue
-                        if stripped.startswith('import ') or stripped.startswith('from '):
-                            continue
-                        if '# noqa' in stripped or '# [AI-AGENT]' in stripped:
-                            continue
-                        for pattern, message in secret_patterns:
-                            if re.search(pattern, stripped):
-                                if any(p in stripped.lower() for p in
-                                       ['placeholder', 'example', 'your_', 'xxx', 'test', 'mock', 'sample']):
-                                    continue
-                                issues.append({
-                                    "file": rel_path, "type": "SECURITY", "line": i,
-                                    "message": message, "raw": "security", "severity": "high",
-                                    "rule_id": "hardcoded-secret", "tool": "security-scanner",
-                                    "language": ext.lstrip('.'), "agent": "Security Agent"
-                                })
-                        for pattern, message, valid_exts in code_patterns:
-                            if ext in valid_exts and re.search(pattern, stripped):
-                                issues.append({
-                                    "file": rel_path, "type": "SECURITY", "line": i,
-                                    "message": message, "raw": "security", "severity": "medium",
-                                    "rule_id": "dangerous-function", "tool": "security-scanner",
-                                    "language": ext.lstrip('.'), "agent": "Security Agent"
-                                })
-                        if len(issues) >= MAX_ISSUES_PER_SCANNER:
-                            return
-                except Exception:
-                    continue
+    async def rehash():
+        return await asyncio.to_thread(file_index.blob_hashes, entries.values())
+    skipped = Counter()
+
+    async def _scan(misses, flush):
+        with scheduler.track('security', len(misses)):
+            results, miss_skipped = await _run_pattern_scan(
+                _security_scan_files, file_index, [entries[p] for p in misses],
+                _scan_limit(MAX_ISSUES_PER_SCANNER, budget), flush)
+        skipped.update(miss_skipped)
+        return results
+
+    results, _ = await _cached_lint(
+        'security', SECURITY_RULES_VERSION, CLASSIFIER_VERSION,
+        blobs, _scan, log_callback, "[🔒 Security Agent]", rehash, top=top)
+    issues = _collect(results, MAX_ISSUES_PER_SCANNER, budget)
 
-    await asyncio.to_thread(_scan)
     if log_callback:
-        await log_callback(f"[🔒 Security Agent] Complete — {len(issues)} potential issues.", "INFO")
-    return issues
+        if skipped:
+            summary = ", ".join(f"{v} {k}" for k, v in skipped.most_common())
+            await log_callback(f"[🔒 Security Agent] Skipped files: {summary}.", "INFO")
+        await log_callback(f"[🔒 Security Agent] Complete — "
+                           f"{_found(issues, top, 'security-scanner')} potential issues.", "INFO")
+    return top.issues() if own_top else issues
 
 
 # ─── Master Scanner ───────────────────────────────────────────────────
 
 
-async def scan_repository(repo_path: str, log_callback=None):
-    """Run all scanning agents in parallel. Returns (issues, language_stats)."""
-    # First, detect languages
-    lang_stats = await asyncio.to_thread(detect_languages, repo_path)
+def is_truncated(issues: list, budget: int = None) -> bool:
+    """True if any scanner stopped at its issue cap, i.e. findings may be missing.
+
+    Under a global ``budget``, a full budget means lower-ranked findings were
+    dropped; a ScanResult whose tools ran out of time is always truncated.
+    """
+    if getattr(issues, 'truncated', None):
+        return True
+    if budget is not None:
+        return len(issues) >= budget
+    per_scanner = Counter(
+        i.get('tool') if i.get('tool') in ('bandit', 'security-scanner') else i.get('agent')
+        for i in issues
+    )
+    return any(
+        count >= (BANDIT_MAX_ISSUES if key == 'bandit' else MAX_ISSUES_PER_SCANNER)
+        for key, count in per_scanner.items()
+    )
+
+
+def _expand_changed(changed_paths, file_index: RepoFileIndex) -> set:
+    """Changed files plus every Go file sharing a package with one of them.
+
+    go vet / staticcheck report per package, so a rescan of one file
+    re-reports its siblings — they must not be carried over as well.
+    """
+    changed = {normalize_path(p) for p in changed_paths}
+    go_dirs = {os.path.dirname(p) for p in changed if p.endswith('.go')}
+    if go_dirs:
+        changed |= {
+            e.path for e in file_index.files(extensions={'.go'})
+            if os.path.dirname(e.path) in go_dirs
+        }
+    return changed
+
+
+async def scan_repository(repo_path: str, log_callback=None, file_index: RepoFileIndex = None,
+                          changed_paths=None, previous_issues: list = None, budget: int = None,
+                          deadline: float = SCAN_DEADLINE):
+    """Run all scanning agents in parallel. Returns the unified issue list.
+
+    Pass the run's shared ``file_index`` so every agent queries the same
+    snapshot instead of walking the tree again.
+
+    Incremental mode: given ``changed_paths`` (files rewritten since the last
+    scan) and that scan's ``previous_issues``, only the changed files are
+    re-linted and the findings for untouched files are carried over. Falls
+    back to a full scan if the previous result hit a scanner's issue cap.
+
+    Findings reported by more than one agent (same file, line and
+    normalised rule) are kept once.
+
+    Budgeted mode: with a ``budget``, the per-scanner caps are replaced by one
+    repo-wide selection — every agent scans all of its files and the best
+    ``budget`` findings by severity, type and file priority are returned,
+    best first.
+
+    ``deadline`` bounds the whole scan in seconds (0 for the fixed per-tool
+    timeouts). Returns a ScanResult; its ``truncated`` set names the tools
+    or agents that ran out of time and left files unchecked.
+    """
+    scheduler = await asyncio.to_thread(ScanScheduler, deadline)
+    top = TopK(budget) if budget is not None else None
+    results = {}
+    async for order, issues in _scan_stream(repo_path, log_callback, file_index,
+                                            changed_paths, previous_issues, budget, scheduler, top):
+        results[order] = issues
+    store = IssueStore()
+    for order in sorted(results):
+        store.extend(results[order])
+    return await _finish(store, budget, scheduler, log_callback, top)
 
+
+async def iter_scan_repository(repo_path: str, log_callback=None, file_index: RepoFileIndex = None,
+                               changed_paths=None, previous_issues: list = None, budget: int = None,
+                               deadline: float = SCAN_DEADLINE):
+    """Async-generator form of ``scan_repository``.
+
+    Yields each agent's issue list the moment that agent finishes, so the
+    fixer can start on security/flake8 findings while ESLint is still
+    running. Carried-over findings of an incremental rescan come first.
+    A finding already yielded by another agent is not yielded again.
+    Closing the generator early cancels the agents still running.
+
+    With a ``budget`` the agents push their findings into one shared TopK as
+    they go; the best are only known once every agent has finished, so a
+    single ranked batch is yielded at the end.
+    Batches are ScanResults carrying the tools that ran out of time so far.
+    """
+    scheduler = await asyncio.to_thread(ScanScheduler, deadline)
+    top = TopK(budget) if budget is not None else None
+    store = IssueStore()
+    async for _, issues in _scan_stream(repo_path, log_callback, file_index,
+                                        changed_paths, previous_issues, budget, scheduler, top):
+        added = store.extend(issues)
+        if budget is None:
+            yield ScanResult(added, scheduler.truncated)
+    selected = await _finish(store, budget, scheduler, log_callback, top)
+    if budget is not None:
+        yield selected
+    elif scheduler.truncated:
+        # Agents stopped at the deadline never reported — pass on the marker alone
+        yield ScanResult((), scheduler.truncated)
+
+
+async def _scan_stream(repo_path, log_callback, file_index, changed_paths, previous_issues,
+                       budget, scheduler, top=None):
+    """Yield ``(order, issues)`` per agent in completion order; ``order`` is the gather order.
+
+    Under a budget the agents push into ``top`` and yield empty lists; the
+    carried-over findings are still yielded.
+
+    Agents still running DEADLINE_GRACE seconds after the scheduler's
+    deadline are cancelled and recorded as truncated.
+    """
+    if file_index is None:
+        file_index = await asyncio.to_thread(RepoFileIndex, repo_path)
+
+    incremental = changed_paths is not None and previous_issues is not None
+    if incremental and is_truncated(previous_issues, budget):
+        incremental = False
+        if log_callback:
+            await log_callback(
+                "[📊 Scanner] Previous scan hit an issue cap — running a full rescan.", "INFO")
+
+    if incremental:
+        carried, tasks = await _incremental_tasks(repo_path, log_callback, file_index,
+                                                  changed_paths, previous_issues, budget, scheduler, top)
+        if carried:
+            yield 0, carried
+    else:
+        tasks = await _full_scan_tasks(repo_path, log_callback, file_index, budget, scheduler, top)
+
+    futures = {asyncio.ensure_future(coro): (order, name) for order, (name, coro) in enumerate(tasks, 1)}
+    pending = set(futures)
+    try:
+        while pending:
+            remaining = scheduler.remaining()
+            done, pending = await asyncio.wait(
+                pending, timeout=None if remaining is None else remaining + DEADLINE_GRACE,
+                return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                names = sorted(futures[fut][1] for fut in pending)
+                for name in names:
+                    scheduler.truncate(f"{name} agent")
+                if log_callback:
+                    await log_callback(
+                        f"[⏱️ Scheduler] Scan deadline passed — stopping: {', '.join(names)}.", "WARNING")
+                break
+            for fut in sorted(done, key=lambda f: futures[f][0]):
+                yield futures[fut][0], fut.result()
+    finally:
+        for fut in pending:
+            fut.cancel()
+        # Let the cancelled agents kill their linters before the scan returns
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _full_scan_tasks(repo_path, log_callback, file_index, budget, scheduler, top=None):
+    # First, detect languages
+    lang_stats = await asyncio.to_thread(detect_languages, repo_path, file_index)
     if log_callback:
         langs = lang_stats.get("languages", {})
         lang_summary = ", ".join(
@@ -508,40 +1109,92 @@ async def scan_repository(repo_path: str, log_callback=None):
     # Determine which scanners to run based on detected languages
     detected = set(lang_stats.get("languages", {}).keys())
     tasks = []
-    agent_names = []
+    # Predicted work per agent, for the scheduler's plan
+    work = {}
 
     # Always run security scanner
-    tasks.append(scan_security(repo_path, log_callback))
-    agent_names.append("Security")
+    tasks.append(("Security", scan_security(repo_path, log_callback, file_index,
+                                            budget=budget, scheduler=scheduler, top=top)))
+    work["Security"] = [('security', len(file_index.files(extensions=SECURITY_EXTS, include_skipped=True)))]
 
     if detected & {'python'}:
-        tasks.append(scan_python(repo_path, log_callback))
-        agent_names.append("Python")
+        tasks.append(("Python", scan_python(repo_path, log_callback, file_index,
+                                            budget=budget, scheduler=scheduler, top=top)))
+        py_files = len(file_index.files(extensions={'.py'}))
+        work["Python"] = [('flake8', py_files), ('bandit', py_files)]
 
     if detected & {'javascript', 'typescript'}:
-        tasks.append(scan_javascript(repo_path, log_callback))
-        agent_names.append("JS/TS")
+        tasks.append(("JS/TS", scan_javascript(repo_path, log_callback, file_index,
+                                               budget=budget, scheduler=scheduler, top=top)))
+        work["JS/TS"] = [('eslint', len(file_index.files(extensions=set(JS_EXTS))))]
 
     if detected & {'go'}:
-        tasks.append(scan_go(repo_path, log_callback))
-        agent_names.append("Go")
+        tasks.append(("Go", scan_go(repo_path, log_callback, file_index,
+                                    budget=budget, scheduler=scheduler, top=top)))
+        work["Go"] = [('go', len({_go_package(e.path) for e in file_index.files(extensions={'.go'})}))]
 
     if log_callback:
         await log_callback(
-            f"Deploying {len(tasks)} parallel scanning agents: {', '.join(agent_names)}...", "INFO"
+            f"Deploying {len(tasks)} parallel scanning agents: {', '.join(name for name, _ in tasks)}...", "INFO"
         )
+        if scheduler.deadline is not None:
+            await log_callback(
+                f"[⏱️ Scheduler] {scheduler.deadline:g}s scan deadline — expected: {scheduler.plan(work)}",
+                "INFO"
+            )
+    return tasks
+
 
-    results = await asyncio.gather(*tasks)
-    all_issues = []
-    for r in results:
-        all_issues.extend(r)
+async def _incremental_tasks(repo_path, log_callback, file_index, changed_paths, previous_issues,
+                             budget, scheduler, top=None):
+    """Findings carried over from untouched files, plus agents re-linting ``changed_paths``."""
+    changed = _expand_changed(changed_paths, file_index)
+    carried = [i for i in previous_issues if normalize_path(i['file']) not in changed]
 
     if log_callback:
-        # Build a breakdown
-        by_type = Counter(i["type"] for i in all_issues)
-        breakdown = ", ".join(f"{k}: {v}" for k, v in by_type.most_common())
         await log_callback(
-            f"All agents complete. Total: {len(all_issues)} issues ({breakdown})", "INFO"
+            f"[📊 Scanner] Incremental rescan: {len(changed)} changed files, "
+            f"{len(carried)} findings carried over", "INFO"
         )
 
-    return all_issues
+    tasks = []
+    if changed:
+        tasks.append(("Security", scan_security(repo_path, log_callback, file_index, changed, budget, scheduler, top)))
+        if any(p.endswith('.py') for p in changed):
+            tasks.append(("Python", scan_python(repo_path, log_callback, file_index, changed, budget, scheduler, top)))
+        if any(p.endswith(JS_EXTS) for p in changed):
+            tasks.append(("JS/TS", scan_javascript(repo_path, log_callback, file_index, changed, budget, scheduler, top)))
+        if any(p.endswith('.go') for p in changed):
+            tasks.append(("Go", scan_go(repo_path, log_callback, file_index, changed, budget, scheduler, top)))
+    return carried, tasks
+
+
+async def _finish(store: IssueStore, budget, scheduler: ScanScheduler, log_callback,
+                  top: TopK = None) -> ScanResult:
+    """The final issue list — everything in ``store``, or the best ``budget`` — logged as a breakdown.
+
+    Under a budget the agents have already pushed their findings into
+    ``top``; ``store`` then only holds the carried-over ones.
+    """
+    issues = store.issues()
+    duplicates = store.duplicates
+    selected = ""
+    if budget is not None:
+        if top is None:
+            top = TopK(budget)
+        top.extend(issues)
+        issues = top.issues()
+        duplicates += top.duplicates
+        if top.dropped:
+            selected = f", top {len(issues)} of {top.seen} kept by severity"
+    await asyncio.to_thread(scheduler.save)
+    if log_callback:
+        by_type = Counter(i["type"] for i in issues)
+        breakdown = ", ".join(f"{k}: {v}" for k, v in by_type.most_common())
+        deduped = f", {duplicates} cross-tool duplicates merged" if duplicates else ""
+        partial = (f" — partial, out of time: {', '.join(sorted(scheduler.truncated))}"
+                   if scheduler.truncated else "")
+        await log_callback(
+            f"All agents complete. Total: {len(issues)} issues ({breakdown}){deduped}{selected}{partial}", "INFO"
+        )
+    return ScanResult(issues, scheduler.truncated)
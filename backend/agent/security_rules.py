@@ -0,0 +1,130 @@
+"""
+Security Rule Engine — declarative vulnerability rules compiled into a
+single pass per file. A literal keyword prefilter jumps straight to the
+few lines that could match, so most lines never reach a rule regex.
+"""
+import re
+from typing import NamedTuple
+
+JS_TS = frozenset({'.js', '.jsx', '.ts', '.tsx'})
+
+
+class SecurityRule(NamedTuple):
+    rule_id: str
+    severity: str
+    message: str
+    pattern: str
+    keywords: tuple              # lowercase literals — one must appear for the rule to run
+    exts: frozenset = None       # None = every extension the security agent scans
+    skip_placeholders: bool = False
+
+
+# Add new detections here — the engine compiles them automatically.
+RULES = [
+    SecurityRule("hardcoded-secret", "high", "Potential hardcoded API key",
+                 r'(?i)(api[_-]?key|apikey)\s*[=:]\s*["\'][A-Za-z0-9_\-]{16,}',
+                 ('api',), skip_placeholders=True),
+    SecurityRule("hardcoded-secret", "high", "Potential hardcoded secret",
+                 r'(?i)(secret|password|passwd)\s*[=:]\s*["\'][^"\']{8,}',
+                 ('secret', 'passw'), skip_placeholders=True),
+    SecurityRule("hardcoded-secret", "high", "Hardcoded access token",
+                 r'(?i)(access[_-]?token|auth[_-]?token)\s*[=:]\s*["\'][A-Za-z0-9_\-]{16,}',
+                 ('token',), skip_placeholders=True),
+    SecurityRule("hardcoded-secret", "high", "Potential private key exposure",
+                 r'(?i)(private[_-]?key)\s*[=:]\s*["\']',
+                 ('private',), skip_placeholders=True),
+    SecurityRule("dangerous-function", "medium", "eval() usage — code injection risk",
+                 r'\beval\s*\(', ('eval',), JS_TS | {'.py'}),
+    SecurityRule("dangerous-function", "medium", "innerHTML assignment — XSS risk",
+                 r'\.innerHTML\s*=', ('innerhtml',), JS_TS),
+    SecurityRule("dangerous-function", "medium", "exec() usage — potential injection risk",
+                 r'(?i)exec\s*\(', ('exec',), frozenset({'.py'})),
+    SecurityRule("dangerous-function", "medium", "Shell injection risk (shell=True)",
+                 r'subprocess\.call\(.+shell\s*=\s*True', ('shell',), frozenset({'.py'})),
+]
+
+SECRET_PLACEHOLDERS = ('placeholder', 'example', 'your_', 'xxx', 'test', 'mock', 'sample')
+
+
+def _is_ignored_line(stripped: str) -> bool:
+    """Comments, imports, regex literals and already-annotated lines."""
+    return (
+        stripped.startswith(('//', '#', 'import ', 'from '))
+        or "r'" in stripped or 'r"' in stripped or '\\b' in stripped
+        or '# noqa' in stripped or '# [AI-AGENT]' in stripped
+    )
+
+
+class SecurityEngine:
+    """Compiles a rule list once; ``scan_text`` then runs all rules in one pass."""
+
+    def __init__(self, rules=None):
+        self.rules = list(RULES if rules is None else rules)
+        self._compiled = [re.compile(r.pattern) for r in self.rules]
+        self._per_ext = {}
+
+    def _for_ext(self, ext: str) -> dict:
+        """keyword → rule indexes, for the rules that apply to ``ext``."""
+        by_keyword = self._per_ext.get(ext)
+        if by_keyword is None:
+            by_keyword = {}
+            for idx, rule in enumerate(self.rules):
+                if rule.exts is not None and ext not in rule.exts:
+                    continue
+                for kw in rule.keywords:
+                    by_keyword.setdefault(kw, []).append(idx)
+            self._per_ext[ext] = by_keyword
+        return by_keyword
+
+    def scan_text(self, text: str, ext: str, first_line: int = 1):
+        """Yield ``(line_number, rule)`` for every rule match in ``text``.
+
+        ``first_line`` is the line number of the text's first line, so a
+        file can be fed in consecutive chunks.
+        """
+        by_keyword = self._for_ext(ext)
+        if not by_keyword:
+            return
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Case folding changed offsets (rare non-ASCII) — fall back to per-line
+            for line_no, line in enumerate(text.split('\n'), first_line):
+                for rule in self._match_line(line, by_keyword):
+                    yield line_no, rule
+            return
+
+        # Prefilter: C-speed substring search for each keyword over the whole file
+        line_starts = set()
+        for kw in by_keyword:
+            i = lowered.find(kw)
+            while i != -1:
+                line_starts.add(lowered.rfind('\n', 0, i) + 1)
+                nl = lowered.find('\n', i)
+                i = -1 if nl == -1 else lowered.find(kw, nl)
+
+        line_no = first_line
+        counted_to = 0
+        for start in sorted(line_starts):
+            line_no += text.count('\n', counted_to, start)
+            counted_to = start
+            end = text.find('\n', start)
+            line = text[start:] if end == -1 else text[start:end]
+            for rule in self._match_line(line, by_keyword):
+                yield line_no, rule
+
+    def _match_line(self, line: str, by_keyword: dict):
+        stripped = line.strip()
+        if _is_ignored_line(stripped):
+            return
+        lowered = stripped.lower()
+        candidates = sorted({idx for kw, idxs in by_keyword.items() if kw in lowered for idx in idxs})
+        for idx in candidates:
+            rule = self.rules[idx]
+            if not self._compiled[idx].search(stripped):
+                continue
+            if rule.skip_placeholders and any(p in lowered for p in SECRET_PLACEHOLDERS):
+                continue
+            yield rule
+
+
+DEFAULT_ENGINE = SecurityEngine()
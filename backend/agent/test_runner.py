@@ -8,21 +8,19 @@ import subprocess
 import asyncio
 import json
 
+from agent.file_index import RepoFileIndex
 
-SKIP_DIRS = {'node_modules', '.git', 'dist', 'build', '.next',
-             'coverage', '__pycache__', 'venv', '.venv', 'vendor'}
 
-
-def detect_test_framework(repo_path: str) -> list:
+def detect_test_framework(repo_path: str, file_index: RepoFileIndex = None) -> list:
     """Detect which test frameworks are available in the repo."""
+    if file_index is None:
+        file_index = RepoFileIndex(repo_path)
     frameworks = []
 
     # ── Python ──
     has_py_tests = any(
-        f.startswith('test_') or f.endswith('_test.py')
-        for root, _, files in os.walk(repo_path)
-        for f in files
-        if f.endswith('.py') and not any(s in root for s in SKIP_DIRS)
+        name.startswith('test_') or name.endswith('_test.py')
+        for name in (e.path.rsplit('/', 1)[-1] for e in file_index.files(extensions={'.py'}))
     )
     if has_py_tests:
         # Check for pytest
@@ -96,12 +94,7 @@ def detect_test_framework(repo_path: str) -> list:
             pass
 
     # ── Go ──
-    has_go_tests = any(
-        f.endswith('_test.go')
-        for root, _, files in os.walk(repo_path)
-        for f in files
-        if not any(s in root for s in SKIP_DIRS)
-    )
+    has_go_tests = any(e.path.endswith('_test.go') for e in file_index.files(extensions={'.go'}))
     if has_go_tests:
         frameworks.append({
             "name": "go test",
@@ -314,12 +307,12 @@ def _parse_go_test(stdout: str, result: dict) -> dict:
     return result
 
 
-async def discover_and_run_tests(repo_path: str, log_callback=None) -> dict:
+async def discover_and_run_tests(repo_path: str, log_callback=None, file_index: RepoFileIndex = None) -> dict:
     """Main entry: discover all test frameworks and run them."""
     if log_callback:
         await log_callback("[🧪 Test Agent] Discovering test frameworks...", "INFO")
 
-    frameworks = await asyncio.to_thread(detect_test_framework, repo_path)
+    frameworks = await asyncio.to_thread(detect_test_framework, repo_path, file_index)
 
     if not frameworks:
         if log_callback:
@@ -0,0 +1,108 @@
+"""
+Workspace — per-run file contents and relative-import graph for the fixer.
+Each module's text and each file's resolved relative imports (Python
+`from .x import`, JS/TS `from './x'`) are read once per run and shared by
+every issue that needs them; the fixer invalidates a file after writing it.
+"""
+import os
+import posixpath
+import re
+import threading
+
+RELATED_LIMIT = 2           # related modules shown per prompt
+RELATED_CHARS = 1000        # characters of each related module shown
+
+JS_EXTENSIONS = ('.js', '.jsx', '.ts', '.tsx')
+JS_IMPORT_RE = re.compile(r"from\s+['\"](\.[^'\"]+)['\"]")
+JS_CANDIDATE_SUFFIXES = ('', '.js', '.jsx', '.ts', '.tsx', '/index.js', '/index.ts')
+
+
+def _python_candidates(rel_path: str, module: str) -> list:
+    """Files a relative ``from <module> import`` in ``rel_path`` may refer to."""
+    level = len(module) - len(module.lstrip('.'))
+    name = module[level:]
+    if not name:
+        return []
+    base = posixpath.dirname(rel_path)
+    for _ in range(level - 1):
+        base = posixpath.dirname(base)
+    target = posixpath.join(base, *name.split('.'))
+    # The package-relative module, then the same path from the repo root
+    return [target + '.py', target + '/__init__.py', posixpath.join(*name.split('.')) + '.py']
+
+
+class Workspace:
+    """File contents and import edges for one run, keyed by repo-relative path."""
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self._texts = {}        # path → text, or None if unreadable
+        self._imports = {}      # path → resolved related paths
+        self._lock = threading.Lock()
+
+    def read(self, rel_path: str):
+        """The file's text (cached for the run), or None if it can't be read."""
+        rel_path = rel_path.replace('\\', '/')
+        with self._lock:
+            if rel_path in self._texts:
+                return self._texts[rel_path]
+        full_path = os.path.join(self.repo_path, rel_path)
+        text = None
+        if os.path.isfile(full_path):
+            try:
+                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    text = f.read()
+            except OSError:
+                pass
+        with self._lock:
+            self._texts[rel_path] = text
+        return text
+
+    def imports(self, rel_path: str, lines: list) -> list:
+        """Paths of the existing files ``rel_path`` imports relatively (at most RELATED_LIMIT)."""
+        rel_path = rel_path.replace('\\', '/')
+        with self._lock:
+            if rel_path in self._imports:
+                return self._imports[rel_path]
+        related = []
+        is_js = rel_path.endswith(JS_EXTENSIONS)
+        for line in lines:
+            if len(related) >= RELATED_LIMIT:
+                break
+            stripped = line.strip()
+            if stripped.startswith('from ') and 'import' in stripped:
+                # Python: from .module import ...
+                module = stripped.split('from ')[1].split(' import')[0].strip()
+                if module.startswith('.'):
+                    for candidate in _python_candidates(rel_path, module):
+                        if self.read(candidate) is not None:
+                            if candidate not in related:
+                                related.append(candidate)
+                            break
+            elif is_js:
+                # JS/TS: import ... from './module'
+                match = JS_IMPORT_RE.search(stripped)
+                if match:
+                    base = posixpath.normpath(posixpath.join(posixpath.dirname(rel_path), match.group(1)))
+                    if base.startswith('..'):
+                        continue
+                    for suffix in JS_CANDIDATE_SUFFIXES:
+                        if self.read(base + suffix) is not None:
+                            if base + suffix not in related:
+                                related.append(base + suffix)
+                            break
+        with self._lock:
+            self._imports[rel_path] = related
+        return related
+
+    def related_snippets(self, rel_path: str, lines: list) -> list:
+        """``--- name ---`` headed excerpts of the modules ``rel_path`` imports."""
+        return [f"--- {posixpath.basename(path)} ---\n{(self.read(path) or '')[:RELATED_CHARS]}"
+                for path in self.imports(rel_path, lines)]
+
+    def invalidate(self, rel_path: str):
+        """Forget a file after it was rewritten (its text and its own imports)."""
+        rel_path = rel_path.replace('\\', '/')
+        with self._lock:
+            self._texts.pop(rel_path, None)
+            self._imports.pop(rel_path, None)
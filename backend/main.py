@@ -4,6 +4,8 @@ from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
+# Before the agent imports: their settings (SCAN_WORKERS, SCAN_CACHE_PATH, ...) are read at import time
+load_dotenv()
 import os
 import sys
 import time
@@ -13,14 +15,21 @@ import json
 import uuid
 import httpx
 from collections import defaultdict
-from agent.scanner import scan_repository, detect_languages
-from agent.fixer import fix_issue
+from contextlib import aclosing
+from agent.scanner import ScanResult, iter_scan_repository, detect_languages
+from agent.file_index import RepoFileIndex
+from agent.scan_pool import shutdown_pool
+from agent.go_cache import shutdown_pruner
+from agent.lint_workers import warm_up, shutdown_workers, close_eslint_worker
+from agent.fixer import LineMap, ai_connection_stats, close_ai_clients
+from agent.fix_executor import fix_files
+from agent.fix_router import get_fix_router
+from agent.heuristics import unmatched_rules
+from agent.workspace import Workspace
 from agent.git_manager import clone_repo, create_branch, commit_changes, push_changes, create_pull_request
 from agent.test_runner import discover_and_run_tests
 from db import save_analysis_run, save_file_fixes, get_user_runs
 
-load_dotenv()
-
 
 # ═══ ENV VALIDATION ═══
 def validate_env():
@@ -111,6 +120,7 @@ class AnalyzeRequest(BaseModel):
     leader_name: str = "Agent"
     commit_msg: str = "Fixed {issues_count} issues in {files_changed} files"
     access_token: str = None
+    issue_budget: int = None     # fix the best N issues repo-wide instead of per-scanner caps
 
 
 class OAuthCode(BaseModel):
@@ -250,21 +260,55 @@ async def github_auth(payload: OAuthCode):
 _running_tasks = set()
 
 
-async def run_analysis_task(repo_url: str, team_name: str, leader_name: str, access_token: str = None, commit_msg: str = None, session_id: str = None):
+def _clone_path(repo_url: str) -> str:
+    repo_name = repo_url.split("/")[-1].replace(".git", "")
+    return os.path.abspath(f"./temp_repos/{repo_name}")
+
+
+async def run_analysis_task(repo_url: str, team_name: str, leader_name: str, access_token: str = None, commit_msg: str = None, session_id: str = None, issue_budget: int = None):
     task_key = f"{repo_url}_{team_name}"
     if task_key in _running_tasks:
         return
     _running_tasks.add(task_key)
     try:
-        await _run_analysis(repo_url, team_name, leader_name, access_token, commit_msg, session_id)
+        await _run_analysis(repo_url, team_name, leader_name, access_token, commit_msg, session_id, issue_budget)
     finally:
+        # The run's ESLint worker has loaded the repo's own code — never reuse it
+        await asyncio.to_thread(close_eslint_worker, _clone_path(repo_url))
         _running_tasks.discard(task_key)
 
 
-async def _run_analysis(repo_url: str, team_name: str, leader_name: str, access_token: str = None, commit_msg: str = None, session_id: str = None):
+async def _prefetch(stream, on_done=None):
+    """Iterate ``stream`` in a background task and yield its items.
+
+    The stream runs to its end (then ``await on_done()``) however long the
+    caller spends on each item; closing this generator early closes it.
+    """
+    queue = asyncio.Queue()
+    end = object()
+
+    async def pump():
+        try:
+            async with aclosing(stream):
+                async for item in stream:
+                    queue.put_nowait(item)
+            if on_done is not None:
+                await on_done()
+        finally:
+            queue.put_nowait(end)
+
+    task = asyncio.ensure_future(pump())
+    try:
+        while (item := await queue.get()) is not end:
+            yield item
+        await task  # re-raises a failed stream
+    finally:
+        task.cancel()
+
+
+async def _run_analysis(repo_url: str, team_name: str, leader_name: str, access_token: str = None, commit_msg: str = None, session_id: str = None, issue_budget: int = None):
     start_time = time.time()
-    repo_name = repo_url.split("/")[-1].replace(".git", "")
-    local_path = os.path.abspath(f"./temp_repos/{repo_name}")
+    local_path = _clone_path(repo_url)
 
     # Parse owner/repo for PR
     url_parts = repo_url.replace('.git', '').rstrip('/').split('/')
@@ -326,39 +370,102 @@ async def _run_analysis(repo_url: str, team_name: str, leader_name: str, access_
     fixes_applied = []
     remaining_issues = []
     all_diffs = []
+    ai_stats_before = ai_connection_stats()
+    unmatched_before = unmatched_rules()
+    fix_router = get_fix_router()
+    # Last iteration's fixes as (issue, method, line after the fix); the rescan shows which held
+    to_verify = []
 
-    for i in range(1, max_retries + 1):
-        await log(f"═══════════ Scan Iteration {i}/{max_retries} ═══════════", "INFO")
-        issues = await scan_repository(local_path, log_callback=send_log)
-
-        if not issues:
-            await log("✅ All agents report: Repository is clean!", "SUCCESS")
-            remaining_issues = []
-            break
-
-        if i == 1:
-            await stage("SCAN", "done")
-            # ═══ STAGE 3: FIX ═══
-            await stage("FIX", "active")
+    # One file index per run — every agent queries it, the fixer invalidates it
+    file_index = await asyncio.to_thread(RepoFileIndex, local_path)
+    # Related-module text and import edges for AI prompts, read once per run
+    workspace = Workspace(local_path)
 
-        await log(f"⚠️ {len(issues)} issues found. Deploying Fixer Agent...", "WARNING")
+    # Iteration 2+ only re-lints the files the previous iteration rewrote
+    issues = None
+    changed_paths = None
 
+    for i in range(1, max_retries + 1):
+        await log(f"═══════════ Scan Iteration {i}/{max_retries} ═══════════", "INFO")
+        # Pipelined: each agent's findings are fixed as soon as it reports,
+        # while slower agents are still scanning
+        scan_stream = iter_scan_repository(local_path, log_callback=send_log, file_index=file_index,
+                                           changed_paths=changed_paths, previous_issues=issues,
+                                           budget=issue_budget)
+        issues = ScanResult()
+        changed_paths = set()
         fixed_count = 0
-        for issue in issues:
-            agent = issue.get('agent', 'Fixer')
-            await log(
-                f"[🔧 AI Fixer] {issue['type']} in {issue['file']} "
-                f"L{issue['line']}: {issue['message']}", "ACTION")
-
-            fix_result = await asyncio.to_thread(fix_issue, local_path, issue)
-
-            if fix_result.get('status') == 'fixed':
-                method = fix_result.get('method', 'heuristic')
-                fix_commit_msg = f"[AI-AGENT] Fixed {issue['type']}: {issue['message']}"
+        # Lines each fix inserted/removed, so fixed lines can be found on the rescan
+        line_map = LineMap()
+        fixed_now = []
+
+        # SCAN is done as soon as every agent has reported, not when its last batch is fixed
+        scan_done = (lambda: stage("SCAN", "done")) if i == 1 else None
+        async for batch in _prefetch(scan_stream, scan_done):
+            issues.merge(batch)
+            if not batch:
+                continue
+            if i == 1 and len(issues) == len(batch):
+                # ═══ STAGE 3: FIX ═══
+                await stage("FIX", "active")
+
+            # A file already rewritten this iteration may have been linted before or after
+            # the fix, so its line numbers can't be trusted — the next iteration rescans it
+            stale = [issue for issue in batch if issue['file'] in changed_paths]
+            if stale:
+                batch = [issue for issue in batch if issue['file'] not in changed_paths]
+                await log(f"[⏳ Fixer] {len(stale)} findings in files fixed earlier this iteration — "
+                          f"{'rechecking them next iteration' if i < max_retries else 'left unfixed'}.", "INFO")
+                if i == max_retries:
+                    remaining_issues.extend(stale)
+                if not batch:
+                    continue
+
+            await log(f"⚠️ {len(batch)} issues found. Deploying Fixer Agent...", "WARNING")
+
+            # One read/write and one commit per file, however many issues it has
+            by_file = {}
+            for issue in batch:
+                by_file.setdefault(issue['file'], []).append(issue)
+
+            for issue in batch:
+                await log(
+                    f"[🔧 AI Fixer] {issue['type']} in {issue['file']} "
+                    f"L{issue['line']}: {issue['message']}", "ACTION")
+
+            # Files are fixed concurrently; results (and commits) follow the batch's file order
+            async for file_path, file_issues, fix_results in fix_files(local_path, by_file, file_index,
+                                                                       line_map, workspace):
+                fixed = []
+                for issue, fix_result in zip(file_issues, fix_results):
+                    if fix_result.get('status') == 'fixed':
+                        fixed.append((issue, fix_result))
+                    else:
+                        remaining_issues.append(issue)
+                if not fixed:
+                    continue
+
+                changed_paths.add(file_path)
+                if len(fixed) == 1:
+                    issue = fixed[0][0]
+                    fix_commit_msg = f"[AI-AGENT] Fixed {issue['type']}: {issue['message']}"
+                    commit_body = fix_commit_msg
+                else:
+                    fix_commit_msg = f"[AI-AGENT] Fixed {len(fixed)} issues in {file_path}"
+                    commit_body = fix_commit_msg + "\n\n" + "\n".join(
+                        f"- L{issue['line']} {issue['type']}: {issue['message']}" for issue, _ in fixed)
                 try:
-                    await asyncio.to_thread(commit_changes, local_path, fix_commit_msg, [issue['file']])
+                    await asyncio.to_thread(commit_changes, local_path, commit_body, [file_path])
+                except Exception as e:
+                    await log(f"[⚠️ Git Agent] Commit failed: {str(e)}", "WARNING")
+                    continue
+
+                for issue, fix_result in fixed:
+                    agent = issue.get('agent', 'Fixer')
+                    method = fix_result.get('method', 'heuristic')
                     await log(f"[✅ {agent}] Committed ({method}): {fix_commit_msg[:80]}", "SUCCESS")
                     fixed_count += 1
+                    fixed_now.append((issue, method))
 
                     fix_entry = {
                         "file": issue['file'], "type": issue['type'],
@@ -379,10 +486,19 @@ async def _run_analysis(repo_url: str, team_name: str, leader_name: str, access_
                     await send_json(diff_data)
                     all_diffs.append(diff_data)
 
-                except Exception as e:
-                    await log(f"[⚠️ Git Agent] Commit failed: {str(e)}", "WARNING")
-            else:
-                remaining_issues.append(issue)
+        # A fix held if its rule isn't reported again where the fixed line now is
+        # (a budgeted or partial scan can't tell, so it doesn't count)
+        if to_verify and not issues.truncated and issue_budget is None:
+            reported = {(x['file'], x.get('rule_id'), x['line']) for x in issues}
+            for issue, method, line in to_verify:
+                fix_router.record(issue, method, (issue['file'], issue.get('rule_id'), line) not in reported)
+        to_verify = [(issue, method, line_map.translate(issue['file'], issue['line']))
+                     for issue, method in fixed_now]
+
+        if not issues and not issues.truncated:
+            await log("✅ All agents report: Repository is clean!", "SUCCESS")
+            remaining_issues = []
+            break
 
         if fixed_count == 0:
             await log("No more auto-fixable issues.", "INFO")
@@ -390,12 +506,24 @@ async def _run_analysis(repo_url: str, team_name: str, leader_name: str, access_
         await log(f"Fixed {fixed_count} issues in iteration {i}.", "INFO")
 
     await stage("FIX", "done")
+    await asyncio.to_thread(fix_router.save)
+    ai_stats = {k: v - ai_stats_before[k] for k, v in ai_connection_stats().items()}
+    ai_stats["reused"] = max(0, ai_stats["requests"] - ai_stats["connections"])
+    if ai_stats["requests"]:
+        await log(f"[🔌 AI Pool] {ai_stats['requests']} requests over {ai_stats['connections']} new connections "
+                  f"({ai_stats['reused']} reused, {ai_stats['tls_handshakes']} TLS handshakes)", "INFO")
+    unmatched = {k: n - unmatched_before.get(k, 0) for k, n in unmatched_rules().items()
+                 if n > unmatched_before.get(k, 0)}
+    if unmatched:
+        top = sorted(unmatched.items(), key=lambda item: -item[1])[:8]
+        await log(f"[🧩 Heuristics] No rule-specific fix for {len(unmatched)} rules: "
+                  + ", ".join(f"{rule} ×{n}" for rule, n in top), "INFO")
 
     # ═══ STAGE 3.5: TEST ═══
     await stage("TEST", "active")
     test_results = None
     try:
-        test_results = await discover_and_run_tests(local_path, log_callback=send_log)
+        test_results = await discover_and_run_tests(local_path, log_callback=send_log, file_index=file_index)
         if test_results.get('detected'):
             await send_json({
                 "type": "TEST_RESULTS",
@@ -437,7 +565,7 @@ async def _run_analysis(repo_url: str, team_name: str, leader_name: str, access_
 
     # ═══ Broadcast language stats ═══
     try:
-        lang_stats = await asyncio.to_thread(detect_languages, local_path)
+        lang_stats = await asyncio.to_thread(detect_languages, local_path, file_index)
         await send_json({
             "type": "LANG_STATS",
             "data": lang_stats
@@ -503,10 +631,13 @@ async def start_analysis(request: AnalyzeRequest, req: Request, background_tasks
     if not request.repo_url or 'github.com' not in request.repo_url:
         raise HTTPException(status_code=400, detail="Please provide a valid GitHub repository URL")
 
+    if request.issue_budget is not None and request.issue_budget < 1:
+        raise HTTPException(status_code=400, detail="issue_budget must be at least 1")
+
     background_tasks.add_task(
         run_analysis_task, request.repo_url, request.team_name,
         request.leader_name, request.access_token, request.commit_msg,
-        request.session_id
+        request.session_id, request.issue_budget
     )
     return {"message": "Analysis started", "session_id": request.session_id}
 
@@ -518,6 +649,20 @@ async def get_history(limit: int = 20):
     return {"runs": runs}
 
 
+@app.on_event("startup")
+async def on_startup():
+    # Spawn the linter workers in the background; scans use them once they're up
+    asyncio.get_running_loop().run_in_executor(None, warm_up)
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    shutdown_pool()
+    shutdown_workers()
+    shutdown_pruner()
+    await close_ai_clients()
+
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Keep the persistent caches out of the working tree; tests that need one make their own
+os.environ.setdefault("SCAN_CACHE_MAX_BYTES", "0")
+os.environ.setdefault("AI_FIX_CACHE_MAX_BYTES", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_repo(tmp_path):
+    """Write ``{relative path: text}`` under a fresh directory and return its path."""
+    def make(files):
+        for rel, text in files.items():
+            path = tmp_path / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+        return str(tmp_path)
+    return make
+
+
+def git(repo, *args):
+    subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                   cwd=repo, check=True, capture_output=True)
+
+
+@pytest.fixture
+def make_git_repo(make_repo):
+    """``make_repo``, then ``git init`` and commit everything."""
+    def make(files):
+        repo = make_repo(files)
+        git(repo, 'init', '-q')
+        git(repo, 'add', '-A')
+        git(repo, 'commit', '-q', '-m', 'init')
+        return repo
+    return make
+
+
+@pytest.fixture
+def fake_ai(monkeypatch):
+    """Point the fixer at a stand-in AI client answering with ``reply(messages)``.
+
+    Returns the list the requests' message lists are appended to.
+    """
+    from agent import fixer
+    requests = []
+
+    def install(reply, model='test-model'):
+        def create(model, messages, **kwargs):
+            requests.append(messages)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply(messages)))],
+                                   usage=None)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        monkeypatch.setattr(fixer, 'get_ai_client', lambda: (client, model))
+        return requests
+    return install
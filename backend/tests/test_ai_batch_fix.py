@@ -0,0 +1,68 @@
+import json
+
+from agent import fixer
+from agent.fixer import _ai_regions, fix_file
+
+
+def _issue(line, rule='F841', message="local variable 'unused' is assigned to but never used"):
+    return {'file': 'app.py', 'line': line, 'rule_id': rule, 'message': message, 'tool': 'flake8',
+            'language': 'python', 'type': 'LINTING', 'severity': 'warning'}
+
+
+SOURCE = ('def f():\n'
+          '    unused = 1\n'
+          '    return 2\n'
+          '\n'
+          '\n'
+          'def g():\n'
+          '    other = 3\n'
+          '    return 4\n')
+
+
+def _read(repo):
+    with open(f'{repo}/app.py') as f:
+        return f.read()
+
+
+def test_regions_split_by_span_and_size(monkeypatch):
+    targets = [(n, {}, idx) for n, idx in enumerate([5, 10, 80, 300, 301, 302])]
+    assert [[t[2] for t in r] for r in _ai_regions(targets, 100)] == [[5, 10, 80, 300, 301, 302]]
+    assert [[t[2] for t in r] for r in _ai_regions(targets, 1000)] == [[5, 10], [80], [300, 301, 302]]
+    monkeypatch.setattr(fixer, 'AI_BATCH_MAX_ISSUES', 2)
+    assert [[t[2] for t in r] for r in _ai_regions(targets, 1000)] == [[5, 10], [80], [300, 301], [302]]
+
+
+def test_one_request_fixes_every_issue_in_the_file(make_repo, fake_ai):
+    requests = fake_ai(lambda messages: json.dumps({"2": "    pass", "7": ""}))
+    repo = make_repo({'app.py': SOURCE})
+
+    results = fix_file(repo, 'app.py', [_issue(2), _issue(7, message="local variable 'other' is assigned")])
+
+    assert len(requests) == 1
+    assert [(r['status'], r['method']) for r in results] == [('fixed', 'ai'), ('fixed', 'ai')]
+    assert _read(repo) == SOURCE.replace('    unused = 1\n', '    pass\n').replace('    other = 3\n', '')
+
+
+def test_a_patch_touching_unmarked_lines_is_discarded(make_repo, fake_ai):
+    requests = fake_ai(lambda messages: json.dumps({"2": "    pass", "3": "    return 99"}))
+    repo = make_repo({'app.py': SOURCE})
+
+    results = fix_file(repo, 'app.py', [_issue(2), _issue(7)])
+
+    assert len(requests) == 1           # no per-issue retries after a rejected batch
+    assert all(r.get('method') != 'ai' for r in results)
+    assert 'return 99' not in _read(repo)
+
+
+def test_edits_that_only_pass_one_at_a_time_leave_the_file_untouched(make_repo, fake_ai, monkeypatch):
+    # Simulate edits slipping past the per-edit check; the whole-file check must still catch them
+    apply = fixer._apply
+    monkeypatch.setattr(fixer, '_apply', lambda lines, line_idx, text, check=None: apply(lines, line_idx, text))
+    fake_ai(lambda messages: json.dumps({"2": "    if True:", "7": "    other = (3"}))
+    repo = make_repo({'app.py': SOURCE})
+
+    results = fix_file(repo, 'app.py', [_issue(2), _issue(7)])
+
+    assert [r['status'] for r in results] == ['failed', 'failed']
+    assert all('syntax check' in r['error'] for r in results)
+    assert _read(repo) == SOURCE
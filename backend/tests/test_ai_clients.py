@@ -0,0 +1,67 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agent import fixer
+
+
+@pytest.fixture
+def no_keys(monkeypatch):
+    for name in ('OPENAI_API_KEY', 'GOOGLE_API_KEY'):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+def test_provider_comes_from_the_configured_key(no_keys):
+    assert fixer._ai_config() is None
+    no_keys.setenv('OPENAI_API_KEY', 'your-key-here')
+    assert fixer._ai_config() is None
+    no_keys.setenv('GOOGLE_API_KEY', 'g-key')
+    assert fixer._ai_config() == ('g-key', fixer.GEMINI_BASE_URL, 'gemini-2.0-flash')
+    no_keys.setenv('OPENAI_API_KEY', 'sk-key')
+    assert fixer._ai_config() == ('sk-key', None, 'gpt-4o-mini')
+
+
+def test_clients_are_built_once_per_key(no_keys):
+    pytest.importorskip('openai')
+    no_keys.setattr(fixer, '_clients', {})
+    no_keys.setenv('OPENAI_API_KEY', 'sk-one')
+    client, model = fixer.get_ai_client()
+    assert model == 'gpt-4o-mini'
+    assert fixer.get_ai_client()[0] is client
+    no_keys.setenv('OPENAI_API_KEY', 'sk-two')
+    assert fixer.get_ai_client()[0] is not client
+    for pooled in fixer._clients.values():
+        pooled.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+def test_pooled_requests_reuse_one_connection():
+    httpx = pytest.importorskip('httpx')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    before = fixer.ai_connection_stats()
+    try:
+        with httpx.Client(limits=fixer._pool_limits(), event_hooks={'request': [fixer._on_request]}) as client:
+            for _ in range(3):
+                assert client.get(f'http://127.0.0.1:{server.server_port}/').text == 'ok'
+    finally:
+        server.shutdown()
+        server.server_close()
+    after = fixer.ai_connection_stats()
+    assert after['requests'] - before['requests'] == 3
+    assert after['connections'] - before['connections'] == 1
+    assert after['tls_handshakes'] == before['tls_handshakes']
@@ -0,0 +1,73 @@
+import re
+
+from agent.context_extractor import extract_context, outline
+
+ROW_RE = re.compile(r'^ (?:>>>|   ) (\d+): (.*)$')
+
+
+def _python_file(broken=False):
+    lines = ['import os\n', 'import json\n', 'from collections import Counter\n', '\n',
+             'LIMIT = 10\n', '\n', '\n', 'def helper(value):\n', '    """Doc."""\n', '    return value\n']
+    for n in range(60):
+        lines += ['\n', '\n', f'def unrelated_{n}():\n', *(f'    x = {k}\n' for k in range(5))]
+    lines += ['\n', '\n', 'def target(path):\n', '    data = json.loads(path)\n']
+    lines += [f'    step_{k} = data\n' for k in range(8)]
+    lines += ['    return helper(data) + LIMIT' + (' (\n' if broken else '\n')]
+    lines += ['\n', '\n', 'def tail():\n', '    return 0\n']
+    return lines
+
+
+def _shown(context):
+    """{line number: text} of the lines an excerpt shows."""
+    rows = (ROW_RE.match(row) for row in context.splitlines()[1:])
+    return {int(m.group(1)): m.group(2) for m in rows if m}
+
+
+def test_python_excerpt_has_the_enclosing_function_used_imports_and_definitions():
+    lines = _python_file()
+    marked = next(i for i, line in enumerate(lines) if 'return helper' in line)
+    context = extract_context(lines, {marked}, 'python')
+    shown = _shown(context)
+
+    assert f' >>> {marked + 1}: ' in context
+    assert shown[marked - 9] == 'def target(path):'
+    assert 'import json' in shown.values() and 'import os' not in shown.values()
+    assert 'def helper(value):' in shown.values() and 'LIMIT = 10' in shown.values()
+    assert not any('unrelated_10' in text for text in shown.values())
+    assert 'omitted' in context
+
+
+def test_security_agent_language_is_treated_as_python():
+    lines = _python_file()
+    marked = next(i for i, line in enumerate(lines) if 'return helper' in line)
+    assert extract_context(lines, {marked}, 'py') == extract_context(lines, {marked}, 'python')
+
+
+def test_unparseable_python_falls_back_to_indentation():
+    lines = _python_file(broken=True)
+    info = outline(lines, 'python')
+    start = next(i for i, line in enumerate(lines) if line.startswith('def target'))
+    assert any(block[0] == start for block in info.blocks)
+    assert 'json' in {name for _, _, names in info.imports for name in names}
+
+
+def test_js_blocks_imports_and_symbols():
+    lines = ["import { api } from './api';\n", "import {\n", "  unused,\n", "} from './other';\n",
+             "const LIMIT = 5;\n", "\n", "export function load(id) {\n", "  const url = `/x/${id}{`;\n",
+             "  return api.get(url, LIMIT);\n", "}\n"]
+    info = outline(lines, 'javascript')
+    assert (6, 9) in info.blocks
+    assert [(start, end) for start, end, _ in info.imports] == [(0, 0), (1, 3)]
+    assert set(info.symbols) == {'LIMIT', 'load'}
+
+    shown = _shown(extract_context(lines, {8}, 'javascript', budget=1500))
+    assert shown[1] == "import { api } from './api';"
+    assert shown[5] == 'const LIMIT = 5;'
+
+
+def test_excerpt_stays_within_the_budget():
+    lines = _python_file()
+    marked = next(i for i, line in enumerate(lines) if 'return helper' in line)
+    small = extract_context(lines, {marked}, 'python', budget=60)
+    assert len(small) < len(extract_context(lines, {marked}, 'python', budget=1500))
+    assert f' >>> {marked + 1}: ' in small
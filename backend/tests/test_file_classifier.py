@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from agent import file_classifier as fc
+
+
+def _classify(tmp_path, name, data: bytes, size=None):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return fc.classify_file(str(path), len(data) if size is None else size)
+
+
+@pytest.mark.parametrize('data, expected', [
+    (b'def f():\n    return 1\n', fc.TEXT),
+    (b'\x89PNG\r\n\x1a\n\0\0\0', fc.BINARY),
+    (b'// Code generated by protoc-gen-go. DO NOT EDIT.\npackage pb\n', fc.GENERATED),
+    (b'/* @generated */\nexport const x = 1;\n', fc.GENERATED),
+    (b'var a=1;' * 200 + b'\n', fc.MINIFIED),
+])
+def test_classify(tmp_path, data, expected):
+    assert _classify(tmp_path, 'f', data) == expected
+
+
+def test_size_thresholds(tmp_path):
+    text = b'x = 1\n'
+    assert _classify(tmp_path, 'a', text, size=fc.STREAM_THRESHOLD + 1) == fc.LARGE
+    assert _classify(tmp_path, 'b', text, size=fc.MAX_SCAN_BYTES + 1) == fc.OVERSIZED
+    assert fc.classify_file(str(tmp_path / 'missing'), 10) == fc.UNREADABLE
+
+
+def test_long_line_cut_by_the_sniff_window_is_not_minified(tmp_path):
+    data = b'x = 1\n' * (fc.SNIFF_BYTES // 6) + b'y' * (fc.SNIFF_BYTES * 2) + b'\n'
+    assert _classify(tmp_path, 'a', data) == fc.TEXT
+
+
+def test_large_files_stream_in_line_aligned_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(fc, 'STREAM_THRESHOLD', 64)
+    monkeypatch.setattr(fc, 'CHUNK_BYTES', 50)
+    text = ''.join(f'line {n} {"x" * (n % 13)}\n' for n in range(200))
+    path = tmp_path / 'big.py'
+    path.write_text(text)
+    size = os.path.getsize(path)
+
+    chunks = list(fc.iter_text_chunks(str(path), size))
+    assert len(chunks) > 1
+    assert all(chunk.endswith('\n') for chunk in chunks)
+    assert ''.join(chunks) == text
+    assert list(fc.iter_lines(str(path), size)) == text.splitlines(True)
@@ -0,0 +1,75 @@
+import os
+
+from agent.file_index import PathFilter, RepoFileIndex, list_repo_files, normalize_path
+
+
+def test_index_skips_excluded_dirs_and_flags_bundles(make_repo):
+    repo = make_repo({
+        'app.py': 'x = 1\n',
+        'web/main.js': 'let a = 1;\n',
+        'web/vendor.min.js': 'var a=1;\n',
+        'node_modules/pkg/index.js': 'module.exports = 1;\n',
+        'src/__pycache__/app.cpython-311.pyc': '',
+    })
+    index = RepoFileIndex(repo)
+
+    assert sorted(e.path for e in index.files(include_skipped=True)) == [
+        'app.py', 'web/main.js', 'web/vendor.min.js']
+    assert [e.path for e in index.files(extensions={'.js'})] == ['web/main.js']
+    assert [e.path for e in index.files(languages={'python'})] == ['app.py']
+    assert index.has(languages={'javascript'})
+    assert not index.has(languages={'go'})
+
+
+def test_invalidate_restats_and_drops_deleted_files(make_repo):
+    repo = make_repo({'a.py': 'x = 1\n', 'b.py': 'y = 2\n'})
+    index = RepoFileIndex(repo)
+    before = index.blob_hashes(index.files())['a.py']
+
+    with open(os.path.join(repo, 'a.py'), 'w') as f:
+        f.write('x = 1000\n')
+    os.remove(os.path.join(repo, 'b.py'))
+    index.invalidate('./a.py')
+    index.invalidate('b.py')
+
+    assert index.get('a.py').size == len('x = 1000\n')
+    assert index.blob_hashes(index.files())['a.py'] != before
+    assert index.get('b.py') is None
+    assert len(index) == 1
+
+
+def test_normalize_path():
+    assert normalize_path('.\\src\\a.py') == 'src/a.py'
+    assert normalize_path('././a.py') == 'a.py'
+
+
+def test_git_checkouts_honour_gitignore_and_keep_untracked_files(make_git_repo):
+    repo = make_git_repo({
+        '.gitignore': 'generated/\n*.log\n',
+        'app.py': 'x = 1\n',
+        'web/main.js': 'let a = 1;\n',
+    })
+    for rel in ('generated/out.py', 'debug.log', 'new.py', 'node_modules/pkg/index.js', 'src/vendor/lib.go'):
+        path = os.path.join(repo, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write('x\n')
+
+    assert list_repo_files(repo) == ['.gitignore', 'app.py', 'new.py', 'web/main.js']
+
+
+def test_path_filter_matches_whole_components_and_globs():
+    path_filter = PathFilter({'build', 'node_modules'}, ['*.generated.ts', 'docs/*'])
+    assert path_filter.excludes('build/a.py')
+    assert path_filter.excludes('pkg/node_modules/x/index.js')
+    assert not path_filter.excludes('rebuild/a.py')
+    assert not path_filter.excludes('src/build.py')
+    assert path_filter.excludes('src/api.generated.ts')
+    assert path_filter.excludes('docs/guide.md') and not path_filter.excludes('src/docs.md')
+    assert path_filter.excludes_dir('build') and not path_filter.excludes_dir('builder')
+    assert not PathFilter(dirs=(), patterns=()).excludes('anything')
+
+
+def test_plain_directories_prune_excluded_dirs(make_repo):
+    repo = make_repo({'a.py': '', 'venv/lib/site.py': '', 'pkg/build/out.js': '', 'pkg/b.py': ''})
+    assert list_repo_files(repo, PathFilter({'venv', 'build'})) == ['a.py', 'pkg/b.py']
@@ -0,0 +1,75 @@
+import json
+import time
+
+import pytest
+
+from agent import fixer
+from agent.fixer import FixCache, fix_file
+
+ISSUE = {'file': 'app.py', 'line': 5, 'rule_id': 'F841', 'message': "local variable 'x' is never used",
+         'tool': 'flake8', 'language': 'python', 'type': 'LINTING', 'severity': 'warning'}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = FixCache(str(tmp_path / 'fixes.sqlite3'), max_bytes=1024 * 1024, ttl=3600)
+    monkeypatch.setattr(fixer, 'AI_FIX_CACHE_MAX_BYTES', cache.max_bytes)
+    monkeypatch.setattr(fixer, '_fix_cache', cache)
+    return cache
+
+
+def test_key_covers_the_rule_and_the_lines_around_it():
+    lines = [f'line {n}\n' for n in range(20)]
+    key = FixCache.key('m', ISSUE, lines, 10)
+    far = list(lines)
+    far[0] = 'changed far away\n'
+    near = list(lines)
+    near[12] = 'changed nearby\n'
+
+    assert FixCache.key('m', ISSUE, far, 10) == key
+    assert FixCache.key('m', ISSUE, near, 10) != key
+    assert FixCache.key('other-model', ISSUE, lines, 10) != key
+    assert FixCache.key('m', {**ISSUE, 'message': 'different'}, lines, 10) != key
+
+
+def test_entries_expire_and_the_least_recently_used_are_evicted(tmp_path):
+    cache = FixCache(str(tmp_path / 'c.sqlite3'), max_bytes=1024 * 1024, ttl=60)
+    cache.put('k', 'fixed\n')
+    assert cache.get('k') == 'fixed\n'
+    cache.ttl = -1
+    assert cache.get('k') is None and (cache.hits, cache.misses) == (1, 1)
+
+    small = FixCache(str(tmp_path / 'small.sqlite3'), max_bytes=300, ttl=3600)
+    for n in range(10):
+        small.put(f'key{n}', 'x' * 50)
+        time.sleep(0.002)
+        small.get('key0')       # keep the first one in use
+    assert small.get('key0') is not None
+    assert small.get('key1') is None and small.get('key9') is not None
+
+
+def test_a_rerun_is_served_from_the_cache(make_repo, fake_ai, cache):
+    source = 'def f():\n    a = 1\n    b = 2\n    c = 3\n    x = 4\n    return a + b + c\n'
+    requests = fake_ai(lambda messages: '    pass')
+
+    repo = make_repo({'first/app.py': source, 'second/app.py': source})
+    [first] = fix_file(f'{repo}/first', 'app.py', [ISSUE])
+    [second] = fix_file(f'{repo}/second', 'app.py', [ISSUE])
+
+    assert first['method'] == 'ai' and second['method'] == 'ai-cache'
+    assert len(requests) == 1 and cache.hits == 1
+    with open(f'{repo}/second/app.py') as f:
+        assert f.read() == source.replace('    x = 4\n', '    pass\n')
+
+
+def test_batched_answers_are_cached_per_issue(make_repo, fake_ai, cache):
+    source = 'def f():\n    y = 0\n    a = 1\n    b = 2\n    x = 4\n    return a + b\n'
+    second_issue = {**ISSUE, 'line': 2, 'message': "local variable 'y' is never used"}
+    requests = fake_ai(lambda messages: json.dumps({"2": "    pass", "5": "    pass"}))
+    repo = make_repo({'one/app.py': source, 'two/app.py': source})
+
+    fix_file(f'{repo}/one', 'app.py', [ISSUE, second_issue])
+    results = fix_file(f'{repo}/two', 'app.py', [ISSUE, second_issue])
+
+    assert len(requests) == 1
+    assert [r['method'] for r in results] == ['ai-cache', 'ai-cache']
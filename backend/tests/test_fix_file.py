@@ -0,0 +1,66 @@
+import pytest
+
+from agent import fixer
+from agent.fixer import LineMap, fix_file
+
+
+@pytest.fixture(autouse=True)
+def no_ai(monkeypatch):
+    monkeypatch.setattr(fixer, 'get_ai_client', lambda: (None, None))
+
+
+def _flake8(line, rule, message):
+    return {'file': 'app.py', 'line': line, 'rule_id': rule, 'message': f'{rule} {message}',
+            'tool': 'flake8', 'language': 'python', 'type': 'LINTING', 'severity': 'warning'}
+
+
+SOURCE = ('import os\n'
+          'def f(x):\n'
+          '    return x\n'
+          'def g(x):   \n'
+          '    if x == None:\n'
+          '        return 1\n'
+          'y = 2\n')
+
+
+def test_line_map_shifts_only_later_lines():
+    line_map = LineMap()
+    line_map.record('a.py', 4, 2)
+    line_map.record('a.py', 9, -1)
+    line_map.record('a.py', 5, 0)
+    assert [line_map.translate('a.py', n) for n in (1, 4, 5, 9, 10)] == [1, 4, 7, 11, 11]
+    assert line_map.translate('b.py', 5) == 5
+
+
+def test_one_pass_fixes_every_issue_on_its_scanned_line(make_repo):
+    repo = make_repo({'app.py': SOURCE})
+    line_map = LineMap()
+    issues = [_flake8(2, 'E302', 'expected 2 blank lines, found 0'),
+              _flake8(4, 'E302', 'expected 2 blank lines, found 0'),
+              _flake8(4, 'W291', 'trailing whitespace'),
+              _flake8(5, 'E711', "comparison to None should be 'if cond is None:'")]
+
+    results = fix_file(repo, 'app.py', issues, line_map=line_map)
+
+    assert [r['status'] for r in results] == ['fixed'] * 4
+    with open(f'{repo}/app.py') as f:
+        assert f.read() == ('import os\n\n\n'
+                            'def f(x):\n'
+                            '    return x\n\n\n'
+                            'def g(x):\n'
+                            '    if x is None:\n'
+                            '        return 1\n'
+                            'y = 2\n')
+    # A later finding from the same scan lands on the line it was reported for
+    assert line_map.translate('app.py', 7) == 11
+    [result] = fix_file(repo, 'app.py', [_flake8(7, 'E305', 'expected 2 blank lines after function, found 0')],
+                        line_map=line_map)
+    assert result['status'] == 'fixed' and result['before'] == 'y = 2'
+
+
+def test_out_of_range_lines_fail_without_touching_the_file(make_repo):
+    repo = make_repo({'app.py': SOURCE})
+    [result] = fix_file(repo, 'app.py', [_flake8(99, 'W291', 'trailing whitespace')])
+    assert result == {'status': 'failed', 'error': 'Line out of bounds'}
+    with open(f'{repo}/app.py') as f:
+        assert f.read() == SOURCE
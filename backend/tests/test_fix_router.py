@@ -0,0 +1,69 @@
+import pytest
+
+from agent import fixer
+from agent.fix_router import AI_FIRST, DETERMINISTIC, HEURISTIC_FIRST, MIN_SAMPLES, FixRouter, method_kind
+from agent.fixer import fix_file
+
+
+def _issue(rule, line=2, message='msg', language='python', tool='flake8'):
+    return {'file': 'app.py', 'line': line, 'rule_id': rule, 'message': f'{rule} {message}',
+            'tool': tool, 'language': language, 'type': 'LINTING', 'severity': 'warning'}
+
+
+@pytest.fixture
+def router(monkeypatch):
+    router = FixRouter()
+    monkeypatch.setattr(fixer, 'get_fix_router', lambda: router)
+    return router
+
+
+def test_table_tiers():
+    router = FixRouter()
+    assert router.tier(_issue('W291')) == DETERMINISTIC
+    assert router.tier(_issue('no-var', language='javascript', tool='eslint')) == DETERMINISTIC
+    assert router.tier(_issue('F401')) == HEURISTIC_FIRST
+    assert router.tier(_issue('F821')) == AI_FIRST
+    assert method_kind('ai-cache') == 'ai' and method_kind('heuristic') == 'heuristic'
+
+
+def test_history_moves_rules_between_tiers():
+    router = FixRouter()
+    for _ in range(MIN_SAMPLES - 1):
+        router.record(_issue('F401'), 'heuristic', False)
+    assert router.tier(_issue('F401')) == HEURISTIC_FIRST      # too few samples yet
+    router.record(_issue('F401'), 'heuristic', False)
+    assert router.tier(_issue('F401')) == AI_FIRST
+
+    for _ in range(MIN_SAMPLES):
+        router.record(_issue('F821'), 'heuristic', True)
+    assert router.tier(_issue('F821')) == HEURISTIC_FIRST
+    # Rules are tracked per language
+    assert router.tier(_issue('F401', language='py')) == HEURISTIC_FIRST
+
+
+def test_deterministic_rules_never_reach_the_ai(make_repo, fake_ai, router):
+    requests = fake_ai(lambda messages: '    ai answer')
+    repo = make_repo({'app.py': 'def f():\n    return 1   \n'})
+
+    [result] = fix_file(repo, 'app.py', [_issue('W291', message='trailing whitespace')])
+
+    assert result['method'] == 'heuristic' and not requests
+
+
+def test_a_heuristic_that_changes_nothing_hands_the_issue_to_the_ai(make_repo, fake_ai, router):
+    requests = fake_ai(lambda messages: '    return 2')
+    repo = make_repo({'app.py': 'def f():\n    return 1\n'})
+
+    [result] = fix_file(repo, 'app.py', [_issue('W291', message='trailing whitespace')])
+
+    assert result['method'] == 'ai' and len(requests) == 1
+    assert router.stats['python:W291']['heuristic'] == [1, 0]
+
+
+def test_ai_first_rules_ask_the_ai_first(make_repo, fake_ai, router):
+    requests = fake_ai(lambda messages: '    return defined')
+    repo = make_repo({'app.py': 'def f():\n    return undefined\n'})
+
+    [result] = fix_file(repo, 'app.py', [_issue('F821', message="undefined name 'undefined'")])
+
+    assert result['method'] == 'ai' and len(requests) == 1
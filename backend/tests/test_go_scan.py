@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+from agent import go_cache
+from agent.scanner import _go_package, _parse_go_output
+
+
+def test_parse_go_output():
+    output = ('# example.com/app/cmd\n'
+              './cmd/main.go:12:2: fmt.Printf format %d has arg x of wrong type string\n'
+              'vet: some tool noise\n'
+              'pkg/util.go:3:6: func unused is unused (U1000)\n')
+    issues = _parse_go_output(output, "LINTING", "warning", "staticcheck", "staticcheck")
+    assert [(i['file'], i['line']) for i in issues] == [('cmd/main.go', 12), ('pkg/util.go', 3)]
+    assert issues[1]['message'] == 'func unused is unused (U1000)'
+    assert {i['tool'] for i in issues} == {'staticcheck'}
+    assert _go_package('./cmd/main.go') == 'cmd' and _go_package('main.go') == ''
+
+
+def test_go_env_points_at_the_shared_caches(tmp_path, monkeypatch):
+    monkeypatch.setattr(go_cache, 'GOCACHE', str(tmp_path / 'build'))
+    monkeypatch.setattr(go_cache, 'GOMODCACHE', str(tmp_path / 'mod'))
+    env = go_cache.go_env()
+    assert env['GOCACHE'] == str(tmp_path / 'build') and os.path.isdir(env['GOCACHE'])
+    assert env['GOMODCACHE'] == str(tmp_path / 'mod') and os.path.isdir(env['GOMODCACHE'])
+
+
+def test_prune_drops_the_oldest_build_cache_files(tmp_path, monkeypatch):
+    build = tmp_path / 'build'
+    build.mkdir()
+    for n in range(10):
+        path = build / f'entry{n}'
+        path.write_bytes(b'x' * 100)
+        os.utime(path, (1000 + n, 1000 + n))
+    monkeypatch.setattr(go_cache, 'GOCACHE', str(build))
+    monkeypatch.setattr(go_cache, 'GOMODCACHE', str(tmp_path / 'mod'))
+    monkeypatch.setattr(go_cache, 'GO_CACHE_MAX_BYTES', 500)
+
+    go_cache.prune_go_caches(force=True)
+
+    assert sorted(p.name for p in build.iterdir()) == [f'entry{n}' for n in range(6, 10)]
+
+
+def test_scheduled_prune_runs_once_at_a_time_and_reports_failures(monkeypatch, capsys):
+    release = threading.Event()
+    calls = []
+
+    def prune():
+        calls.append(1)
+        release.wait(10)
+        raise OSError("disk gone")
+    monkeypatch.setattr(go_cache, 'prune_go_caches', prune)
+    monkeypatch.setattr(go_cache, '_prune_future', None)
+
+    first = go_cache.schedule_prune()
+    assert go_cache.schedule_prune() is first
+    release.set()
+    first.exception(10)
+
+    # The done-callback may still be running in the prune thread
+    out = ''
+    deadline = time.monotonic() + 10
+    while "prune failed" not in out and time.monotonic() < deadline:
+        time.sleep(0.01)
+        out += capsys.readouterr().out
+    assert calls == [1]
+    assert "Go cache prune failed: disk gone" in out
@@ -0,0 +1,64 @@
+import pytest
+
+from agent import heuristics
+from agent.heuristics import apply_heuristic, handler_key, unmatched_rules
+
+
+def _issue(tool, rule, message='', language='python', type='LINTING'):
+    return {'tool': tool, 'rule_id': rule, 'message': message, 'language': language, 'type': type}
+
+
+@pytest.mark.parametrize('issue, key', [
+    (_issue('flake8', 'e501'), ('flake8', 'E501')),
+    (_issue('eslint', '@typescript-eslint/no-unused-vars', language='ts'), ('eslint', 'no-unused-vars')),
+    (_issue('pattern', 'no-var', language='javascript'), ('eslint', 'no-var')),
+    (_issue('staticcheck', 'staticcheck', 'func unused is unused (U1000)', 'go'), ('go', 'U1000')),
+    (_issue('go vet', 'go-vet', 'x declared and not used', 'go'), ('go', 'unused-var')),
+    (_issue(None, 'W291'), ('flake8', 'W291')),
+])
+def test_handler_key(issue, key):
+    assert handler_key(issue) == key
+
+
+@pytest.mark.parametrize('issue, before, after', [
+    (_issue('flake8', 'W291'), 'x = 1   \n', 'x = 1\n'),
+    (_issue('flake8', 'E231'), 'f(a,b)\n', 'f(a, b)\n'),
+    (_issue('flake8', 'E711'), 'if x == None:\n', 'if x is None:\n'),
+    (_issue('flake8', 'E401'), '    import os, sys\n', '    import os\n    import sys\n'),
+    (_issue('flake8', 'E302', 'E302 expected 2 blank lines, found 0'), 'def f():\n', '\n\ndef f():\n'),
+    (_issue('flake8', 'E701'), 'if x: return 1\n', 'if x:\n    return 1\n'),
+    (_issue('flake8', 'E501'), 'x = "long"\n', 'x = "long"  # noqa: E501\n'),
+    (_issue('flake8', 'F401', "'os' imported but unused", type='IMPORT'), 'import os\n', '# import os\n'),
+    (_issue('eslint', 'no-var', language='javascript'), 'var a = 1;\n', 'let a = 1;\n'),
+    (_issue('eslint', 'eqeqeq', language='javascript'), 'if (a == b && c != d) {}\n',
+     'if (a === b && c != d) {}\n'),
+    (_issue('eslint', 'semi', language='javascript'), 'let a = 1\n', 'let a = 1;\n'),
+    (_issue('go vet', 'go-vet', 'x declared and not used', 'go'), '\tx := 1\n', '\t// x := 1\n'),
+    (_issue('security-scanner', 'dangerous-function', 'eval() usage', type='SECURITY'),
+     '    eval(x)\n', '    # [AI-AGENT] SECURITY: eval(x)\n'),
+])
+def test_registered_fixes(issue, before, after):
+    lines = ['first\n', before, 'last\n']
+    assert apply_heuristic(lines, 1, issue)
+    assert lines == ['first\n', after, 'last\n']
+
+
+def test_suppressions_only_run_when_allowed():
+    lines = ['x = "long"\n']
+    assert not apply_heuristic(lines, 0, _issue('flake8', 'E501'), allow_suppress=False)
+    assert lines == ['x = "long"\n']
+    # E701 tries the real split first, then the noqa suppression
+    lines = ['class A: pass\n']
+    assert not apply_heuristic(lines, 0, _issue('flake8', 'E701'), allow_suppress=False)
+    assert apply_heuristic(lines, 0, _issue('flake8', 'E701'))
+    assert lines == ['class A: pass  # noqa: E701\n']
+
+
+def test_rules_without_a_handler_fall_back_and_are_counted(monkeypatch):
+    monkeypatch.setattr(heuristics, '_unmatched', heuristics.Counter())
+    lines = ['x = 1\n', 'let y = 2\n']
+    assert apply_heuristic(lines, 0, _issue('flake8', 'C901'))
+    assert apply_heuristic(lines, 1, _issue('eslint', 'prefer-const', language='javascript'))
+    assert not apply_heuristic(['x\n'], 0, _issue('flake8', 'F821', type='LOGIC'))
+    assert lines == ['x = 1  # noqa\n', '// [AI-AGENT] let y = 2\n']
+    assert unmatched_rules() == {'flake8:C901': 1, 'eslint:prefer-const': 1, 'flake8:F821': 1}
@@ -0,0 +1,41 @@
+import asyncio
+
+from agent.file_index import RepoFileIndex
+from agent.scanner import MAX_ISSUES_PER_SCANNER, _expand_changed, _incremental_tasks, is_truncated
+
+
+def _issue(file, agent='Python Agent', tool='flake8', line=1):
+    return {'file': file, 'line': line, 'type': 'style', 'message': 'm', 'tool': tool, 'agent': agent}
+
+
+def test_changed_go_file_pulls_in_its_package(make_repo):
+    repo = make_repo({
+        'cmd/main.go': 'package main\n',
+        'cmd/util.go': 'package main\n',
+        'pkg/other.go': 'package pkg\n',
+        'app.py': 'x = 1\n',
+    })
+    index = RepoFileIndex(repo)
+
+    assert _expand_changed(['./cmd/main.go', 'app.py'], index) == {'cmd/main.go', 'cmd/util.go', 'app.py'}
+    assert _expand_changed(['app.py'], index) == {'app.py'}
+
+
+def test_untouched_files_are_carried_over(make_repo):
+    repo = make_repo({'a.py': 'x = 1\n', 'b.py': 'y = 2\n', 'README.md': 'hi\n'})
+    index = RepoFileIndex(repo)
+    previous = [_issue('a.py'), _issue('./b.py'), _issue('b.py', line=2)]
+
+    carried, tasks = asyncio.run(_incremental_tasks(repo, None, index, ['b.py'], previous, None, None))
+    for _, coro in tasks:
+        coro.close()
+
+    assert carried == [previous[0]]
+    assert [name for name, _ in tasks] == ['Security', 'Python']
+
+
+def test_capped_previous_result_forces_a_full_rescan():
+    assert not is_truncated([_issue('a.py')])
+    assert is_truncated([_issue(f'f{n}.py') for n in range(MAX_ISSUES_PER_SCANNER)])
+    assert is_truncated([_issue('a.py'), _issue('b.py')], budget=2)
+    assert not is_truncated([_issue('a.py')], budget=2)
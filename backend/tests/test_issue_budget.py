@@ -0,0 +1,74 @@
+import asyncio
+import random
+
+import pytest
+
+from agent.issue_budget import TopK, file_priority, rank, top_k
+from agent.scanner import scan_security
+
+
+def _issue(file, line, severity='warning', type='LINTING', rule='E501', tool='flake8', message='m'):
+    return {'file': file, 'line': line, 'severity': severity, 'type': type,
+            'rule_id': rule, 'tool': tool, 'message': message}
+
+
+def _corpus():
+    rng = random.Random(7)
+    severities = ['high', 'error', 'medium', 'warning', 'low', 'info']
+    types = ['SYNTAX', 'SECURITY', 'LOGIC', 'IMPORT', 'LINTING', 'WARNING']
+    files = ['app.py', 'src/core.py', 'tests/test_app.py', 'docs/conf.py', 'web/a.test.js', 'web/a.js']
+    return [_issue(rng.choice(files), line, rng.choice(severities), rng.choice(types), rule=f'R{line}')
+            for line in range(200)]
+
+
+def _reference(issues, k):
+    ordered = sorted(issues, key=lambda i: (i['file'], i['line'], i['rule_id'], i['tool']))
+    return sorted(ordered, key=rank, reverse=True)[:k]
+
+
+def test_file_priority():
+    assert file_priority('src/app.py') == 1
+    assert file_priority('tests/unit/app.py') == 0
+    assert file_priority('pkg/test_app.py') == 0
+    assert file_priority('web\\Button.spec.tsx') == 0
+    assert file_priority('contest/app.py') == 1
+
+
+@pytest.mark.parametrize('k', [0, 1, 15, 200, 500])
+def test_selection_is_the_best_k_whatever_the_push_order(k):
+    issues = _corpus()
+    expected = _reference(issues, k)
+    for seed in range(3):
+        random.Random(seed).shuffle(issues)
+        top = TopK(k)
+        top.extend(issues)
+        assert top.issues() == expected
+        assert top.seen == 200 and top.dropped == 200 - len(expected)
+
+
+def test_severity_beats_position():
+    warning = _issue('a.py', 1)
+    syntax = _issue('z/deep.py', 900, 'error', 'SYNTAX', 'E999')
+    assert top_k([warning, syntax], 1) == [syntax]
+
+
+def test_duplicates_take_one_slot_and_keep_the_higher_severity():
+    scanner = _issue('app.py', 3, 'medium', 'SECURITY', 'dangerous-function', 'security-scanner',
+                     'eval() usage — code injection risk')
+    bandit = _issue('app.py', 3, 'high', 'SECURITY', 'B307', 'bandit', 'Use of possibly insecure function')
+    other = _issue('app.py', 9, 'low')
+
+    top = TopK(2)
+    top.extend([scanner, other, bandit])
+
+    assert top.issues() == [bandit, other]
+    assert top.duplicates == 1 and top.seen == 2
+    assert top.offered == {'security-scanner': 1, 'flake8': 1, 'bandit': 1}
+
+
+def test_budgeted_scan_keeps_the_most_severe_findings_anywhere(make_repo):
+    files = {f'a{n:02}.py': 'x = eval(data)\n' * 3 for n in range(30)}
+    files['zz/deep/settings.py'] = 'PASSWORD = "hunter2hunter2"\nAPI_KEY = "abcdefghijklmnop1234"\n'
+    issues = asyncio.run(scan_security(make_repo(files), budget=2))
+    assert [(i['file'], i['line'], i['severity']) for i in issues] == [
+        ('zz/deep/settings.py', 1, 'high'), ('zz/deep/settings.py', 2, 'high')]
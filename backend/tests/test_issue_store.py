@@ -0,0 +1,60 @@
+import pickle
+
+from agent.issue_store import Issue, IssueStore, fingerprint, normalize_rule
+
+
+def _issue(tool, rule, message, line=5, file='app.py', severity='medium', **extra):
+    return {'file': file, 'type': 'SECURITY', 'line': line, 'message': message, 'raw': '',
+            'severity': severity, 'rule_id': rule, 'tool': tool, 'language': 'python',
+            'agent': 'Security Agent', **extra}
+
+
+BANDIT_EVAL = _issue('bandit', 'B307', 'Use of possibly insecure function - consider using safer ast.literal_eval.')
+SCANNER_EVAL = _issue('security-scanner', 'dangerous-function', 'eval() usage — code injection risk')
+
+
+def test_rules_normalise_across_tools():
+    assert normalize_rule(BANDIT_EVAL) == normalize_rule(SCANNER_EVAL) == 'eval'
+    assert normalize_rule(_issue('security-scanner', 'dangerous-function', 'innerHTML assignment — XSS risk')) \
+        == 'inner-html'
+    assert normalize_rule(_issue('flake8', 'E501', 'line too long')) == 'e501'
+
+
+def test_same_finding_from_two_tools_is_kept_once_at_the_higher_severity():
+    store = IssueStore([SCANNER_EVAL, {**BANDIT_EVAL, 'severity': 'high'}])
+    assert store.duplicates == 1
+    [kept] = store.issues()
+    assert kept['tool'] == 'bandit' and kept['severity'] == 'high'
+    assert store.with_severity('high') == [kept] and store.with_severity('medium') == []
+    assert store.for_rule('eval') == [kept] and store.for_file('app.py') == [kept]
+
+
+def test_distinct_symbols_on_one_line_are_kept_apart():
+    store = IssueStore([
+        _issue('flake8', 'F401', "'os' imported but unused", line=1),
+        _issue('flake8', 'F401', "'sys' imported but unused", line=1),
+        _issue('flake8', 'F811', "redefinition of unused 'os' from line 1", line=1),
+    ])
+    assert [i['message'] for i in store.issues()] == ["'os' imported but unused", "'sys' imported but unused"]
+    assert store.duplicates == 1
+
+
+def test_different_lines_and_rules_are_not_merged():
+    store = IssueStore()
+    assert store.add(SCANNER_EVAL) is not None
+    assert store.add({**SCANNER_EVAL, 'line': 6}) is not None
+    assert store.add(_issue('bandit', 'B102', 'Use of exec detected.')) is not None
+    assert store.add(SCANNER_EVAL) is None
+    assert len(store.issues()) == 3 and store.duplicates == 1
+    assert fingerprint({**SCANNER_EVAL, 'file': 'src\\app.py'}) == fingerprint({**SCANNER_EVAL, 'file': 'src/app.py'})
+
+
+def test_compact_issue_behaves_like_the_dict():
+    source = _issue('flake8', 'E501', 'line too long', fixed_by='heuristic')
+    issue = Issue(source)
+    assert dict(issue) == source
+    assert issue.get('missing') is None and 'fixed_by' in issue
+    issue['line'] = 9
+    del issue['raw']
+    assert issue['line'] == 9 and 'raw' not in issue
+    assert dict(pickle.loads(pickle.dumps(issue))) == dict(issue)
@@ -0,0 +1,45 @@
+import pytest
+
+from agent import lang_stats
+from agent.file_index import RepoFileIndex
+
+FILES = {
+    'app.py': 'import os\n\nprint(os.name)\n',
+    'web/main.js': 'let a = 1;\nlet b = 2',
+    'web/util.ts': 'export const x = 1;\n',
+    'cmd/main.go': 'package main\n\nfunc main() {}\n',
+    'README.md': '# hi\n',
+    'node_modules/dep/index.js': 'module.exports = 1;\n',
+    'empty.py': '',
+}
+
+
+@pytest.mark.parametrize('text', ['', 'a', 'a\n', 'a\nb', 'a\nb\n', '\n\n', 'a\r\nb\r\n'])
+def test_count_lines_matches_text_mode_iteration(tmp_path, monkeypatch, text):
+    path = tmp_path / 'f'
+    path.write_bytes(text.encode())
+    expected = len(open(path).readlines())
+    assert lang_stats.count_lines(str(path)) == expected
+    monkeypatch.setattr(lang_stats, 'MMAP_THRESHOLD', 1)
+    monkeypatch.setattr(lang_stats, 'COUNT_CHUNK_BYTES', 2)
+    assert lang_stats.count_lines(str(path)) == expected
+
+
+def test_git_metadata_stats_match_a_directory_walk(make_repo, make_git_repo):
+    walked = lang_stats.detect_languages(make_repo(dict(FILES)))
+    from_git = lang_stats.detect_languages(make_git_repo(dict(FILES)))
+    assert from_git == walked
+    assert walked['languages']['python'] == {'files': 2, 'lines': 3, 'bytes': len(FILES['app.py']),
+                                             'percentage': round(3 / walked['total_lines'] * 100, 1)}
+    assert 'node_modules' not in walked['directories']
+
+
+def test_stats_are_memoised_per_commit_and_dirty_files_read_from_disk(make_git_repo):
+    repo = make_git_repo(dict(FILES))
+    first = lang_stats.detect_languages(repo)
+    assert lang_stats.detect_languages(repo) is first
+
+    with open(f'{repo}/app.py', 'a') as f:
+        f.write('print(1)\nprint(2)\n')
+    dirty = lang_stats.detect_languages(repo, RepoFileIndex(repo))
+    assert dirty['languages']['python']['lines'] == first['languages']['python']['lines'] + 2
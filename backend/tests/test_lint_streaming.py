@@ -0,0 +1,77 @@
+import asyncio
+import subprocess
+import sys
+import time
+
+import pytest
+
+from agent.lint_runner import batched, cli_batches
+from agent.scanner import _parse_bandit_line, _parse_flake8_line, _stream_lint
+
+
+def _printer(lines, then_sleep=0):
+    """A linter stand-in: prints ``lines`` (flushing each), then optionally hangs."""
+    script = (f"import sys, time\nfor l in {lines!r}:\n    print(l, flush=True)\n"
+              f"time.sleep({then_sleep})\n")
+    return [sys.executable, '-c', script]
+
+
+def test_parse_flake8_line():
+    issue = _parse_flake8_line('./pkg/a.py:12:5: F401 \'os\' imported but unused')
+    assert issue['file'] == 'pkg/a.py' and issue['line'] == 12
+    assert issue['rule_id'] == 'F401' and issue['type'] == 'IMPORT' and issue['severity'] == 'warning'
+    assert _parse_flake8_line('a.py:1:1: E999 SyntaxError: invalid syntax')['type'] == 'SYNTAX'
+    assert _parse_flake8_line('a.py:3:1: W291 trailing whitespace')['type'] == 'WARNING'
+    assert _parse_flake8_line('') is None
+    assert _parse_flake8_line('a.py:x:1: E1 bad') is None
+
+
+def test_parse_bandit_line():
+    issue = _parse_bandit_line('./a.py\t7\tB307\tMEDIUM\tUse of possibly insecure function eval')
+    assert (issue['file'], issue['line'], issue['rule_id'], issue['severity']) == ('a.py', 7, 'B307', 'medium')
+    assert _parse_bandit_line('not\tbandit') is None
+
+
+def test_batched():
+    assert batched(list('abcde'), 2) == [['a', 'b'], ['c', 'd'], ['e']]
+    assert batched(['a'], 0) == [['a']]
+
+
+def test_budget_finishes_the_current_file_and_skips_later_batches(tmp_path):
+    outputs = {
+        ('a.py', 'b.py', 'c.py'): ['a.py:1:1: E1 x', 'a.py:2:1: E2 x', 'b.py:1:1: E3 x'],
+        ('d.py',): ['d.py:1:1: E4 x'],
+    }
+    started = []
+
+    def make_cmd(batch):
+        started.append(tuple(batch))
+        return _printer(outputs[tuple(batch)], then_sleep=30)
+
+    begin = time.monotonic()
+    results = asyncio.run(_stream_lint(
+        cli_batches(make_cmd, [list(b) for b in outputs], str(tmp_path), 60), _parse_flake8_line, budget=1))
+
+    assert time.monotonic() - begin < 20         # the hanging linter was killed
+    assert started == [('a.py', 'b.py', 'c.py')]
+    assert {p: [i['line'] for i in v] for p, v in results.items()} == {'a.py': [1, 2]}
+
+
+def test_clean_files_of_a_finished_batch_are_reported(tmp_path):
+    results = asyncio.run(_stream_lint(
+        cli_batches(lambda batch: _printer(['b.py:4:1: E1 x']), [['a.py', 'b.py']], str(tmp_path), 60),
+        _parse_flake8_line, budget=10))
+    assert results['a.py'] == [] and [i['line'] for i in results['b.py']] == [4]
+
+
+def test_timeout_keeps_finished_files(tmp_path):
+    timed_out = []
+    batches = cli_batches(lambda batch: _printer(['a.py:1:1: E1 x', 'b.py:1:1: E2 x'], then_sleep=30),
+                          [['a.py', 'b.py']], str(tmp_path), 2)
+    results = asyncio.run(_stream_lint(batches, _parse_flake8_line, 10, on_timeout=lambda: timed_out.append(1)))
+    assert timed_out and list(results) == ['a.py']
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        asyncio.run(_stream_lint(
+            cli_batches(lambda batch: _printer([], then_sleep=30), [['a.py']], str(tmp_path), 1),
+            _parse_flake8_line, 10))
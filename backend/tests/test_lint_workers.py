@@ -0,0 +1,105 @@
+import asyncio
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from agent import lint_workers
+from agent.scanner import BANDIT_MSG_TEMPLATE
+
+FLAKE8_ARGS = ['--max-line-length=120', '--select=E,W,F', '--jobs=1']
+SOURCES = {
+    'app.py': 'import os, sys\n\n\ndef f(x):\n    if x == None:\n        return eval(x)\n',
+    'pkg/util.py': 'def g():\n    y = 1\n    return undefined_name\n',
+    'clean.py': 'VALUE = 1\n',
+}
+
+
+async def _pooled(tool, repo, args, batches):
+    return {tuple(batch): [line async for line in lines]
+            async for batch, lines in lint_workers.pooled_batches(tool, repo, args, batches, 60)}
+
+
+@pytest.fixture
+def pool():
+    lint_workers.reset_lint_pool()
+    yield
+    lint_workers.reset_lint_pool()
+
+
+def test_bandit_options_from_ini_pyproject_or_nothing(make_repo):
+    assert lint_workers.bandit_options(make_repo({'a.py': ''})) == {}
+
+    repo = make_repo({'pyproject.toml': '[tool.bandit]\nskips = ["B101"]\n'})
+    assert lint_workers.bandit_options(repo) == {'configfile': 'pyproject.toml'}
+
+    repo = make_repo({'.bandit': '[bandit]\nskips = B101,B307\nexclude = ./tests\nunknown = 1\n'})
+    options = lint_workers.bandit_options(repo)
+    assert options == {'skips': 'B101,B307', 'exclude': './tests'}
+    assert lint_workers.bandit_cli_flags(options) == ['-s', 'B101,B307']
+    assert lint_workers.bandit_cli_flags({'configfile': 'b.yml', 'tests': 'B1', 'profile': 'p'}) == [
+        '-c', 'b.yml', '-t', 'B1', '-p', 'p']
+
+
+def test_flake8_workers_print_what_the_cli_prints(pool, make_repo):
+    pytest.importorskip('flake8')
+    repo = make_repo(SOURCES)
+    batches = [['app.py', 'clean.py'], ['pkg/util.py']]
+
+    pooled = asyncio.run(_pooled('flake8', repo, FLAKE8_ARGS, batches))
+
+    for batch in batches:
+        cli = subprocess.run([sys.executable, '-m', 'flake8', *batch, *FLAKE8_ARGS],
+                             cwd=repo, capture_output=True, text=True)
+        assert pooled[tuple(batch)] == cli.stdout.splitlines()
+    assert pooled[('app.py', 'clean.py')]
+
+
+def test_bandit_workers_print_what_the_cli_prints(pool, make_repo):
+    pytest.importorskip('bandit')
+    if shutil.which('bandit') is None:
+        pytest.skip('bandit CLI not installed')
+    repo = make_repo({**SOURCES, '.bandit': '[bandit]\nskips = B101\n'})
+    options = lint_workers.bandit_options(repo)
+
+    pooled = asyncio.run(_pooled('bandit', repo, ['', options], [['app.py', 'pkg/util.py']]))
+
+    cli = subprocess.run(['bandit', 'app.py', 'pkg/util.py', '-f', 'custom', '--msg-template',
+                          BANDIT_MSG_TEMPLATE, '-q', '--exclude=', *lint_workers.bandit_cli_flags(options)],
+                         cwd=repo, capture_output=True, text=True)
+    assert pooled[('app.py', 'pkg/util.py')] == cli.stdout.splitlines()
+
+
+def test_pool_is_recycled_only_when_idle_and_past_its_job_limit(pool, monkeypatch):
+    monkeypatch.setattr(lint_workers, 'LINT_WORKERS', 1)
+    monkeypatch.setattr(lint_workers, 'LINT_WORKER_MAX_JOBS', 3)
+    warmed = []
+    monkeypatch.setattr(lint_workers, 'warm_up', lambda: warmed.append(1))
+
+    first = lint_workers._checkout(2)
+    second = lint_workers._checkout(2)
+    assert first is second
+    lint_workers._checkin()                     # over the limit, but still in use
+    assert lint_workers.get_lint_pool() is first
+    lint_workers._checkin()                     # idle now
+    replacement = lint_workers.get_lint_pool()
+    assert replacement is not first
+
+    lint_workers._checkout(1)
+    lint_workers._checkin()                     # the new pool starts counting from zero
+    assert lint_workers.get_lint_pool() is replacement
+
+
+def test_each_run_gets_its_own_eslint_worker(monkeypatch):
+    monkeypatch.setattr(lint_workers, 'ESLINT_WORKER_ENABLED', True)
+    monkeypatch.setattr(lint_workers.shutil, 'which', lambda name: '/usr/bin/node')
+
+    a = lint_workers.get_eslint_worker('/tmp/run-a')
+    assert lint_workers.get_eslint_worker('/tmp/run-a') is a
+    assert lint_workers.get_eslint_worker('/tmp/run-b') is not a
+
+    lint_workers.close_eslint_worker('/tmp/run-a')
+    assert lint_workers.get_eslint_worker('/tmp/run-a') is not a
+    lint_workers.shutdown_workers()
+    assert not lint_workers._eslint_workers
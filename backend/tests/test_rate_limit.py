@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+from agent import fix_executor, rate_limit
+from agent.rate_limit import ProviderLimiter, TokenBucket, complete, retry_after
+
+
+class ApiError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+def _client(*outcomes):
+    """A client whose create() raises or returns ``outcomes`` in turn."""
+    calls = []
+
+    def create(**kwargs):
+        outcome = outcomes[len(calls)]
+        calls.append(kwargs)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))), calls
+
+
+def test_token_bucket():
+    bucket = TokenBucket(60)        # one per second
+    now = bucket.updated
+    assert bucket.wait_time(60, now) == 0
+    bucket.take(60)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1000, now) == pytest.approx(60.0)   # larger than the bucket: wait for a full one
+    bucket.give(30)
+    assert bucket.wait_time(30, now) == 0
+
+
+def test_retry_after_headers():
+    assert retry_after(ApiError(429, {'retry-after-ms': '1500'})) == 1.5
+    assert retry_after(ApiError(429, {'retry-after': '7'})) == 7.0
+    assert 25 < retry_after(ApiError(429, {'retry-after': formatdate(time.time() + 30, usegmt=True)})) <= 30
+    assert retry_after(ApiError(429)) is None
+    assert retry_after(ValueError()) is None
+
+
+def test_rate_limits_pause_the_provider_and_are_retried(monkeypatch):
+    response = SimpleNamespace(usage=SimpleNamespace(total_tokens=10))
+    client, calls = _client(ApiError(429, {'retry-after': '0.2'}), ApiError(503, {'retry-after': '0'}), response)
+    monkeypatch.setattr(rate_limit, '_limiters', {})
+    monkeypatch.setattr(rate_limit, 'BACKOFF_BASE', 0.01)
+
+    begin = time.monotonic()
+    assert complete(client, 'model-a', [{'role': 'user', 'content': 'x' * 400}], max_tokens=50) is response
+    assert len(calls) == 3 and time.monotonic() - begin >= 0.2
+    # The pause applies to every caller of the provider
+    assert rate_limit.get_limiter('model-a').blocked_until > 0
+
+
+def test_client_errors_are_not_retried(monkeypatch):
+    client, calls = _client(ApiError(400), None)
+    monkeypatch.setattr(rate_limit, '_limiters', {})
+    with pytest.raises(ApiError):
+        complete(client, 'model-b', [{'role': 'user', 'content': 'x'}])
+    assert len(calls) == 1
+
+
+def test_limiter_spaces_requests_past_the_budget():
+    limiter = ProviderLimiter(rpm=600, tpm=10 ** 6)       # ten per second
+    limiter.requests.tokens = 1
+    begin = time.monotonic()
+    limiter.acquire(1)
+    limiter.acquire(1)
+    assert time.monotonic() - begin >= 0.08
+
+
+def test_files_are_fixed_concurrently_and_returned_in_order(monkeypatch):
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def fix_file(repo_path, path, issues, *args):
+        with lock:
+            running.append(path)
+            peak.append(len(running))
+        time.sleep(0.05 if path != 'c.py' else 0)
+        with lock:
+            running.remove(path)
+        if path == 'b.py':
+            raise OSError('disk full')
+        return [{'status': 'fixed'} for _ in issues]
+    monkeypatch.setattr(fix_executor, 'fix_file', fix_file)
+
+    async def collect():
+        by_file = {p: [{'line': 1}] for p in ('a.py', 'b.py', 'c.py', 'd.py', 'e.py')}
+        return [(path, results) async for path, _, results in fix_executor.fix_files('/repo', by_file, concurrency=2)]
+
+    out = asyncio.run(collect())
+    assert [path for path, _ in out] == ['a.py', 'b.py', 'c.py', 'd.py', 'e.py']
+    assert out[1][1] == [{'status': 'failed', 'error': 'disk full'}]
+    assert max(peak) == 2
@@ -0,0 +1,64 @@
+import sqlite3
+import subprocess
+
+import pytest
+
+from agent.scan_cache import ScanCache, blob_hash, evict_lru
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ScanCache(str(tmp_path / 'scan.sqlite3'), max_bytes=1024 * 1024)
+
+
+def test_blob_hash_matches_git(tmp_path):
+    data = b'print("hi")\n'
+    (tmp_path / 'f').write_bytes(data)
+    expected = subprocess.run(['git', 'hash-object', str(tmp_path / 'f')],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    assert blob_hash(data) == expected
+
+
+def test_hits_require_same_blob_version_and_config(cache):
+    issue = {'file': 'a.py', 'line': 3, 'message': 'E1'}
+    cache.put_many('flake8', '7.0', 'cfg', {'a.py': 'b1'}, {'a.py': [issue]})
+
+    assert cache.get_many('flake8', '7.0', 'cfg', {'a.py': 'b1', 'b.py': 'b2'}) == {'a.py': [issue]}
+    assert cache.get_many('flake8', '7.0', 'cfg', {'a.py': 'changed'}) == {}
+    assert cache.get_many('flake8', '7.0', 'other', {'a.py': 'b1'}) == {}
+    assert cache.hits['flake8'] == 1 and cache.misses['flake8'] == 3
+    # A new tool version purges the old entries
+    assert cache.get_many('flake8', '7.1', 'cfg', {'a.py': 'b1'}) == {}
+    assert cache.get_many('flake8', '7.0', 'cfg', {'a.py': 'b1'}) == {}
+
+
+def test_package_units_keep_each_findings_file(cache):
+    issues = [{'file': 'pkg', 'line': 1, 'message': 'vet'},
+              {'file': 'pkg/a.go', 'line': 2, 'message': 'unused'}]
+    cache.put_many('go', 'v1', '', {'pkg': 'h'}, {'pkg': issues})
+    assert cache.get_many('go', 'v1', '', {'pkg': 'h'}) == {'pkg': issues}
+
+
+def test_clean_files_are_cached_and_forget_drops_them(cache):
+    cache.put_many('security', '1', '', {'a.py': 'x', 'b.py': 'y'}, {'a.py': [], 'b.py': [], 'c.py': []})
+    assert cache.cached_paths('security', '1', '', {'a.py': 'x', 'b.py': 'y', 'c.py': 'z'}) == {'a.py', 'b.py'}
+    cache.forget_many('security', '1', '', {'a.py': 'x'})
+    assert cache.get_many('security', '1', '', {'a.py': 'x', 'b.py': 'y'}) == {'b.py': []}
+
+
+def test_evict_lru_drops_expired_then_least_recently_used():
+    db = sqlite3.connect(':memory:')
+    db.execute("CREATE TABLE t (key TEXT PRIMARY KEY, size INTEGER, last_used REAL, created REAL)")
+    db.executemany("INSERT INTO t VALUES (?, ?, ?, ?)", [
+        ('old', 10, 5, 0), ('a', 40, 1, 10), ('b', 40, 2, 10), ('c', 40, 3, 10)])
+
+    evict_lru(db, 't', 100, expired_before=1)
+    assert {k for k, in db.execute("SELECT key FROM t")} == {'b', 'c'}
+    evict_lru(db, 't', 1000)
+    assert {k for k, in db.execute("SELECT key FROM t")} == {'b', 'c'}
+
+
+def test_memo_round_trip(cache):
+    assert cache.get_memo('stats:abc') is None
+    cache.put_memo('stats:abc', {'languages': {'python': 1}})
+    assert cache.get_memo('stats:abc') == {'languages': {'python': 1}}
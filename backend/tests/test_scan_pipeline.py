@@ -0,0 +1,61 @@
+import asyncio
+import os
+
+from agent import scanner
+from agent.fixer import _write_file
+
+
+def _issue(file, line, rule, tool, agent):
+    return {'file': file, 'line': line, 'type': 'LINTING', 'message': f'{rule} msg', 'raw': '',
+            'severity': 'warning', 'rule_id': rule, 'tool': tool, 'language': 'python', 'agent': agent}
+
+
+CARRIED = [_issue('old.py', 1, 'E501', 'flake8', 'Python Agent')]
+FAST = [_issue('a.py', 3, 'B307', 'bandit', 'Security Agent')]
+SLOW = [_issue('a.py', 5, 'E302', 'flake8', 'Python Agent'),
+        {**_issue('a.py', 3, 'dangerous-function', 'security-scanner', 'Security Agent'),
+         'message': 'eval() usage — code injection risk'}]
+
+
+def _fake_agents(monkeypatch):
+    async def agent(delay, issues):
+        await asyncio.sleep(delay)
+        return issues
+
+    async def tasks(*args):
+        return CARRIED, [("Python", agent(0.2, SLOW)), ("Security", agent(0.01, FAST))]
+    monkeypatch.setattr(scanner, '_incremental_tasks', tasks)
+
+
+def test_batches_are_yielded_as_agents_finish(monkeypatch, tmp_path):
+    _fake_agents(monkeypatch)
+
+    async def collect():
+        return [list(batch) async for batch in scanner.iter_scan_repository(
+            str(tmp_path), file_index=object(), changed_paths=['a.py'], previous_issues=CARRIED, deadline=0)]
+
+    # Carried-over findings first, then completion order; a repeat of a yielded finding is dropped
+    assert asyncio.run(collect()) == [CARRIED, FAST, SLOW[:1]]
+
+
+def test_scan_repository_keeps_gather_order(monkeypatch, tmp_path):
+    _fake_agents(monkeypatch)
+    issues = asyncio.run(scanner.scan_repository(
+        str(tmp_path), file_index=object(), changed_paths=['a.py'], previous_issues=CARRIED, deadline=0))
+    # The first agent in gather order keeps a shared finding, however the agents finished
+    assert list(issues) == CARRIED + SLOW
+
+
+def test_write_file_replaces_atomically_through_symlinks(tmp_path):
+    target = tmp_path / 'real.py'
+    target.write_text('old\n')
+    os.chmod(target, 0o750)
+    link = tmp_path / 'link.py'
+    link.symlink_to(target)
+
+    _write_file(str(link), ['new\n', 'lines\n'])
+
+    assert link.is_symlink()
+    assert target.read_text() == 'new\nlines\n'
+    assert os.stat(target).st_mode & 0o777 == 0o750
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['link.py', 'real.py']
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from agent import scan_pool
+from agent.file_index import RepoFileIndex
+from agent.scanner import _security_scan_files
+
+
+def test_split_keeps_order_in_contiguous_shards():
+    jobs = list(range(10))
+    shards = scan_pool._split(jobs, 4)
+    assert shards == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    assert scan_pool._split([1], 8) == [[1]]
+    assert scan_pool._split([], 3) == []
+
+
+def test_should_shard_thresholds(monkeypatch, make_repo):
+    index = RepoFileIndex(make_repo({f'f{n}.py': 'x = 1\n' for n in range(5)}))
+    entries = index.files()
+    monkeypatch.setattr(scan_pool, 'SCAN_WORKERS', 4)
+    monkeypatch.setattr(scan_pool, 'SHARD_MIN_FILES', 5)
+    assert scan_pool.should_shard(entries)
+    assert not scan_pool.should_shard(entries[:4])
+    monkeypatch.setattr(scan_pool, 'SHARD_MIN_BYTES', 6 * 4)
+    assert scan_pool.should_shard(entries[:4])
+    monkeypatch.setattr(scan_pool, 'SCAN_WORKERS', 1)
+    assert not scan_pool.should_shard(entries)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(scan_pool, 'SCAN_WORKERS', 2)
+    scan_pool.shutdown_pool()
+    yield
+    scan_pool.shutdown_pool()
+
+
+@pytest.mark.parametrize('budget', [1000, 3])
+def test_sharded_scan_matches_in_thread_scan(pool, make_repo, budget):
+    files = {f'src/m{n:02}.py': f'x = {n}\nresult = eval(data)\n' * (n % 3) for n in range(20)}
+    files['src/bin.py'] = '\0\0'
+    index = RepoFileIndex(make_repo(files))
+    jobs = [(e, index.kind(e)) for e in index.files()]
+
+    expected, expected_skipped = _security_scan_files(index.repo_path, jobs, budget)
+    sharded, skipped = asyncio.run(
+        scan_pool.run_sharded(_security_scan_files, index.repo_path, [(e, None) for e, _ in jobs], budget))
+
+    if budget >= 1000:
+        assert sharded == expected
+        assert skipped == expected_skipped
+    else:
+        # Whole shards are kept in order until the budget is met
+        full, _ = _security_scan_files(index.repo_path, jobs, 1000)
+        assert list(sharded) == list(full)[:len(sharded)]
+        assert all(sharded[path] == full[path] for path in sharded)
+        assert sum(map(len, sharded.values())) >= budget
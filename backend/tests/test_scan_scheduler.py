@@ -0,0 +1,104 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from agent import scanner
+from agent.lint_runner import run_command
+from agent.scan_scheduler import DEFAULT_TIMEOUTS, ScanResult, ScanScheduler
+
+
+def test_without_a_deadline_tools_get_their_fixed_timeouts():
+    scheduler = ScanScheduler(0)
+    assert scheduler.remaining() is None
+    assert scheduler.timeout('flake8', 100, then=[('bandit', 100)]) == DEFAULT_TIMEOUTS['flake8']
+
+
+def test_deadline_is_shared_by_predicted_runtime():
+    scheduler = ScanScheduler(100)
+    flake8 = scheduler.timeout('flake8', 100, then=[('bandit', 100)])
+    # flake8 0.02 s/file vs bandit 0.03 s/file until there is history
+    assert flake8 == pytest.approx(40, abs=0.5)
+    assert scheduler.timeout('bandit', 100) == pytest.approx(100, abs=0.5)
+
+
+def test_scan_result_merges_truncation():
+    result = ScanResult([1], {'flake8'})
+    result.merge(ScanResult([2], {'go'}))
+    result.merge([3])
+    assert result == [1, 2, 3] and result.truncated == {'flake8', 'go'}
+
+
+def test_run_command_captures_output_and_times_out(tmp_path):
+    done = asyncio.run(run_command([sys.executable, '-c', 'import sys; print("out"); sys.exit(3)'],
+                                   str(tmp_path), 30))
+    assert (done.returncode, done.stdout.strip()) == (3, 'out')
+    with pytest.raises(subprocess.TimeoutExpired):
+        asyncio.run(run_command([sys.executable, '-c', 'import time; time.sleep(30)'], str(tmp_path), 0.5))
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    try:
+        # A killed child not yet reaped by its (also killed) parent is a zombie
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().split()[2] != 'Z'
+    except OSError:
+        return True
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='process groups')
+def test_cancelled_command_kills_its_whole_process_tree(tmp_path):
+    pid_file = tmp_path / 'child.pid'
+    script = ('import subprocess, sys, time\n'
+              'child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])\n'
+              f'open({str(pid_file)!r}, "w").write(str(child.pid))\n'
+              'time.sleep(60)\n')
+
+    async def cancel_midway():
+        task = asyncio.ensure_future(run_command([sys.executable, '-c', script], str(tmp_path), 60))
+        while not pid_file.exists() or not pid_file.read_text():
+            await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_midway())
+    child = int(pid_file.read_text())
+    deadline = time.monotonic() + 5
+    while _alive(child) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(child)
+
+
+def test_agents_past_the_deadline_are_cancelled_and_marked_truncated(monkeypatch, tmp_path):
+    monkeypatch.setattr(scanner, 'DEADLINE_GRACE', 0.1)
+    cancelled = []
+
+    async def fast():
+        return [{'file': 'a.py', 'line': 1, 'rule_id': 'E1', 'tool': 'flake8', 'message': 'm'}]
+
+    async def slow():
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append('Go')
+            raise
+
+    async def tasks(*args):
+        return [], [("Python", fast()), ("Go", slow())]
+    monkeypatch.setattr(scanner, '_incremental_tasks', tasks)
+
+    begin = time.monotonic()
+    issues = asyncio.run(scanner.scan_repository(
+        str(tmp_path), file_index=object(), changed_paths=['a.py'], previous_issues=[], deadline=0.2))
+
+    assert time.monotonic() - begin < 5
+    assert len(issues) == 1 and issues.truncated == {'Go agent'}
+    assert cancelled == ['Go']
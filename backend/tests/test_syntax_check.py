@@ -0,0 +1,57 @@
+import pytest
+
+from agent import fixer
+from agent.fix_router import FixRouter
+from agent.fixer import SyntaxCheck, _bracket_error, fix_file
+
+
+@pytest.mark.parametrize('text, error', [
+    ('const a = [1, 2];\nfoo(a);\n', None),
+    ('const s = "(";\n// )\n/* { */\nconst t = `}`;\n', None),
+    ('if (a) {\n  b();\n', (1, "unclosed '{'")),
+    ('foo(a]);\n', (1, "unmatched ']'")),
+    ('const s = "open;\n', (1, "unterminated string")),
+    ('/* never closed\n', (2, "unterminated string or comment")),
+])
+def test_bracket_balance(text, error):
+    result = _bracket_error(text)
+    assert (result[:2] if result else None) == error
+
+
+def test_go_raw_strings_keep_backslashes():
+    assert _bracket_error('var re = `\\d+`\nfunc f() {}\n', go=True) is None
+
+
+def test_edits_may_not_break_a_parsing_file():
+    check = SyntaxCheck('a.py', ['def f():\n', '    return 1\n'])
+    assert check.verify(['def f():\n', '    return (1\n']).startswith('line ')
+    assert check.verify(['def f():\n', '    return 2\n']) is None
+    assert SyntaxCheck('README.md', ['(\n']).verify(['((\n']) is None
+
+
+def test_a_file_that_already_fails_accepts_edits_that_keep_or_move_the_error_later():
+    lines = ['x = (\n', 'y = 1\n', 'z = 2\n']
+    check = SyntaxCheck('a.py', lines)
+    assert check.error is not None
+    assert check.verify(['x = (\n', 'y = 1  \n', 'z = 2\n']) is None        # unrelated edit
+    assert check.verify(['x = ()\n', 'y = 1\n', 'z = (\n']) is None         # error moved later
+    assert check.verify(['x = ()\n', 'y = 1\n', 'z = ()\n']) is None        # fixed
+    assert check.verify(['x = (]\n', 'y = 1\n', 'z = ()\n']) is not None    # a new error
+
+
+def test_a_fix_that_breaks_the_syntax_is_rolled_back(make_repo, fake_ai, monkeypatch):
+    monkeypatch.setattr(fixer, 'get_fix_router', FixRouter)
+    fake_ai(lambda messages: '    return (undefined')
+    source = 'def f():\n    return undefined\n'
+    repo = make_repo({'app.py': source})
+
+    [result] = fix_file(repo, 'app.py', [{'file': 'app.py', 'line': 2, 'rule_id': 'F821',
+                                          'message': "F821 undefined name 'undefined'", 'tool': 'flake8',
+                                          'language': 'python', 'type': 'LOGIC', 'severity': 'error'}])
+
+    # The AI answer is rejected; the heuristic fallback (noqa) keeps the file parsing
+    assert result.get('method') != 'ai'
+    with open(f'{repo}/app.py') as f:
+        text = f.read()
+    assert 'return (undefined' not in text
+    compile(text, 'app.py', 'exec')
@@ -0,0 +1,46 @@
+import os
+
+from agent.workspace import RELATED_CHARS, Workspace
+
+
+def _lines(text):
+    return text.splitlines(True)
+
+
+def test_python_relative_imports_resolve_to_modules_and_packages(make_repo):
+    repo = make_repo({
+        'pkg/sub/mod.py': '',
+        'pkg/sub/helpers.py': 'def helper(): pass\n',
+        'pkg/models/__init__.py': 'class Model: pass\n',
+        'pkg/util.py': 'X = 1\n',
+    })
+    ws = Workspace(repo)
+    source = 'import os\nfrom .helpers import helper\nfrom ..models import Model\nfrom .missing import x\n'
+    assert ws.imports('pkg/sub/mod.py', _lines(source)) == ['pkg/sub/helpers.py', 'pkg/models/__init__.py']
+    assert ws.imports('pkg/sub/mod.py', []) == ['pkg/sub/helpers.py', 'pkg/models/__init__.py']  # cached
+
+
+def test_js_imports_try_extensions_and_index_files_inside_the_repo(make_repo):
+    repo = make_repo({
+        'src/app.ts': '',
+        'src/api.ts': 'export const api = 1;\n',
+        'src/components/index.js': 'export default 1;\n',
+    })
+    ws = Workspace(repo)
+    source = ("import { api } from './api';\nimport C from './components';\n"
+              "import x from '../../outside';\nimport React from 'react';\n")
+    assert ws.imports('src/app.ts', _lines(source)) == ['src/api.ts', 'src/components/index.js']
+
+
+def test_snippets_are_bounded_and_invalidate_rereads(make_repo):
+    repo = make_repo({'a/main.py': '', 'a/big.py': 'x' * (RELATED_CHARS * 2)})
+    ws = Workspace(repo)
+    [snippet] = ws.related_snippets('a/main.py', ['from .big import x\n'])
+    assert snippet == f"--- big.py ---\n{'x' * RELATED_CHARS}"
+
+    with open(os.path.join(repo, 'a/big.py'), 'w') as f:
+        f.write('changed\n')
+    assert ws.read('a/big.py').startswith('x')        # read once per run
+    ws.invalidate('a/big.py')
+    assert ws.read('a/big.py') == 'changed\n'
+    assert ws.read('a/none.py') is None